@@ -1,49 +1,43 @@
 import sys
-import os
-import subprocess
-import requests
-from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QTextEdit, QHBoxLayout, QLineEdit
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QPlainTextEdit, QHBoxLayout, QLineEdit, QAbstractItemView
+from jobs import ExecutorFull, get_executor
+from qt_jobs import JobSignals, SlotStateSignals, HostStatusSignals, ConfigSignals, LogViewFlusher, StallDetector
+from applog import log_message
+from slot_state import get_state_cache, state_text
+from monitor import get_monitor, status_text
+from core import get_controller
+from commands import CommandError, Info, compile_script, load_script, submit_plan
+from config import get_config, get_registry
 
 # Program: JadivDevControl for C14, verzia 7.3
 
-def log_message(log_widget, message):
-    timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
-    log_widget.append(f"{timestamp} {message}")
-
-def manual_update(log_widget):
-    update_url = 'https://github.com/jan-tdy/aplikacia8ejw8idue8wo/raw/main/main.py'
-    target_path = '/home/dpv/j44softapps-socketcontrol/main.py'
-    try:
-        response = requests.get(update_url)
-        if response.status_code == 200:
-            if os.path.exists(target_path):
-                os.remove(target_path)
-            with open(target_path, 'wb') as f:
-                f.write(response.content)
-            log_message(log_widget, "Aktualizácia úspešne stiahnutá. Zatvorte a znovu otvorte program.")
-        else:
-            log_message(log_widget, "Chyba pri sťahovaní aktualizácie.")
-    except requests.RequestException as e:
-        log_message(log_widget, f"Chyba pri sťahovaní aktualizácie: {e}")
-
 class ControlApp(QWidget):
     def __init__(self, devices):
         super().__init__()
         self.devices = devices
+        self.jobs = JobSignals(get_executor(), self)
+        self.slot_states = SlotStateSignals(get_state_cache(), self)
+        self.host_states = HostStatusSignals(get_monitor(self.devices), self)
+        self.config_signals = ConfigSignals(get_registry(), self)
+        self.stall = StallDetector(parent=self)
         self.init_ui()
+        self.slot_states.slot_changed.connect(self.zobraz_stav_zasuvky)
+        self.host_states.host_changed.connect(self.zobraz_dostupnost)
+        self.config_signals.config_changed.connect(self.zmen_konfiguraciu)
+        get_controller().start()
 
     def init_ui(self):
         layout = QVBoxLayout()
         self.intro_label = QLabel("JadivDevControl for C14, verzia 7.3")
         layout.addWidget(self.intro_label)
 
-        self.log_widget = QTextEdit()
+        self.log_widget = QPlainTextEdit()
         self.log_widget.setReadOnly(True)
+        self.log_view = LogViewFlusher(self.log_widget, parent=self)
         layout.addWidget(self.log_widget)
 
         self.ota_button = QPushButton("OTA Update")
-        self.ota_button.clicked.connect(lambda: manual_update(self.log_widget))
+        self.ota_button.clicked.connect(lambda: self.run_core(get_controller().update))
         layout.addWidget(self.ota_button)
 
         self.init_wol_ui(layout)
@@ -55,10 +49,20 @@ class ControlApp(QWidget):
         self.setWindowTitle("JadivDevControl for C14, verzia 7.3")
         self.resize(800, 600)
 
+    def run_core(self, action, *args, on_done=None):
+        """Zavolá akciu jadra (Controller); on_done(job) príde cez Qt signál v GUI vlákne."""
+        try:
+            job = action(*args)
+        except (ExecutorFull, ValueError) as e:
+            log_message(str(e))
+            return None
+        return self.jobs.track(job, on_done)
+
     def init_wol_ui(self, layout):
         self.list_widget = QListWidget()
+        self.list_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
         for device in self.devices:
-            self.list_widget.addItem(f"{device['name']} - {device['mac']} - {device['ip']}")
+            self.list_widget.addItem(self.device_item_text(device))
         layout.addWidget(self.list_widget)
         self.mac_input = QLineEdit()
         self.mac_input.setPlaceholderText("Zadajte MAC adresu pre WOL")
@@ -66,32 +70,51 @@ class ControlApp(QWidget):
         self.btn_wake = QPushButton("Wake")
         self.btn_wake.clicked.connect(self.wake_device)
         layout.addWidget(self.btn_wake)
+        self.btn_wake_all = QPushButton("Wake všetky")
+        self.btn_wake_all.clicked.connect(lambda: self.wol([device['mac'] for device in self.devices]))
+        layout.addWidget(self.btn_wake_all)
     
+    def device_item_text(self, device):
+        stav = status_text(get_monitor().status(device['ip']))
+        return f"[{stav}] {device['name']} - {device['mac']} - {device['ip']}"
+
+    def zobraz_dostupnost(self, ip, status):
+        """Aktualizácia riadku v zozname WOL podľa monitora dostupnosti."""
+        for row, device in enumerate(self.devices):
+            if device['ip'] == ip:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
     def wake_device(self):
-        selected = self.list_widget.currentRow()
+        rows = sorted(index.row() for index in self.list_widget.selectedIndexes())
+        macs = [self.devices[row]['mac'] for row in rows]
         mac_address = self.mac_input.text().strip()
-        if selected >= 0:
-            device = self.devices[selected]
-            mac_address = device['mac']
-        if mac_address:
-            try:
-                subprocess.run(["wakeonlan", mac_address], shell=True, check=True)
-                log_message(self.log_widget, f"Odoslaný WOL pre {mac_address}")
-            except subprocess.CalledProcessError as e:
-                log_message(self.log_widget, f"Chyba pri WOL: {e}")
+        if not macs and mac_address:
+            macs = [mac_address]
+        if macs:
+            self.wol(macs)
         else:
-            log_message(self.log_widget, "Nezadaná MAC adresa!")
+            log_message("Nezadaná MAC adresa!")
+
+    def wol(self, macs):
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Odoslaný WOL pre {', '.join(macs)}")
+            else:
+                log_message(f"Chyba pri WOL: {job.error_text}")
+        self.run_core(get_controller().wake, macs, on_done=hotovo)
 
     def init_zasuvky_ui(self, layout):
-        slot_names = {1: "none(1)", 2: "AZ2000(2)", 3: "C14(3)", 4: "UNKNOWN(4)"}
+        slot_names = get_config().slots
         self.slot_labels = {}
+        self.slot_buttons = {}
 
-        for slot in range(1, 5):
+        for slot in slot_names:
             zasuvka_layout = QHBoxLayout()
-            stav_label = QLabel("OFF")
+            stav_label = QLabel(state_text(get_state_cache().get(slot)))
             self.slot_labels[slot] = stav_label
             btn_on = QPushButton(f"Zapnúť {slot_names[slot]}")
             btn_off = QPushButton(f"Vypnúť {slot_names[slot]}")
+            self.slot_buttons[slot] = (btn_on, btn_off)
             btn_on.clicked.connect(lambda checked, s=slot: self.zapni_zasuvku(s))
             btn_off.clicked.connect(lambda checked, s=slot: self.vypni_zasuvku(s))
             zasuvka_layout.addWidget(stav_label)
@@ -99,21 +122,53 @@ class ControlApp(QWidget):
             zasuvka_layout.addWidget(btn_off)
             layout.addLayout(zasuvka_layout)
 
+    def zobraz_stav_zasuvky(self, slot, on):
+        """Štítky zásuviek sa menia len podľa cache stavu lišty."""
+        if slot in self.slot_labels:
+            self.slot_labels[slot].setText(state_text(on))
+
+    def zmen_konfiguraciu(self, config, changed):
+        """Po zmene config.json sa prekreslia len dotknuté časti okna."""
+        if "devices" in changed:
+            self.zmen_zariadenia(config.devices)
+        if "slots" in changed:
+            self.zmen_nazvy_zasuviek(config.slots)
+
+    def zmen_zariadenia(self, devices):
+        old, self.devices = self.devices, list(devices)
+        if len(old) != len(self.devices):
+            self.list_widget.clear()
+            for device in self.devices:
+                self.list_widget.addItem(self.device_item_text(device))
+            return
+        for row, (pred, device) in enumerate(zip(old, self.devices)):
+            if pred != device:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
+    def zmen_nazvy_zasuviek(self, slots):
+        for slot, (btn_on, btn_off) in self.slot_buttons.items():
+            name = slots.get(slot, str(slot))
+            if btn_on.text() != f"Zapnúť {name}":
+                btn_on.setText(f"Zapnúť {name}")
+                btn_off.setText(f"Vypnúť {name}")
+        if set(slots) != set(self.slot_buttons):
+            log_message("Pridanie alebo odobratie zásuvky sa prejaví po reštarte programu.")
+
     def zapni_zasuvku(self, slot):
-        try:
-            subprocess.run(["syspmctl", "-o", str(slot)], shell=True, check=True)
-            self.slot_labels[slot].setText("ON")
-            log_message(self.log_widget, f"Zásuvka {slot} zapnutá.")
-        except subprocess.CalledProcessError as e:
-            log_message(self.log_widget, f"Chyba pri zapínaní zásuvky {slot}: {e}")
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Zásuvka {slot} zapnutá.")
+            else:
+                log_message(f"Chyba pri zapínaní zásuvky {slot}: {job.error_text}")
+        self.run_core(get_controller().switch, slot, True, on_done=hotovo)
 
     def vypni_zasuvku(self, slot):
-        try:
-            subprocess.run(["syspmctl", "-f", str(slot)], shell=True, check=True)
-            self.slot_labels[slot].setText("OFF")
-            log_message(self.log_widget, f"Zásuvka {slot} vypnutá.")
-        except subprocess.CalledProcessError as e:
-            log_message(self.log_widget, f"Chyba pri vypínaní zásuvky {slot}: {e}")
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Zásuvka {slot} vypnutá.")
+            else:
+                log_message(f"Chyba pri vypínaní zásuvky {slot}: {job.error_text}")
+        self.run_core(get_controller().switch, slot, False, on_done=hotovo)
 
     def init_strecha_ui(self, layout):
         btn_strecha_on = QPushButton("Pohnut strechou")
@@ -121,11 +176,12 @@ class ControlApp(QWidget):
         layout.addWidget(btn_strecha_on)
 
     def run_strecha_on(self):
-        try:
-            subprocess.run("cd /home/dpv/Downloads/usb-relay-hid-master/commandline/makemake && ./strecha_on.sh", shell=True, check=True)
-            log_message(self.log_widget, "Strecha pohybovaná.")
-        except subprocess.CalledProcessError as e:
-            log_message(self.log_widget, f"Chyba pri pohybe strechy: {e}")
+        def hotovo(job):
+            if job.ok:
+                log_message("Strecha pohybovaná.")
+            else:
+                log_message(f"Chyba pri pohybe strechy: {job.error_text}")
+        self.run_core(get_controller().roof, on_done=hotovo)
 
     def init_terminal_ui(self, layout):
         self.terminal_input = QLineEdit()
@@ -134,32 +190,38 @@ class ControlApp(QWidget):
         layout.addWidget(self.terminal_input)
 
     def execute_command(self):
+        """Riadok terminálu je skript: príkazy oddelené ";", bloky parallel ... end, skript <súbor>."""
         command = self.terminal_input.text().strip()
-        log_message(self.log_widget, f"Spustený príkaz: {command}")
-
-        if command == "update":
-            manual_update(self.log_widget)
-        elif command.startswith("zasuvka"):
-            _, action, slot = command.split()
-            slot = int(slot)
-            if action == "on":
-                self.zapni_zasuvku(slot)
-            elif action == "off":
-                self.vypni_zasuvku(slot)
-        elif command.startswith("wol"):
-            _, mac = command.split()
-            subprocess.run(["wakeonlan", mac], shell=True, check=True)
-            log_message(self.log_widget, f"Odoslaný WOL pre {mac}")
-        elif command == "strecha":
-            self.run_strecha_on()
-        else:
-            log_message(self.log_widget, "Neznámy príkaz!")
-
         self.terminal_input.clear()
+        if not command:
+            return
+        log_message(f"Spustený príkaz: {command}")
+        try:
+            parts = command.split(maxsplit=1)
+            if parts[0] == "skript":
+                if len(parts) != 2:
+                    raise CommandError("Použitie: skript <súbor>")
+                plan = load_script(parts[1])
+            else:
+                plan = compile_script(command)
+        except (CommandError, OSError) as e:
+            log_message(str(e))
+            return
+        if all(isinstance(step, Info) for step in plan.steps):
+            for step in plan.steps:
+                log_message(step.func())
+            return
+
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Hotovo: {plan.describe()}")
+            else:
+                log_message(f"Chyba: {job.error_text}")
+        self.run_core(submit_plan, plan, on_done=hotovo)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    devices = []
+    devices = list(get_registry().start().config.devices)
     window = ControlApp(devices)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
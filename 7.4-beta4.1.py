@@ -1,15 +1,25 @@
+import time
+_import_start = time.perf_counter()
 import sys
 import os
-import subprocess
-import requests
 import json
 from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QTextEdit, QHBoxLayout, QLineEdit, QStackedWidget, QComboBox
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QPlainTextEdit, QHBoxLayout, QLineEdit, QStackedWidget, QComboBox, QAbstractItemView, QTableWidget, QTableWidgetItem
 from PyQt5.QtGui import QPalette, QColor
+from PyQt5.QtCore import QTimer
+from jobs import ExecutorFull, get_executor
+from qt_jobs import JobSignals, SlotStateSignals, HostStatusSignals, ConfigSignals, LogViewFlusher, RoofSignals, SiteSignals, StallDetector
+from applog import log_message
+from slot_state import get_state_cache, state_text
+from monitor import get_monitor, status_text
+from config import get_config, get_registry
+
+IMPORT_TIME = time.perf_counter() - _import_start
 
 # Nastavenia
 SETTINGS_FILE = "settings.json"
-MAC_FILE = "mac.json"
+METRICS_REFRESH_MS = 1000
+GRAPH_REFRESH_MS = 10000
 
 # Načítanie a uloženie nastavení
 def load_settings():
@@ -22,17 +32,28 @@ def save_settings(settings):
     with open(SETTINGS_FILE, "w") as f:
         json.dump(settings, f, indent=4)
 
-def log_message(log_widget, message):
-    timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
-    log_widget.append(f"{timestamp} {message}")
-    print(f"{timestamp} {message}")
-
 class ControlApp(QWidget):
     def __init__(self, devices):
         super().__init__()
+        self.started = time.perf_counter()
         self.devices = devices
         self.settings = load_settings()
+        self.pages = {}
+        self.page_times = {}
+        self.slot_labels = {}
+        self.slot_buttons = {}
+        self.agent_rows = {}
+        self.jobs = JobSignals(get_executor(), self)
+        self.slot_states = SlotStateSignals(get_state_cache(), self)
+        self.host_states = HostStatusSignals(get_monitor(self.devices), self)
+        self.config_signals = ConfigSignals(get_registry(), self)
+        self.stall = StallDetector(parent=self)
         self.init_ui()
+        self.slot_states.slot_changed.connect(self.zobraz_stav_zasuvky)
+        self.host_states.host_changed.connect(self.zobraz_dostupnost)
+        self.config_signals.config_changed.connect(self.zmen_konfiguraciu)
+        # Jadro (poller, monitor, história) sa spustí až keď je okno zobrazené.
+        QTimer.singleShot(0, self.po_zobrazeni)
         
     def apply_theme(self, theme):
         palette = self.palette()
@@ -58,6 +79,7 @@ class ControlApp(QWidget):
         self.page_log = QWidget()
         self.page_settings = QWidget()
         self.page_ota = QWidget()
+        self.page_lokalita = QWidget()
         
         self.stack.addWidget(self.page_wol)
         self.stack.addWidget(self.page_zasuvky)
@@ -65,6 +87,7 @@ class ControlApp(QWidget):
         self.stack.addWidget(self.page_log)
         self.stack.addWidget(self.page_settings)
         self.stack.addWidget(self.page_ota)
+        self.stack.addWidget(self.page_lokalita)
         
         menu_layout = QHBoxLayout()
         self.btn_wol = QPushButton("WOL")
@@ -73,13 +96,15 @@ class ControlApp(QWidget):
         self.btn_log = QPushButton("Log")
         self.btn_settings = QPushButton("Nastavenia")
         self.btn_ota = QPushButton("OTA Update")
+        self.btn_lokalita = QPushButton("Lokalita")
 
-        self.btn_wol.clicked.connect(lambda: self.stack.setCurrentWidget(self.page_wol))
-        self.btn_zasuvky.clicked.connect(lambda: self.stack.setCurrentWidget(self.page_zasuvky))
-        self.btn_strecha.clicked.connect(lambda: self.stack.setCurrentWidget(self.page_strecha))
-        self.btn_log.clicked.connect(lambda: self.stack.setCurrentWidget(self.page_log))
-        self.btn_settings.clicked.connect(lambda: self.stack.setCurrentWidget(self.page_settings))
-        self.btn_ota.clicked.connect(lambda: self.stack.setCurrentWidget(self.page_ota))
+        self.btn_wol.clicked.connect(lambda: self.zobraz_stranku("wol"))
+        self.btn_zasuvky.clicked.connect(lambda: self.zobraz_stranku("zasuvky"))
+        self.btn_strecha.clicked.connect(lambda: self.zobraz_stranku("strecha"))
+        self.btn_log.clicked.connect(lambda: self.zobraz_stranku("log"))
+        self.btn_settings.clicked.connect(lambda: self.zobraz_stranku("settings"))
+        self.btn_ota.clicked.connect(lambda: self.zobraz_stranku("ota"))
+        self.btn_lokalita.clicked.connect(lambda: self.zobraz_stranku("lokalita"))
 
         menu_layout.addWidget(self.btn_wol)
         menu_layout.addWidget(self.btn_zasuvky)
@@ -87,50 +112,519 @@ class ControlApp(QWidget):
         menu_layout.addWidget(self.btn_log)
         menu_layout.addWidget(self.btn_settings)
         menu_layout.addWidget(self.btn_ota)
+        menu_layout.addWidget(self.btn_lokalita)
 
         layout.addLayout(menu_layout)
         layout.addWidget(self.stack)
-        self.init_wol_ui()
-        self.init_zasuvky_ui()
-        self.init_strecha_ui()
-        self.init_log_ui()
-        self.init_settings_ui()
-        self.init_ota_ui()
-        
+        # Log sa zbiera od štartu, aj keď stránka Log ešte nie je postavená.
+        self.log_widget = QPlainTextEdit()
+        self.log_widget.setReadOnly(True)
+        self.log_view = LogViewFlusher(self.log_widget, parent=self)
+
+        self.page_builders = {
+            "wol": (self.page_wol, self.init_wol_ui),
+            "zasuvky": (self.page_zasuvky, self.init_zasuvky_ui),
+            "strecha": (self.page_strecha, self.init_strecha_ui),
+            "log": (self.page_log, self.init_log_ui),
+            "settings": (self.page_settings, self.init_settings_ui),
+            "ota": (self.page_ota, self.init_ota_ui),
+            "lokalita": (self.page_lokalita, self.init_lokalita_ui),
+        }
+        self.zobraz_stranku("wol")
+
         self.setLayout(layout)
         self.setWindowTitle("JadivDevControl for C14, verzia 7.4")
         self.resize(800, 600)
         self.show()
     
+    def zobraz_stranku(self, name):
+        """Prepne stránku; jej obsah sa postaví až pri prvom otvorení."""
+        page, builder = self.page_builders[name]
+        if name not in self.pages:
+            start = time.perf_counter()
+            builder()
+            self.pages[name] = page
+            self.page_times[name] = time.perf_counter() - start
+        self.stack.setCurrentWidget(page)
+        if name == "log":
+            self.obnov_graf()
+
+    def po_zobrazeni(self):
+        from core import get_controller
+        window_time = time.perf_counter() - self.started
+        get_controller().start(poll_interval=self.settings.get("poll_interval"))
+        log_message(self.startup_report(window_time))
+
+    def startup_report(self, window_time):
+        pages = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.page_times.items())
+        return f"Štart: importy {IMPORT_TIME * 1000:.0f} ms, okno {window_time * 1000:.0f} ms (stránky: {pages})"
+
+    def run_core(self, action, *args, on_done=None):
+        """Zavolá akciu jadra (Controller); on_done(job) príde cez Qt signál v GUI vlákne."""
+        try:
+            job = action(*args)
+        except (ExecutorFull, ValueError) as e:
+            log_message(str(e))
+            return None
+        return self.jobs.track(job, on_done)
+
+    def init_wol_ui(self):
+        layout = QVBoxLayout()
+        self.list_widget = QListWidget()
+        self.list_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        for device in self.devices:
+            self.list_widget.addItem(self.device_item_text(device))
+        layout.addWidget(self.list_widget)
+        self.mac_input = QLineEdit()
+        self.mac_input.setPlaceholderText("Zadajte MAC adresu pre WOL")
+        layout.addWidget(self.mac_input)
+        btn_layout = QHBoxLayout()
+        btn_wake = QPushButton("Wake vybrané")
+        btn_wake.clicked.connect(self.wake_device)
+        btn_wake_all = QPushButton("Wake všetky")
+        btn_wake_all.clicked.connect(lambda: self.wake_group([device['mac'] for device in self.devices]))
+        btn_layout.addWidget(btn_wake)
+        btn_layout.addWidget(btn_wake_all)
+        layout.addLayout(btn_layout)
+        self.page_wol.setLayout(layout)
+
+    def device_item_text(self, device):
+        stav = status_text(get_monitor().status(device['ip']))
+        return f"[{stav}] {device['name']} - {device['mac']} - {device['ip']}"
+
+    def zobraz_dostupnost(self, ip, status):
+        """Aktualizácia riadku v zozname WOL podľa monitora dostupnosti."""
+        for row, device in enumerate(self.devices):
+            if device['ip'] == ip:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
+    def wake_device(self):
+        rows = sorted(index.row() for index in self.list_widget.selectedIndexes())
+        macs = [self.devices[row]['mac'] for row in rows]
+        mac_address = self.mac_input.text().strip()
+        if not macs and mac_address:
+            macs = [mac_address]
+        if macs:
+            self.wake_group(macs)
+        else:
+            log_message("Nezadaná MAC adresa!")
+
+    def wake_group(self, macs):
+        from core import get_controller
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Odoslaný WOL pre {', '.join(macs)}")
+            else:
+                log_message(f"Chyba pri WOL: {job.error_text}")
+        self.run_core(get_controller().wake, macs, on_done=hotovo)
+
+    def init_log_ui(self):
+        layout = QVBoxLayout()
+        layout.addWidget(self.log_widget)
+
+        layout.addWidget(QLabel("História akcií"))
+        filter_layout = QHBoxLayout()
+        self.history_action = QComboBox()
+        for text, action in [("Všetky akcie", None), ("Zásuvky", "zasuvka"), ("WOL", "wol"), ("Strecha", "strecha")]:
+            self.history_action.addItem(text, action)
+        self.history_device = QComboBox()
+        self.napln_filter_zariadeni()
+        self.history_range = QComboBox()
+        for text, seconds in [("Posledný deň", 86400), ("Posledný týždeň", 7 * 86400),
+                              ("Posledný mesiac", 30 * 86400), ("Celá história", None)]:
+            self.history_range.addItem(text, seconds)
+        btn_hladat = QPushButton("Hľadať")
+        btn_hladat.clicked.connect(self.hladaj_historiu)
+        filter_layout.addWidget(self.history_action)
+        filter_layout.addWidget(self.history_device)
+        filter_layout.addWidget(self.history_range)
+        filter_layout.addWidget(btn_hladat)
+        layout.addLayout(filter_layout)
+
+        self.history_table = QTableWidget(0, 5)
+        self.history_table.setHorizontalHeaderLabels(["Čas", "Akcia", "Zariadenie", "Výsledok", "Trvanie"])
+        self.history_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.history_table)
+
+        self.page_log.setLayout(layout)
+        try:
+            # Graf potrebuje numpy; načíta sa až s touto stránkou, nie pri štarte.
+            from qt_graph import TimeSeriesGraph
+        except ImportError:
+            self.graph = None
+            return
+        layout.addWidget(QLabel("Priebeh stavu a latencie"))
+        graph_layout = QHBoxLayout()
+        self.graph_channel = QComboBox()
+        self.graph_range = QComboBox()
+        for text, seconds in [("6 hodín", 6 * 3600), ("Deň", 86400), ("Týždeň", 7 * 86400),
+                              ("Mesiac", 30 * 86400), ("Rok", 365 * 86400)]:
+            self.graph_range.addItem(text, seconds)
+        self.graph_range.setCurrentIndex(1)
+        self.graph_info = QLabel()
+        graph_layout.addWidget(self.graph_channel)
+        graph_layout.addWidget(self.graph_range)
+        graph_layout.addWidget(self.graph_info)
+        layout.addLayout(graph_layout)
+        self.graph = TimeSeriesGraph()
+        layout.addWidget(self.graph)
+        self.graph_channel.activated.connect(self.obnov_graf)
+        self.graph_range.activated.connect(self.obnov_graf)
+        self.graph_timer = QTimer(self)
+        self.graph_timer.timeout.connect(self.obnov_graf)
+        self.graph_timer.start(GRAPH_REFRESH_MS)
+
+    def obnov_graf(self):
+        """Graf sa číta z agregovaných vrstiev telemetrie, len keď je stránka Log zobrazená."""
+        if self.graph is None or self.stack.currentWidget() is not self.page_log:
+            return
+        from core import get_controller
+        from telemetry import channel_unit
+        store = get_controller().telemetry
+        if store is None:
+            self.graph_info.setText("Telemetria nebeží (chýba numpy?)")
+            return
+        channels = list(store.channels)
+        if self.graph_channel.count() != len(channels):
+            vybrany = self.graph_channel.currentText()
+            self.graph_channel.clear()
+            self.graph_channel.addItems(channels)
+            self.graph_channel.setCurrentIndex(max(0, self.graph_channel.findText(vybrany)))
+        channel = self.graph_channel.currentText()
+        if not channel:
+            return
+        start = time.perf_counter()
+        end = time.time()
+        series = store.series(channel, end - self.graph_range.currentData(), end, max(100, self.graph.width()))
+        self.graph.set_series(series, end - self.graph_range.currentData(), end, channel_unit(channel))
+        self.graph_info.setText(f"{series['tier']}, {len(series['times'])} bodov, "
+                                f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def napln_filter_zariadeni(self):
+        vybrane = self.history_device.currentData()
+        self.history_device.clear()
+        self.history_device.addItem("Všetky zariadenia", None)
+        for slot, name in get_config().slots.items():
+            self.history_device.addItem(f"Zásuvka {name}", f"zasuvka {slot}")
+        for device in self.devices:
+            self.history_device.addItem(f"WOL {device['name']}", device['mac'].lower())
+        self.history_device.addItem("Strecha", "strecha")
+        self.history_device.setCurrentIndex(max(0, self.history_device.findData(vybrane)))
+
+    def hladaj_historiu(self):
+        from history import get_history
+        seconds = self.history_range.currentData()
+        start = time.time() - seconds if seconds else None
+        rows = get_history().query(start=start, action=self.history_action.currentData(),
+                                   device=self.history_device.currentData())
+        self.history_table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            akcia = f"{row['action']} {row['value']}" if row['value'] else row['action']
+            trvanie = f"{row['duration']:.2f} s" if row['duration'] is not None else ""
+            vysledok = row['result'] if not row['detail'] else f"{row['result']}: {row['detail']}"
+            for col, text in enumerate([datetime.fromtimestamp(row['ts']).strftime("%Y-%m-%d %H:%M:%S"),
+                                        akcia, row['device'], vysledok, trvanie]):
+                self.history_table.setItem(i, col, QTableWidgetItem(text))
+
     def init_zasuvky_ui(self):
         layout = QVBoxLayout()
-        slot_names = {1: "none(1)", 2: "AZ2000(2)", 3: "C14(3)", 4: "UNKNOWN(4)"}
-        for slot in range(1, 5):
+        slot_names = get_config().slots
+        for slot in slot_names:
             slot_layout = QHBoxLayout()
+            stav_label = QLabel(state_text(get_state_cache().get(slot)))
+            self.slot_labels[slot] = stav_label
+            slot_layout.addWidget(stav_label)
             btn_on = QPushButton(f"Zapnúť {slot_names[slot]}")
             btn_off = QPushButton(f"Vypnúť {slot_names[slot]}")
-            btn_on.clicked.connect(lambda checked, s=slot: subprocess.run(["sispmctl", "-o", str(s)], shell=True))
-            btn_off.clicked.connect(lambda checked, s=slot: subprocess.run(["sispmctl", "-f", str(s)], shell=True))
+            self.slot_buttons[slot] = (btn_on, btn_off)
+            btn_on.clicked.connect(lambda checked, s=slot: self.nastav_zasuvky({s: True}))
+            btn_off.clicked.connect(lambda checked, s=slot: self.nastav_zasuvky({s: False}))
             slot_layout.addWidget(btn_on)
             slot_layout.addWidget(btn_off)
             layout.addLayout(slot_layout)
+        all_layout = QHBoxLayout()
+        btn_all_on = QPushButton("Zapnúť všetky")
+        btn_all_off = QPushButton("Vypnúť všetky")
+        btn_all_on.clicked.connect(lambda: self.nastav_zasuvky({s: True for s in self.slot_buttons}))
+        btn_all_off.clicked.connect(lambda: self.nastav_zasuvky({s: False for s in self.slot_buttons}))
+        all_layout.addWidget(btn_all_on)
+        all_layout.addWidget(btn_all_off)
+        layout.addLayout(all_layout)
         self.page_zasuvky.setLayout(layout)
+
+    def zobraz_stav_zasuvky(self, slot, on):
+        """Štítky zásuviek sa menia len podľa cache stavu lišty."""
+        if slot in self.slot_labels:
+            self.slot_labels[slot].setText(state_text(on))
+
+    def zmen_konfiguraciu(self, config, changed):
+        """Po zmene config.json sa prekreslia len dotknuté časti okna."""
+        if "devices" in changed:
+            self.zmen_zariadenia(config.devices)
+        if "slots" in changed:
+            self.zmen_nazvy_zasuviek(config.slots)
+        if changed & {"devices", "slots"} and "log" in self.pages:
+            self.napln_filter_zariadeni()
+        if "sequences" in changed and "strecha" in self.pages:
+            self.napln_sekvencie()
+
+    def zmen_zariadenia(self, devices):
+        old, self.devices = self.devices, list(devices)
+        if len(old) != len(self.devices):
+            self.list_widget.clear()
+            for device in self.devices:
+                self.list_widget.addItem(self.device_item_text(device))
+            return
+        for row, (pred, device) in enumerate(zip(old, self.devices)):
+            if pred != device:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
+    def zmen_nazvy_zasuviek(self, slots):
+        for slot, (btn_on, btn_off) in self.slot_buttons.items():
+            name = slots.get(slot, str(slot))
+            if btn_on.text() != f"Zapnúť {name}":
+                btn_on.setText(f"Zapnúť {name}")
+                btn_off.setText(f"Vypnúť {name}")
+        if self.slot_buttons and set(slots) != set(self.slot_buttons):
+            log_message("Pridanie alebo odobratie zásuvky sa prejaví po reštarte programu.")
+
+    def nastav_zasuvky(self, states):
+        from core import get_controller
+        def hotovo(job):
+            popis = ", ".join(f"{slot} {'ON' if on else 'OFF'}" for slot, on in states.items())
+            if job.ok:
+                log_message(f"Zásuvky: {popis}")
+            else:
+                log_message(f"Chyba pri prepínaní zásuviek ({popis}): {job.error_text}")
+        self.run_core(get_controller().set_slots, states, on_done=hotovo)
     
+    def init_strecha_ui(self):
+        from core import get_controller
+        from roof import get_roof
+        layout = QVBoxLayout()
+        btn_strecha = QPushButton("Pohnúť strechou")
+        btn_strecha.clicked.connect(self.run_strecha_on)
+        layout.addWidget(btn_strecha)
+        self.strecha_label = QLabel()
+        layout.addWidget(self.strecha_label)
+        btn_reset = QPushButton("Zrušiť poruchu strechy")
+        btn_reset.clicked.connect(lambda: get_controller().roof_reset())
+        layout.addWidget(btn_reset)
+        self.roof_signals = RoofSignals(get_roof(), self)
+        self.roof_signals.roof_changed.connect(self.zobraz_stav_strechy)
+        self.zobraz_stav_strechy(get_controller().roof_status())
+        self.sekvencie_layout = QHBoxLayout()
+        layout.addLayout(self.sekvencie_layout)
+        self.napln_sekvencie()
+        self.page_strecha.setLayout(layout)
+
+    def run_strecha_on(self):
+        from core import get_controller
+        def hotovo(job):
+            if job.ok:
+                log_message("Strecha pohybovaná.")
+            else:
+                log_message(f"Chyba pri pohybe strechy: {job.error_text}")
+        self.run_core(get_controller().roof, on_done=hotovo)
+
+    def zobraz_stav_strechy(self, status):
+        states = {"idle": "v pokoji", "opening": "otvára sa", "closing": "zatvára sa", "fault": "porucha"}
+        positions = {"open": "otvorená", "closed": "zatvorená", "unknown": "poloha neznáma"}
+        text = f"Strecha: {states.get(status['state'], status['state'])}, {positions.get(status['position'], '')}"
+        if status["remaining"]:
+            text += f" ({status['remaining']:.0f} s)"
+        if status["error"]:
+            text += f" - {status['error']}"
+        self.strecha_label.setText(text)
+
+    def napln_sekvencie(self):
+        while self.sekvencie_layout.count():
+            self.sekvencie_layout.takeAt(0).widget().deleteLater()
+        for name in get_config().sequences:
+            btn = QPushButton(f"Sekvencia: {name}")
+            btn.clicked.connect(lambda checked, n=name: self.spusti_sekvenciu(n))
+            self.sekvencie_layout.addWidget(btn)
+
+    def spusti_sekvenciu(self, name):
+        """Sekvencia z config.json; kroky bežia podľa závislostí, nezávislé vetvy súbežne."""
+        from core import get_controller
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Sekvencia {name} hotová za {job.duration:.0f} s.")
+            else:
+                log_message(f"Sekvencia {name} zlyhala: {job.error_text}")
+        self.run_core(get_controller().run_sequence, name, on_done=hotovo)
+
     def init_settings_ui(self):
         layout = QVBoxLayout()
         layout.addWidget(QLabel("Nastavenia systému"))
+        layout.addWidget(QLabel("Metriky akcií (trvanie v ms)"))
+        self.metrics_table = QTableWidget(0, 6)
+        self.metrics_table.setHorizontalHeaderLabels(["Akcia", "Počet", "Chyby", "p50", "p95", "Max"])
+        self.metrics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.metrics_table)
+        self.metrics_label = QLabel()
+        layout.addWidget(self.metrics_label)
+        profile_layout = QHBoxLayout()
+        self.profile_mode = QComboBox()
+        self.profile_mode.addItem("Vzorkovanie (všetky vlákna)", "sample")
+        self.profile_mode.addItem("cProfile (GUI vlákno)", "cprofile")
+        self.btn_profile = QPushButton("Spustiť profilovanie")
+        self.btn_profile.clicked.connect(self.prepni_profilovanie)
+        profile_layout.addWidget(self.profile_mode)
+        profile_layout.addWidget(self.btn_profile)
+        layout.addLayout(profile_layout)
         self.page_settings.setLayout(layout)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.obnov_metriky)
+        self.metrics_timer.start(METRICS_REFRESH_MS)
+        self.obnov_metriky()
+
+    def obnov_metriky(self):
+        """Panel metrík sa prepočíta len keď je stránka Nastavenia zobrazená."""
+        from metrics import action_summary, get_metrics
+        if self.stack.currentWidget() is not self.page_settings and self.metrics_table.rowCount():
+            return
+        rows = action_summary()
+        self.metrics_table.setRowCount(len(rows))
+        for row, (action, values) in enumerate(sorted(rows.items())):
+            cells = [action, str(values["count"]), str(values["errors"])]
+            cells += [f"{values[name] * 1000:.0f}" if name in values else "-" for name in ("p50", "p95", "max")]
+            for column, text in enumerate(cells):
+                self.metrics_table.setItem(row, column, QTableWidgetItem(text))
+        commands = get_metrics().get("jadiv_command_duration_seconds")
+        ota = commands.summary(command="ota_check") if commands else None
+        ota_text = f"{ota['count']}x, max {ota['max'] * 1000:.0f} ms" if ota else "zatiaľ žiadna"
+        self.metrics_label.setText(
+            f"Front executora: {get_executor().queue_depth} | "
+            f"GUI: max oneskorenie {self.stall.max_lag * 1000:.0f} ms, zablokovaní {self.stall.stalls.value():.0f} | "
+            f"Kontroly OTA: {ota_text}")
+
+    def prepni_profilovanie(self):
+        from metrics import get_profiler
+        profiler = get_profiler()
+        try:
+            # Začiatok aj uložený súbor zaloguje samotný profiler.
+            if profiler.running:
+                profiler.stop()
+            else:
+                profiler.start(self.profile_mode.currentData())
+        except (OSError, ValueError) as e:
+            log_message(f"Profilovanie: {e}")
+        self.btn_profile.setText("Zastaviť profilovanie" if profiler.running else "Spustiť profilovanie")
+        self.profile_mode.setEnabled(not profiler.running)
+
+    def init_lokalita_ui(self):
+        """Agenti na ďalších počítačoch; koordinátor sa spustí až pri prvom otvorení stránky."""
+        from coordinator import get_coordinator
+        self.coordinator = get_coordinator()
+        layout = QVBoxLayout()
+        self.agents_table = QTableWidget(0, 5)
+        self.agents_table.setHorizontalHeaderLabels(["Agent", "Adresa", "Stav", "Zásuvky", "Strecha"])
+        self.agents_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.agents_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        layout.addWidget(self.agents_table)
+        self.lokalita_label = QLabel()
+        layout.addWidget(self.lokalita_label)
+        slot_layout = QHBoxLayout()
+        self.agent_slots = QLineEdit()
+        self.agent_slots.setPlaceholderText("Zásuvky, napr. 2 3")
+        btn_on = QPushButton("Zapnúť")
+        btn_on.clicked.connect(lambda: self.prikaz_agentom(f"zasuvka on {self.agent_slots.text()}"))
+        btn_off = QPushButton("Vypnúť")
+        btn_off.clicked.connect(lambda: self.prikaz_agentom(f"zasuvka off {self.agent_slots.text()}"))
+        btn_roof = QPushButton("Pohnúť strechou")
+        btn_roof.clicked.connect(lambda: self.prikaz_agentom("strecha"))
+        slot_layout.addWidget(self.agent_slots)
+        slot_layout.addWidget(btn_on)
+        slot_layout.addWidget(btn_off)
+        slot_layout.addWidget(btn_roof)
+        layout.addLayout(slot_layout)
+        command_layout = QHBoxLayout()
+        self.agent_command = QLineEdit()
+        self.agent_command.setPlaceholderText("Príkaz pre vybraných agentov, napr. wol C14; zasuvka on 2")
+        self.agent_command.returnPressed.connect(lambda: self.prikaz_agentom(self.agent_command.text()))
+        btn_discover = QPushButton("Hľadať agentov")
+        btn_discover.clicked.connect(lambda: self.coordinator.submit(self.coordinator.discover))
+        btn_refresh = QPushButton("Obnoviť")
+        btn_refresh.clicked.connect(lambda: self.coordinator.submit(self.coordinator.refresh))
+        command_layout.addWidget(self.agent_command)
+        command_layout.addWidget(btn_discover)
+        command_layout.addWidget(btn_refresh)
+        layout.addLayout(command_layout)
+        self.page_lokalita.setLayout(layout)
+        self.site_signals = SiteSignals(self.coordinator, self)
+        self.site_signals.agent_changed.connect(self.zobraz_agenta)
+        for agent in self.coordinator.agents():
+            self.zobraz_agenta(agent.to_dict())
+        self.coordinator.start()
+
+    def zobraz_agenta(self, state):
+        name = state["name"]
+        if self.coordinator.get(name) is None:
+            if name in self.agent_rows:
+                removed = self.agent_rows.pop(name)
+                self.agents_table.removeRow(removed)
+                self.agent_rows = {agent: row - (row > removed) for agent, row in self.agent_rows.items()}
+            return
+        if name not in self.agent_rows:
+            self.agent_rows[name] = self.agents_table.rowCount()
+            self.agents_table.insertRow(self.agent_rows[name])
+        if state["online"]:
+            status = state["status"]
+            stav = f"online, {state['latency'] * 1000:.0f} ms"
+            zasuvky = " ".join(f"{slot}:{on}" for slot, on in status["slots"].items())
+            strecha = f"{status['roof']['state']}, {status['roof']['position']}"
+        else:
+            stav = f"nedostupný: {state['error']}" if state["error"] else "čaká sa"
+            zasuvky = strecha = "-"
+        for column, text in enumerate([name, state["url"], stav, zasuvky, strecha]):
+            self.agents_table.setItem(self.agent_rows[name], column, QTableWidgetItem(text))
+        agents = self.coordinator.agents()
+        self.lokalita_label.setText(f"Agenti: {sum(agent.online for agent in agents)}/{len(agents)} dostupných")
+
+    def prikaz_agentom(self, text):
+        """Príkaz terminálu pre vybraných agentov (bez výberu pre všetkých); beží súbežne mimo GUI."""
+        commands = [part.strip() for part in text.split(";") if part.strip()]
+        rows = {index.row() for index in self.agents_table.selectionModel().selectedRows()}
+        names = [name for name, row in self.agent_rows.items() if row in rows] or None
+        if not commands or not self.agent_rows:
+            log_message("Lokalita: chýba príkaz alebo agent.")
+            return
+        self.coordinator.submit(self.coordinator.run, commands, names)
+
+    def init_ota_ui(self):
+        from core import get_controller
+        layout = QVBoxLayout()
+        self.ota_label = QLabel("Stav aktualizácie: neznámy")
+        layout.addWidget(self.ota_label)
+        btn_check = QPushButton("Skontrolovať aktualizácie")
+        btn_check.clicked.connect(self.skontroluj_aktualizacie)
+        btn_update = QPushButton("Stiahnuť aktualizáciu")
+        btn_update.clicked.connect(lambda: self.run_core(get_controller().update, on_done=lambda job: self.skontroluj_aktualizacie()))
+        btn_rollback = QPushButton("Vrátiť predchádzajúcu verziu")
+        btn_rollback.clicked.connect(lambda: self.run_core(get_controller().rollback))
+        layout.addWidget(btn_check)
+        layout.addWidget(btn_update)
+        layout.addWidget(btn_rollback)
+        self.page_ota.setLayout(layout)
+
+    def skontroluj_aktualizacie(self):
+        """Podmienená kontrola mimo GUI vlákna; nezmenený súbor stojí len odpoveď 304."""
+        from core import get_controller
+        def hotovo(job):
+            if not job.ok:
+                self.ota_label.setText(f"Chyba pri kontrole aktualizácie: {job.error_text}")
+            elif job.value.available:
+                self.ota_label.setText("Nová verzia aplikácie je dostupná na Githube!")
+            else:
+                self.ota_label.setText(f"Aplikácia je aktuálna ({datetime.now().strftime('%H:%M:%S')})")
+        self.ota_label.setText("Kontrolujem aktualizácie...")
+        self.run_core(get_controller().check_update, on_done=hotovo)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    devices = [
-        {'name': 'VNT', 'mac': '78:24:af:9c:06:e7', 'ip': '172.20.20.123'},
-        {'name': 'C14', 'mac': 'e0:d5:5e:37:4f:ad', 'ip': '172.20.20.103'},
-        {'name': 'AZ2000 mount', 'mac': '00:c0:08:a9:c2:32', 'ip': '172.20.20.10'},
-        {'name': 'AZ2000 RPi allsky', 'mac': 'd8:3a:dd:9a:05:d4', 'ip': '172.20.20.116'},
-        {'name': 'GM3000 mount', 'mac': '00:c0:08:aa:35:12', 'ip': '172.20.20.12'},
-        {'name': 'GM3000 RPi pi1', 'mac': 'd8:3a:dd:89:4d:d0', 'ip': '172.20.20.112'}
-    ]
+    devices = list(get_registry().start().config.devices)
     app.setStyle("Fusion")
     window = ControlApp(devices)
     window.show()
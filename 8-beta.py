@@ -1,89 +1,48 @@
 import sys
-import os
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Bez GUI: PyQt5 sa vôbec nenačíta (démon pre Raspberry Pi).
+    from headless import main
+    sys.exit(main())
 import socket
-import subprocess
-import requests
 import webbrowser
-import threading
-from datetime import datetime
-from time import sleep
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QTextEdit, QHBoxLayout, QLineEdit
-from flask import Flask, request, jsonify
-
-# Flask app setup
-app = Flask(__name__)
-
-@app.route('/control', methods=['POST'])
-def control():
-    data = request.json
-    if 'command' in data:
-        command = data['command']
-        if command == 'wake_device':
-            mac_address = data.get('mac_address', '')
-            if mac_address:
-                subprocess.run(["wakeonlan", mac_address], shell=True)
-                return jsonify({"status": "success", "message": "Device woken up"}), 200
-            else:
-                return jsonify({"status": "error", "message": "MAC address missing"}), 400
-        elif command == 'zapni_zasuvku':
-            slot = data.get('slot', 0)
-            subprocess.run(["syspmctl", "-o", str(slot)], shell=True)
-            return jsonify({"status": "success", "message": f"Slot {slot} turned on"}), 200
-        elif command == 'vypni_zasuvku':
-            slot = data.get('slot', 0)
-            subprocess.run(["syspmctl", "-f", str(slot)], shell=True)
-            return jsonify({"status": "success", "message": f"Slot {slot} turned off"}), 200
-    return jsonify({"status": "error", "message": "Invalid command"}), 400
-
-def run_flask():
-    app.run(host='0.0.0.0', port=5000)
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QPlainTextEdit, QHBoxLayout, QLineEdit, QAbstractItemView
+from jobs import ExecutorFull, get_executor
+from qt_jobs import JobSignals, SlotStateSignals, HostStatusSignals, ConfigSignals, LogViewFlusher, StallDetector
+from applog import log_message
+from slot_state import get_state_cache, state_text
+from monitor import get_monitor, status_text
+from core import UPDATE_INTERVAL, get_controller
+from config import get_config, get_registry
+from headless import start_services
 
 # Existing code starts here
-def check_for_updates(log_widget):
-    update_url = 'https://github.com/jan-tdy/aplikacia8ejw8idue8wo/raw/main/main.py'
-    try:
-        response = requests.get(update_url)
-        if response.status_code == 200:
-            log_widget.append("Nová verzia aplikácie je dostupná na Githube!")
-        else:
-            log_widget.append("Chyba pri kontrole aktualizácie.")
-    except requests.RequestException as e:
-        log_widget.append(f"Chyba pri kontrole aktualizácie: {e}")
-
-def manual_update(log_widget):
-    update_url = 'https://github.com/jan-tdy/aplikacia8ejw8idue8wo/raw/main/main.py'
-    target_path = '/home/dpv/j44softapps-socketcontrol/main.py'
-    try:
-        response = requests.get(update_url)
-        if response.status_code == 200:
-            if os.path.exists(target_path):
-                os.remove(target_path)
-            with open(target_path, 'wb') as f:
-                f.write(response.content)
-            log_widget.append("Aktualizácia úspešne stiahnutá. Zatvorte a znovu otvorte program.")
-        else:
-            log_widget.append("Chyba pri sťahovaní aktualizácie.")
-    except requests.RequestException as e:
-        log_widget.append(f"Chyba pri sťahovaní aktualizácie: {e}")
-
 class ControlApp(QWidget):
     def __init__(self, devices):
         super().__init__()
         self.devices = devices
+        self.jobs = JobSignals(get_executor(), self)
+        self.slot_states = SlotStateSignals(get_state_cache(), self)
+        self.host_states = HostStatusSignals(get_monitor(self.devices), self)
+        self.config_signals = ConfigSignals(get_registry(), self)
+        self.stall = StallDetector(parent=self)
         self.init_ui()
-        self.start_update_checker()
+        self.slot_states.slot_changed.connect(self.zobraz_stav_zasuvky)
+        self.host_states.host_changed.connect(self.zobraz_dostupnost)
+        self.config_signals.config_changed.connect(self.zmen_konfiguraciu)
+        get_controller().start(update_interval=UPDATE_INTERVAL)
 
     def init_ui(self):
         layout = QVBoxLayout()
         self.intro_label = QLabel("JadivDevControl for C14, verzia 7.2")
         layout.addWidget(self.intro_label)
 
-        self.log_widget = QTextEdit()
+        self.log_widget = QPlainTextEdit()
         self.log_widget.setReadOnly(True)
+        self.log_view = LogViewFlusher(self.log_widget, parent=self)
         layout.addWidget(self.log_widget)
 
         self.ota_button = QPushButton("OTA Update")
-        self.ota_button.clicked.connect(lambda: manual_update(self.log_widget))
+        self.ota_button.clicked.connect(lambda: self.run_core(get_controller().update))
         layout.addWidget(self.ota_button)
 
         self.init_wol_ui(layout)
@@ -94,18 +53,26 @@ class ControlApp(QWidget):
         self.setWindowTitle("JadivDevControl for C14, verzia 7.2")
         self.resize(800, 600)
 
-    def start_update_checker(self):
-        threading.Thread(target=self.check_for_updates_periodically, daemon=True).start()
+    def log_job_result(self, job):
+        if job.ok:
+            log_message(f"Hotovo: {job.name}")
+        else:
+            log_message(f"Chyba ({job.name}): {job.error_text}")
 
-    def check_for_updates_periodically(self):
-        while True:
-            check_for_updates(self.log_widget)
-            sleep(3600)
+    def run_core(self, action, *args, on_done=None):
+        """Zavolá akciu jadra (Controller); on_done(job) príde cez Qt signál v GUI vlákne."""
+        try:
+            job = action(*args)
+        except (ExecutorFull, ValueError) as e:
+            log_message(str(e))
+            return None
+        return self.jobs.track(job, on_done or self.log_job_result)
 
     def init_wol_ui(self, layout):
         self.list_widget = QListWidget()
+        self.list_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
         for device in self.devices:
-            self.list_widget.addItem(f"{device['name']} - {device['mac']} - {device['ip']}")
+            self.list_widget.addItem(self.device_item_text(device))
         layout.addWidget(self.list_widget)
         self.mac_input = QLineEdit()
         self.mac_input.setPlaceholderText("Zadajte MAC adresu pre WOL")
@@ -113,25 +80,45 @@ class ControlApp(QWidget):
         self.btn_wake = QPushButton("Wake")
         self.btn_wake.clicked.connect(self.wake_device)
         layout.addWidget(self.btn_wake)
+        self.btn_wake_all = QPushButton("Wake všetky")
+        self.btn_wake_all.clicked.connect(lambda: self.wake_group([device['mac'] for device in self.devices]))
+        layout.addWidget(self.btn_wake_all)
     
+    def device_item_text(self, device):
+        stav = status_text(get_monitor().status(device['ip']))
+        return f"[{stav}] {device['name']} - {device['mac']} - {device['ip']}"
+
+    def zobraz_dostupnost(self, ip, status):
+        """Aktualizácia riadku v zozname WOL podľa monitora dostupnosti."""
+        for row, device in enumerate(self.devices):
+            if device['ip'] == ip:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
     def wake_device(self):
-        selected = self.list_widget.currentRow()
+        rows = sorted(index.row() for index in self.list_widget.selectedIndexes())
+        macs = [self.devices[row]['mac'] for row in rows]
         mac_address = self.mac_input.text().strip()
-        if selected >= 0:
-            device = self.devices[selected]
-            mac_address = device['mac']
-        if mac_address:
-            subprocess.run(["wakeonlan", mac_address], shell=True)
+        if not macs and mac_address:
+            macs = [mac_address]
+        if macs:
+            self.wake_group(macs)
         else:
-            print("Nezadaná MAC adresa!")
+            log_message("Nezadaná MAC adresa!")
     
+    def wake_group(self, macs):
+        self.run_core(get_controller().wake, macs)
+
     def init_zasuvky_ui(self, layout):
-        slot_names = {1: "none(1)", 2: "AZ2000(2)", 3: "C14(3)", 4: "UNKNOWN(4)"}
-        for slot in range(1, 5):
+        slot_names = get_config().slots
+        self.slot_labels = {}
+        self.slot_buttons = {}
+        for slot in slot_names:
             zasuvka_layout = QHBoxLayout()
-            stav_label = QLabel("OFF")
+            stav_label = QLabel(state_text(get_state_cache().get(slot)))
+            self.slot_labels[slot] = stav_label
             btn_on = QPushButton(f"Zapnúť {slot_names[slot]}")
             btn_off = QPushButton(f"Vypnúť {slot_names[slot]}")
+            self.slot_buttons[slot] = (btn_on, btn_off)
             btn_on.clicked.connect(lambda checked, slot=slot: self.zapni_zasuvku(slot))
             btn_off.clicked.connect(lambda checked, slot=slot: self.vypni_zasuvku(slot))
             zasuvka_layout.addWidget(stav_label)
@@ -139,11 +126,43 @@ class ControlApp(QWidget):
             zasuvka_layout.addWidget(btn_off)
             layout.addLayout(zasuvka_layout)
 
+    def zobraz_stav_zasuvky(self, slot, on):
+        """Štítky zásuviek sa menia len podľa cache stavu lišty."""
+        if slot in self.slot_labels:
+            self.slot_labels[slot].setText(state_text(on))
+
+    def zmen_konfiguraciu(self, config, changed):
+        """Po zmene config.json sa prekreslia len dotknuté časti okna."""
+        if "devices" in changed:
+            self.zmen_zariadenia(config.devices)
+        if "slots" in changed:
+            self.zmen_nazvy_zasuviek(config.slots)
+
+    def zmen_zariadenia(self, devices):
+        old, self.devices = self.devices, list(devices)
+        if len(old) != len(self.devices):
+            self.list_widget.clear()
+            for device in self.devices:
+                self.list_widget.addItem(self.device_item_text(device))
+            return
+        for row, (pred, device) in enumerate(zip(old, self.devices)):
+            if pred != device:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
+    def zmen_nazvy_zasuviek(self, slots):
+        for slot, (btn_on, btn_off) in self.slot_buttons.items():
+            name = slots.get(slot, str(slot))
+            if btn_on.text() != f"Zapnúť {name}":
+                btn_on.setText(f"Zapnúť {name}")
+                btn_off.setText(f"Vypnúť {name}")
+        if set(slots) != set(self.slot_buttons):
+            log_message("Pridanie alebo odobratie zásuvky sa prejaví po reštarte programu.")
+
     def zapni_zasuvku(self, slot):
-        subprocess.run(["syspmctl", "-o", str(slot)], shell=True)
+        self.run_core(get_controller().switch, slot, True)
 
     def vypni_zasuvku(self, slot):
-        subprocess.run(["syspmctl", "-f", str(slot)], shell=True)
+        self.run_core(get_controller().switch, slot, False)
 
     def init_strecha_ui(self, layout):
         btn_strecha_on = QPushButton("Pohnut strechou")
@@ -151,21 +170,13 @@ class ControlApp(QWidget):
         layout.addWidget(btn_strecha_on)
 
     def run_strecha_on(self):
-        subprocess.run(["cd /home/dpv/Downloads/usb-relay-hid-master/commandline/makemake && ./strecha_on.sh"], shell=True)
+        self.run_core(get_controller().roof)
     
 if __name__ == "__main__":
-    flask_thread = threading.Thread(target=run_flask)
-    flask_thread.daemon = True
-    flask_thread.start()
+    start_services()
 
     app = QApplication(sys.argv)
-    devices = [
-        {'name': 'hlavny', 'mac': 'e0:d5:5e:df:c6:4e', 'ip': '172.20.20.133'},
-        {'name': 'VNT', 'mac': '78:24:af:9c:06:e7', 'ip': '172.20.20.123'},
-        {'name': 'C14', 'mac': 'e0:d5:5e:37:4f:ad', 'ip': '172.20.20.103'},
-        {'name': 'AZ2000 mount', 'mac': '00:c0:08:a9:c2:32', 'ip': '172.20.20.10'},
-        {'name': 'GM3000 mount', 'mac': '00:c0:08:aa:35:12', 'ip': '172.20.20.12'}
-    ]
+    devices = list(get_registry().start().config.devices)
     window = ControlApp(devices)
     window.show()
     sys.exit(app.exec_()) 
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""Agent: lokálne zásuvky, relé strechy a WOL jedného počítača pre koordinátor.
+
+Agent je režim bez GUI (jadro + REST API) doplnený o odpovedanie na objavenie:
+koordinátor pošle UDP broadcast PROBE na DISCOVERY_PORT a každý agent mu
+odpovie JSON-om s menom a portom API. Viac agentov na jednom počítači (napr.
+na skúšku s JADIV_FAKE=1) zdieľa port objavenia cez SO_REUSEPORT, každý má
+vlastný priečinok (config.json, stav zásuviek, história) a port API.
+
+    python3 agent.py --name pi-strecha --port 5010
+    JADIV_FAKE=1 python3 agent.py --name skuska1 --port 5011 --dir /tmp/agent1
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+
+from config import get_config
+
+log = logging.getLogger("jadiv.agent")
+
+DISCOVERY_PORT = 5002
+PROBE = b"JADIV-DISCOVER 1"
+PROTOCOL = 1
+
+_identity = {"name": None, "port": None}
+
+
+def agent_name(config=None):
+    config = config or get_config()
+    return _identity["name"] or config.agent_name or socket.gethostname()
+
+
+def agent_info(config=None):
+    """Čo agent ponúka: meno, port API, zásuvky a zariadenia z jeho konfigurácie."""
+    config = config or get_config()
+    return {
+        "name": agent_name(config),
+        "hostname": socket.gethostname(),
+        "port": _identity["port"] or config.api_port,
+        "protocol": PROTOCOL,
+        "slots": {str(slot): name for slot, name in config.slots.items()},
+        "devices": [device["name"] for device in config.devices],
+        "sequences": list(config.sequences),
+    }
+
+
+class DiscoveryResponder:
+    """Vlákno, ktoré na PROBE odpovie agent_info() priamo odosielateľovi."""
+
+    def __init__(self, port=DISCOVERY_PORT, info=agent_info):
+        self.port = port
+        self.info = info
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("", self.port))
+        self._sock = sock
+        self._thread = threading.Thread(target=self._loop, name="discovery", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._sock is not None:
+            sock, self._sock = self._sock, None
+            sock.close()
+
+    def _loop(self):
+        while self._sock is not None:
+            try:
+                data, address = self._sock.recvfrom(512)
+            except OSError:
+                return
+            if data.strip() != PROBE:
+                continue
+            try:
+                self._sock.sendto(json.dumps(self.info()).encode(), address)
+            except (OSError, AttributeError) as e:
+                log.warning(f"Odpoveď na objavenie pre {address[0]} zlyhala: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agent JadivDevControl pre koordinátor lokality")
+    parser.add_argument("--name", help="meno agenta (predvolene agent_name z config.json alebo hostname)")
+    parser.add_argument("--port", type=int, help="port REST API (predvolene api_port z config.json)")
+    parser.add_argument("--dir", help="pracovný priečinok s config.json a stavom agenta")
+    parser.add_argument("--discovery-port", type=int, default=DISCOVERY_PORT)
+    parser.add_argument("--events", action="store_true", help="spustiť aj stream udalostí (SSE, port 5001)")
+    args = parser.parse_args(argv)
+    if args.dir:
+        os.makedirs(args.dir, exist_ok=True)
+        os.chdir(args.dir)
+
+    from applog import log_message, setup_logging
+    from core import get_controller
+    from headless import start_services
+    setup_logging()
+    _identity.update(name=args.name, port=args.port)
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    controller = get_controller().start()
+    start_services(api=True, events=args.events, api_port=args.port)
+    responder = DiscoveryResponder(args.discovery_port).start()
+    info = agent_info()
+    log_message(f"Agent {info['name']} beží: API na porte {info['port']}, objavenie na UDP {args.discovery_port}")
+    stop.wait()
+    responder.stop()
+    controller.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
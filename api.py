@@ -0,0 +1,404 @@
+"""REST API na vzdialené ovládanie (zásuvky, WOL, strecha, stav).
+
+Aplikácia beží na produkčnom WSGI serveri waitress s poolom vlákien, nie na
+vývojovom serveri Flasku. Príkazy zariadení idú do zdieľaného JobExecutora;
+dlhé operácie (strecha) hneď vrátia 202 a ID jobu na /jobs/<id>.
+
+Príkazy zariadení prijímajú hlavičku Idempotency-Key: opakovaná požiadavka
+s tým istým kľúčom dostane pôvodný job namiesto nového pohybu hardvéru.
+
+GET /metrics vracia metriky vo formáte Prometheus (trvanie akcií, chyby,
+front executora, OTA); POST /profile a /profile/stop zapnú vzorkovací profiler.
+"""
+import logging
+import time
+
+from flask import Flask, Response, g, request, jsonify
+
+from agent import agent_info
+from commands import Command, CommandError, compile_script, merge_commands
+from config import get_config
+from dedup import IdempotencyConflict
+from core import get_controller
+from history import get_history
+from jobs import ExecutorFull, get_executor
+from metrics import get_metrics, get_profiler
+from roof import RoofBusy
+from sispm import check_slot
+from wol import parse_mac
+
+log = logging.getLogger("jadiv.api")
+
+API_HOST = "0.0.0.0"
+API_THREADS = 8
+
+# Krátke príkazy počkajú na výsledok, dlhé hneď vrátia 202.
+SHORT_WAIT = 5.0
+BATCH_LIMIT = 50
+
+app = Flask(__name__)
+
+
+class ApiError(Exception):
+    def __init__(self, message, code=400):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    if 'request_start' in g:
+        get_metrics().histogram("jadiv_api_request_duration_seconds", "Trvanie požiadavky REST API",
+                                ("endpoint", "status")).observe(time.perf_counter() - g.request_start,
+                                                                endpoint=request.endpoint or "-",
+                                                                status=response.status_code)
+    return response
+
+
+@app.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({"status": "error", "message": e.message}), e.code
+
+
+@app.errorhandler(ExecutorFull)
+def handle_executor_full(e):
+    return jsonify({"status": "error", "message": str(e)}), 503
+
+
+def request_data():
+    return request.get_json(silent=True) or {}
+
+
+def wait_time(default):
+    try:
+        return max(0.0, min(float(request.args.get('wait', default)), 60.0))
+    except ValueError:
+        raise ApiError("Invalid wait parameter")
+
+
+def job_response(job, wait=0.0):
+    """200 s výsledkom, ak job skončí do `wait` sekúnd, inak 202 s odkazom na job."""
+    if wait:
+        job.wait(wait)
+    body = job.to_dict()
+    if not job.done:
+        body["status_url"] = f"/jobs/{job.id}"
+        return jsonify(body), 202, {"Location": f"/jobs/{job.id}"}
+    return jsonify(body), 200 if job.ok else 502
+
+
+def parse_macs(data):
+    macs = data.get('mac_address') or data.get('mac_addresses') or []
+    if isinstance(macs, str):
+        macs = [macs]
+    if not macs:
+        raise ApiError("MAC address missing")
+    return macs
+
+
+def idempotency_key():
+    """Hlavička Idempotency-Key (alebo pole idempotency_key v tele)."""
+    return request.headers.get('Idempotency-Key') or request_data().get('idempotency_key')
+
+
+def device_error(e):
+    if isinstance(e, IdempotencyConflict):
+        return ApiError(str(e), 422)
+    if isinstance(e, RoofBusy):
+        return ApiError(str(e), 409)
+    return ApiError(str(e))
+
+
+def submit_wake(data):
+    try:
+        return get_controller().wake(parse_macs(data), repeat=data.get('repeat'), interval=data.get('interval'),
+                                     key=idempotency_key())
+    except ValueError as e:
+        raise device_error(e)
+
+
+def submit_slot(slot, on):
+    try:
+        return get_controller().switch(slot, on, key=idempotency_key())
+    except ValueError as e:
+        raise device_error(e)
+
+
+def submit_roof(direction=None):
+    try:
+        return get_controller().roof(direction, key=idempotency_key())
+    except ValueError as e:
+        raise device_error(e)
+
+
+@app.route('/control', methods=['POST'])
+def control():
+    """Pôvodný endpoint s jedným príkazom v tele; ostáva kvôli starším skriptom."""
+    data = request_data()
+    command = data.get('command')
+    if command == 'wake_device':
+        job = submit_wake(data)
+        return jsonify({"status": "success", "message": f"Woke {len(parse_macs(data))} device(s)", "job_id": job.id}), 200
+    elif command in ('zapni_zasuvku', 'vypni_zasuvku'):
+        on = command == 'zapni_zasuvku'
+        slot = data.get('slot', 0)
+        job = submit_slot(slot, on)
+        return jsonify({"status": "success", "message": f"Slot {slot} turned {'on' if on else 'off'}", "job_id": job.id}), 200
+    elif command == 'strecha':
+        return job_response(submit_roof())
+    return jsonify({"status": "error", "message": "Invalid command"}), 400
+
+
+def batch_command(index, item):
+    """Položka dávky: objekt ako pre /control alebo riadok príkazového jazyka terminálu."""
+    where = f"commands[{index}]"
+    if isinstance(item, str):
+        try:
+            plan = compile_script(item)
+        except CommandError as e:
+            raise ApiError(f"{where}: {e}")
+        if len(plan.steps) != 1 or not isinstance(plan.steps[0], Command):
+            raise ApiError(f"{where}: očakáva sa jeden príkaz zariadenia")
+        command = plan.steps[0]
+        command.line = index
+        return command
+    if not isinstance(item, dict):
+        raise ApiError(f"{where}: očakáva sa objekt alebo reťazec")
+    name = item.get('command')
+    try:
+        if name == 'wake_device':
+            macs = parse_macs(item)
+            for mac in macs:
+                parse_mac(mac)
+            return Command(index, f"wol {' '.join(macs)}", "wake", macs)
+        if name in ('zapni_zasuvku', 'vypni_zasuvku'):
+            on = name == 'zapni_zasuvku'
+            slot = check_slot(item.get('slot'))
+            return Command(index, f"zasuvka {'on' if on else 'off'} {slot}", "set_slots", {slot: on})
+        if name == 'strecha':
+            direction = item.get('direction')
+            if direction not in (None, 'open', 'close'):
+                raise ValueError(f"Neplatný smer strechy: {direction}")
+            return Command(index, f"strecha {direction or ''}".strip(), "roof", direction)
+    except (ApiError, ValueError) as e:
+        raise ApiError(f"{where}: {e}")
+    raise ApiError(f"{where}: Invalid command")
+
+
+@app.route('/control/batch', methods=['POST'])
+def control_batch():
+    """Viac príkazov naraz; najprv sa overia všetky, potom bežia súbežne.
+
+    Telo: {"commands": [...]} alebo priamo zoznam. Zásuvky z dávky idú jedným
+    volaním sispmctl a WOL jedným odoslaním, strecha a sekvencie samostatne.
+    Odpoveď obsahuje výsledok pre každý príkaz v pôvodnom poradí.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('commands') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ApiError("commands must be a non-empty list")
+    if len(items) > BATCH_LIMIT:
+        raise ApiError(f"Najviac {BATCH_LIMIT} príkazov v dávke")
+    parsed = [batch_command(index, item) for index, item in enumerate(items)]
+    controller = get_controller()
+    key = idempotency_key()
+    submitted = []
+    results = [None] * len(parsed)
+    for command in merge_commands(parsed):
+        try:
+            # Pri opakovanej dávke s rovnakým kľúčom vzniknú rovnaké zlúčené príkazy a tie isté kľúče.
+            job = command.submit(controller, f"{key}:{command.parts[0].line}" if key else None)
+        except (ValueError, ExecutorFull) as e:
+            for part in command.parts:
+                results[part.line] = {"command": part.text, "status": "error", "message": str(e)}
+            continue
+        submitted.append((command, job))
+    deadline = time.monotonic() + wait_time(SHORT_WAIT)
+    for command, job in submitted:
+        job.wait(max(deadline - time.monotonic(), 0))
+        for part in command.parts:
+            results[part.line] = {"command": part.text, "status": job.status, "job": job.to_dict()}
+    pending = any(not job.done for _, job in submitted)
+    ok = all(result["status"] == "done" for result in results)
+    body = {"status": "pending" if pending else "success" if ok else "error", "results": results}
+    return jsonify(body), 202 if pending else 200
+
+
+@app.route('/wake', methods=['POST'])
+def wake():
+    return job_response(submit_wake(request_data()), wait_time(SHORT_WAIT))
+
+
+@app.route('/slots/<int:slot>/<action>', methods=['POST'])
+def slot_action(slot, action):
+    if action not in ('on', 'off'):
+        raise ApiError("Action must be 'on' or 'off'", 404)
+    return job_response(submit_slot(slot, action == 'on'), wait_time(SHORT_WAIT))
+
+
+@app.route('/roof', methods=['POST'])
+def roof():
+    """Impulz relé strechy; voliteľne {"direction": "open"|"close"}. Počas pohybu 409."""
+    return job_response(submit_roof(request_data().get('direction')), wait_time(0))
+
+
+@app.route('/roof', methods=['GET'])
+def roof_status():
+    return jsonify(get_controller().roof_status()), 200
+
+
+@app.route('/roof/reset', methods=['POST'])
+def roof_reset():
+    """Zruší poruchu; {"position": "open"|"closed"} nastaví polohu overenú na mieste."""
+    try:
+        return jsonify(get_controller().roof_reset(request_data().get('position', 'unknown'))), 200
+    except ValueError as e:
+        raise ApiError(str(e))
+
+
+@app.route('/sequences', methods=['GET'])
+def sequence_list():
+    """Definované sekvencie a posledný priebeh každej z nich."""
+    runner = get_controller().sequences
+    sequences = {name: [step.id for step in steps] for name, steps in get_config().sequences.items()}
+    runs = {name: run.to_dict() for name, run in runner.runs.items()}
+    return jsonify({"sequences": sequences, "active": runner.active, "runs": runs}), 200
+
+
+@app.route('/sequences/<name>', methods=['POST'])
+def sequence_start(name):
+    try:
+        job = get_controller().run_sequence(name, key=idempotency_key())
+    except IdempotencyConflict as e:
+        raise device_error(e)
+    except ValueError as e:
+        raise ApiError(str(e), 409 if name in get_config().sequences else 404)
+    return job_response(job, wait_time(0))
+
+
+@app.route('/schedule', methods=['GET'])
+def schedule():
+    """Naplánované úlohy zoradené podľa ďalšieho spustenia a dnešné udalosti Slnka."""
+    controller = get_controller()
+    body = {"tasks": controller.scheduler.upcoming()}
+    try:
+        from astro import get_table
+    except ImportError:
+        body["sun"] = None
+    else:
+        body["sun"] = [{"event": name, "time": when} for when, name in get_table(*get_config().location).day()]
+    return jsonify(body), 200
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = get_executor().get(job_id)
+    if job is None:
+        raise ApiError("Unknown job", 404)
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/jobs', methods=['GET'])
+def job_list():
+    executor = get_executor()
+    return jsonify({"queue_depth": executor.queue_depth, "jobs": [job.to_dict() for job in executor.jobs()]}), 200
+
+
+@app.route('/status', methods=['GET'])
+def status():
+    # Stav sa číta z cache, ktorú plní poller; požiadavka nesiaha na USB lištu.
+    return jsonify(get_controller().status()), 200
+
+
+@app.route('/agent', methods=['GET'])
+def agent():
+    """Identita agenta pre koordinátor: meno, port API, zásuvky, zariadenia a sekvencie."""
+    return jsonify(agent_info()), 200
+
+
+@app.route('/history', methods=['GET'])
+def history():
+    """História akcií: ?from=&to= (unix čas), ?device=, ?action=, ?value=, ?result=, ?limit="""
+    args = request.args
+    try:
+        start = float(args['from']) if 'from' in args else None
+        end = float(args['to']) if 'to' in args else None
+        limit = min(int(args.get('limit', 500)), 10000)
+    except ValueError:
+        raise ApiError("Invalid from/to/limit parameter")
+    rows = get_history().query(start=start, end=end, device=args.get('device'), action=args.get('action'),
+                               value=args.get('value'), result=args.get('result'), limit=limit)
+    return jsonify({"actions": rows}), 200
+
+
+@app.route('/telemetry', methods=['GET'])
+def telemetry():
+    """Časový rad kanála z agregovaných vrstiev: ?channel=, ?from=&to= (unix čas), ?points=; bez kanála zoznam kanálov."""
+    store = get_controller().telemetry
+    if store is None:
+        return jsonify({"status": "error", "message": "Telemetry is not running"}), 503
+    args = request.args
+    if 'channel' not in args:
+        return jsonify({"channels": list(store.channels), "tiers": store.stats()}), 200
+    try:
+        end = float(args['to']) if 'to' in args else time.time()
+        start = float(args['from']) if 'from' in args else end - 86400
+        points = min(int(args.get('points', 500)), 5000)
+    except ValueError:
+        raise ApiError("Invalid from/to/points parameter")
+    series = store.series(args['channel'], start, end, max(points, 1))
+    if series is None:
+        raise ApiError(f"Unknown channel: {args['channel']}", 404)
+    body = {"channel": args['channel'], "tier": series["tier"]}
+    for name in ("times", "mean", "min", "max"):
+        body[name] = [None if value != value else round(float(value), 3) for value in series[name]]
+    return jsonify(body), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(get_metrics().render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.route('/profile', methods=['POST'])
+def profile_start():
+    """Spustí vzorkovací profiler všetkých vlákien; výsledok vráti /profile/stop."""
+    profiler = get_profiler()
+    try:
+        profiler.start("sample")
+    except ValueError as e:
+        raise ApiError(str(e), 409)
+    return jsonify({"status": "running", "started": profiler.started}), 200
+
+
+@app.route('/profile/stop', methods=['POST'])
+def profile_stop():
+    try:
+        path = get_profiler().stop()
+    except ValueError as e:
+        raise ApiError(str(e), 409)
+    with open(path, "r", encoding="utf-8") as f:
+        return jsonify({"status": "done", "path": path, "report": f.read()}), 200
+
+
+def run_api(host=API_HOST, port=None, threads=API_THREADS):
+    """Spustí API na waitress; bez neho použije vláknový server z werkzeug.
+
+    Port sa berie z konfigurácie (api_port); jeho zmena sa prejaví až po reštarte.
+    """
+    if port is None:
+        port = get_config().api_port
+    try:
+        from waitress import serve
+    except ImportError:
+        from werkzeug.serving import make_server
+        log.warning("waitress nie je nainštalovaný (pip install waitress), API beží na vláknovom serveri werkzeug.")
+        make_server(host, port, app, threaded=True).serve_forever()
+    else:
+        serve(app, host=host, port=port, threads=threads, ident="JadivDevControl")
@@ -0,0 +1,141 @@
+"""Logovanie akcií: vláknovo bezpečná fronta, rotujúci JSON-lines súbor a buffer pre GUI.
+
+log_message() iba vloží záznam do fronty (konštantná cena z ľubovoľného vlákna).
+Jedno vlákno QueueListener potom záznamy rozošle do súboru, na konzolu a do
+ohraničeného buffera, ktorý GUI po dávkach vypisuje cez časovač.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+
+LOG_FILE = "jadivdevcontrol.log.jsonl"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+MAX_LOG_LINES = 5000
+
+TIME_FORMAT = "[%Y-%m-%d %H:%M:%S]"
+
+log = logging.getLogger("jadiv")
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Jeden JSON objekt na riadok: čas, úroveň, správa a voliteľné polia z extra={"fields": {...}}."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LineFormatter(logging.Formatter):
+    """Rovnaký tvar riadku ako pôvodný log_message: "[čas] správa"."""
+
+    def format(self, record):
+        line = f"{datetime.fromtimestamp(record.created).strftime(TIME_FORMAT)} {record.getMessage()}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class BufferHandler(logging.Handler):
+    """Zbiera naformátované riadky pre GUI; pri zaseknutom GUI drží len posledných maxlen."""
+
+    def __init__(self, maxlen=MAX_LOG_LINES):
+        super().__init__()
+        self.setFormatter(LineFormatter())
+        self._lines = deque(maxlen=maxlen)
+
+    def emit(self, record):
+        try:
+            self._lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        lines = []
+        while True:
+            try:
+                lines.append(self._lines.popleft())
+            except IndexError:
+                return lines
+
+
+def setup_logging(log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, console=True):
+    """Spustí pipeline (raz za proces); ďalšie volania vrátia existujúci listener."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+        handlers = []
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            file_handler.setFormatter(JsonLineFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(LineFormatter())
+            handlers.append(console_handler)
+        log_queue = queue.SimpleQueue()
+        log.addHandler(logging.handlers.QueueHandler(log_queue))
+        log.setLevel(logging.INFO)
+        log.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+
+def stop_logging():
+    """Vyprázdni frontu a zastaví listener (pred os.execv sa atexit nevolá)."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        atexit.unregister(_listener.stop)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.flush()
+        for handler in list(log.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                log.removeHandler(handler)
+        _listener = None
+
+
+def add_sink(handler):
+    """Pridá ďalší cieľ (GUI buffer, stream udalostí); beží vo vlákne listenera."""
+    listener = setup_logging()
+    with _setup_lock:
+        listener.handlers = listener.handlers + (handler,)
+    return handler
+
+
+def remove_sink(handler):
+    listener = setup_logging()
+    with _setup_lock:
+        listener.handlers = tuple(h for h in listener.handlers if h is not handler)
+
+
+def log_message(message, level=logging.INFO, **fields):
+    """Zapíše správu do logu; kľúčové argumenty idú ako polia do JSON súboru."""
+    if _listener is None:
+        setup_logging()
+    log.log(level, message, extra={"fields": fields} if fields else None)
@@ -0,0 +1,126 @@
+"""Časy východu/západu Slnka a súmrakov pre observatórium.
+
+Tabuľka sa počíta naraz pre celú sezónu (SEASON_DAYS dní) jedným
+vektorizovaným prechodom v numpy podľa zjednodušeného algoritmu NOAA
+(presnosť okolo minúty). Hľadanie ďalšej udalosti je potom len binárne
+vyhľadávanie v zoradenom poli. Dni, keď Slnko danú výšku nedosiahne (napr.
+astronomická noc okolo letného slnovratu), udalosť nemajú.
+"""
+import threading
+import time
+
+import numpy as np
+
+# Kolonické sedlo, Vihorlatská hvezdáreň.
+LATITUDE = 48.9339
+LONGITUDE = 22.2736
+
+SEASON_DAYS = 366
+DAY = 86400.0
+
+# meno: (výška stredu Slnka v stupňoch, -1 ráno / +1 večer)
+EVENTS = {
+    "sunrise": (-0.833, -1),
+    "sunset": (-0.833, 1),
+    "civil_dawn": (-6.0, -1),
+    "civil_dusk": (-6.0, 1),
+    "nautical_dawn": (-12.0, -1),
+    "nautical_dusk": (-12.0, 1),
+    "astronomical_dawn": (-18.0, -1),
+    "astronomical_dusk": (-18.0, 1),
+}
+
+
+def _solar(t):
+    """Deklinácia (rad) a časová rovnica (min) pre pole unixových časov."""
+    jc = (t / DAY + 2440587.5 - 2451545.0) / 36525.0
+    l0 = np.radians((280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360)
+    m = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    e = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    center = (np.sin(m) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+              + np.sin(2 * m) * (0.019993 - 0.000101 * jc) + np.sin(3 * m) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * jc)
+    longitude = np.radians(np.degrees(l0) + center - 0.00569 - 0.00478 * np.sin(omega))
+    obliquity = np.radians(23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+                           + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(longitude))
+    y = np.tan(obliquity / 2) ** 2
+    eq_time = 4 * np.degrees(y * np.sin(2 * l0) - 2 * e * np.sin(m) + 4 * e * y * np.sin(m) * np.cos(2 * l0)
+                             - 0.5 * y * y * np.sin(4 * l0) - 1.25 * e * e * np.sin(2 * m))
+    return declination, eq_time
+
+
+def event_times(midnights, lat, lon, altitudes, signs):
+    """Matica (dni x udalosti) unixových časov; NaN kde udalosť v daný deň nenastane."""
+    midnights = np.asarray(midnights, dtype=float)[:, None]
+    altitudes = np.radians(np.asarray(altitudes, dtype=float))[None, :]
+    signs = np.asarray(signs, dtype=float)[None, :]
+    phi = np.radians(lat)
+    t = midnights + (720 - 4 * lon) * 60 + 0 * altitudes
+    # Druhý prechod prepočíta polohu Slnka v čase udalosti namiesto poludnia.
+    for _ in range(2):
+        declination, eq_time = _solar(t)
+        cos_h = (np.sin(altitudes) - np.sin(phi) * np.sin(declination)) / (np.cos(phi) * np.cos(declination))
+        with np.errstate(invalid="ignore"):
+            hour_angle = np.degrees(np.arccos(cos_h))
+        noon = 720 - 4 * lon - eq_time
+        t = midnights + (noon + signs * 4 * np.nan_to_num(hour_angle)) * 60
+    return np.where(np.abs(cos_h) <= 1, t, np.nan)
+
+
+class TwilightTable:
+    """Predpočítané udalosti Slnka pre jedno miesto na SEASON_DAYS dní dopredu."""
+
+    def __init__(self, lat=LATITUDE, lon=LONGITUDE, days=SEASON_DAYS):
+        self.lat = lat
+        self.lon = lon
+        self.days = days
+        self.start = None
+        self.end = None
+        self.duration = None
+        self._times = {}
+        self._lock = threading.Lock()
+
+    def compute(self, start):
+        """Prepočíta tabuľku od polnoci UTC dňa pred `start`."""
+        began = time.monotonic()
+        first = (start // DAY - 1) * DAY
+        midnights = first + DAY * np.arange(self.days)
+        names = list(EVENTS)
+        table = event_times(midnights, self.lat, self.lon,
+                            [EVENTS[name][0] for name in names], [EVENTS[name][1] for name in names])
+        self._times = {name: np.sort(column[~np.isnan(column)]) for name, column in zip(names, table.T)}
+        self.start = first
+        self.end = first + DAY * self.days
+        self.duration = time.monotonic() - began
+
+    def next(self, event, after=None):
+        """Najbližší čas udalosti po `after` (unixový čas) alebo None."""
+        if event not in EVENTS:
+            raise ValueError(f"Neznáma udalosť: {event}")
+        after = time.time() if after is None else after
+        with self._lock:
+            # Rezerva 2 dni, aby sa vždy našla aj udalosť nasledujúceho dňa.
+            if self.start is None or not self.start + DAY <= after < self.end - 2 * DAY:
+                self.compute(after)
+            times = self._times[event]
+            index = np.searchsorted(times, after, side="right")
+            return float(times[index]) if index < len(times) else None
+
+    def day(self, when=None):
+        """Všetky udalosti v nasledujúcich 24 h od `when`, zoradené podľa času."""
+        when = time.time() if when is None else when
+        events = [(self.next(name, when), name) for name in EVENTS]
+        return sorted((t, name) for t, name in events if t is not None and t < when + DAY)
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_table(lat=LATITUDE, lon=LONGITUDE):
+    with _tables_lock:
+        key = (float(lat), float(lon))
+        if key not in _tables:
+            _tables[key] = TwilightTable(*key)
+        return _tables[key]
@@ -0,0 +1,359 @@
+"""Benchmark odozvy na falošnom hardvéri (fakes.py); výsledok je JSON na porovnanie verzií.
+
+Meria latenciu akcií priamo cez Controller, cez ControlApp vybranej verzie
+GUI (run_core až po on_done v GUI vlákne) a cez REST POST /control,
+priepustnosť API pri N súbežných klientoch a oneskorenie udalostnej slučky
+GUI, kým bežia príkazy. Beží v dočasnom priečinku s vlastnou konfiguráciou
+(dedup_window 0, falošné relé), takže nezasiahne config.json ani históriu.
+
+    python3 bench.py --gui 7.4-beta4.1.py --clients 8 --output bench-7.4.json
+    python3 bench.py --compare bench-7.4.json --output bench-new.json
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FORMAT_VERSION = 1
+MACS = ["00:11:22:33:44:55", "66:77:88:99:AA:BB"]
+BENCH_CONFIG = {
+    "devices": [],
+    "dedup_window": 0,
+    "schedule": [],
+    "sequences": {},
+    "roof": {"backend": "fake", "pulse": 0.05, "travel_time": 0.2},
+}
+SLOT_LATENCY = 0.2
+RELAY_LATENCY = 0.01
+WOL_LATENCY = 0.0
+HEARTBEAT_MS = 10
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+
+def summarize(samples, errors=0, elapsed=None):
+    """Počet, chyby a percentily v ms; s `elapsed` aj priepustnosť za sekundu."""
+    values = sorted(samples)
+    result = {"count": len(values), "errors": errors}
+    if values:
+        result["mean_ms"] = round(sum(values) / len(values) * 1000, 3)
+        for q in (0.5, 0.95, 0.99):
+            result[f"p{int(q * 100)}_ms"] = round(percentile(values, q) * 1000, 3)
+        result["max_ms"] = round(values[-1] * 1000, 3)
+    if elapsed:
+        result["per_second"] = round(len(values) / elapsed, 2)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Actions:
+    """Striedavé príkazy, aby sa po sebe nešli dva rovnaké (zásuvka zap/vyp, strecha otvor/zatvor)."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.count = 0
+
+    def call(self, name):
+        self.count += 1
+        if name == "slots":
+            return self.controller.set_slots, ({1 + self.count % 4: self.count % 2 == 0},)
+        if name == "wol":
+            return self.controller.wake, (MACS[self.count % len(MACS)],)
+        self.wait_roof()
+        return self.controller.roof, ()
+
+    def wait_roof(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.controller.roof_status()["state"] in ("opening", "closing") and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+
+def bench_core(controller, actions, iterations):
+    results = {}
+    for name in ("slots", "wol", "roof"):
+        samples, errors = [], 0
+        for _ in range(iterations):
+            action, args = actions.call(name)
+            start = time.perf_counter()
+            job = action(*args).wait()
+            samples.append(time.perf_counter() - start)
+            errors += not job.ok
+        results[f"core.{name}"] = summarize(samples, errors)
+    return results
+
+
+def load_gui(path):
+    spec = importlib.util.spec_from_file_location("bench_gui", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Heartbeat:
+    """QTimer každých HEARTBEAT_MS; oneskorenie tiku je čas, keď GUI vlákno nereagovalo."""
+
+    def __init__(self, QTimer):
+        self.lags = []
+        self._last = None
+        self.timer = QTimer()
+        self.timer.timeout.connect(self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            self.lags.append(max(now - self._last - HEARTBEAT_MS / 1000, 0.0))
+        self._last = now
+
+    def start(self):
+        self.lags, self._last = [], None
+        self.timer.start(HEARTBEAT_MS)
+
+    def stop(self):
+        self.timer.stop()
+        return self.lags
+
+
+def bench_gui(app, window, actions, iterations, burst):
+    """Latencia cez ControlApp.run_core a odozva GUI počas dávky príkazov (všetko v GUI vlákne)."""
+    from PyQt5.QtCore import QEventLoop, QTimer
+    results = {}
+
+    def wait_until(condition, timeout=30.0):
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(lambda: condition() and loop.quit())
+        timer.start(1)
+        deadline = QTimer()
+        deadline.setSingleShot(True)
+        deadline.timeout.connect(loop.quit)
+        deadline.start(int(timeout * 1000))
+        loop.exec_()
+        timer.stop()
+
+    for name in ("slots", "wol", "roof"):
+        samples, errors = [], 0
+        for _ in range(iterations):
+            done = []
+            action, args = actions.call(name)
+            start = time.perf_counter()
+            job = window.run_core(action, *args, on_done=lambda job: done.append(time.perf_counter()))
+            if job is None:
+                errors += 1
+                continue
+            wait_until(lambda: done)
+            if done:
+                samples.append(done[0] - start)
+                errors += not job.ok
+            else:
+                errors += 1
+        results[f"gui.{name}"] = summarize(samples, errors)
+
+    heartbeat = Heartbeat(QTimer)
+    heartbeat.start()
+    wait_until(lambda: False, timeout=0.5)
+    results["gui.idle_lag"] = summarize(heartbeat.stop())
+    heartbeat.start()
+    finished = []
+    start = time.perf_counter()
+    for i in range(burst):
+        action, args = actions.call("slots" if i % 2 else "wol")
+        window.run_core(action, *args, on_done=lambda job: finished.append(job))
+    wait_until(lambda: len(finished) >= burst)
+    elapsed = time.perf_counter() - start
+    results["gui.load_lag"] = summarize(heartbeat.stop(), errors=sum(not job.ok for job in finished))
+    results["gui.load_lag"].update({"commands": burst, "commands_per_second": round(burst / elapsed, 2)})
+    return results
+
+
+def start_server():
+    """API na voľnom porte (waitress, inak werkzeug) v démonickom vlákne; skončí s procesom."""
+    from api import API_THREADS, app
+    try:
+        from waitress.server import create_server
+    except ImportError:
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        port, run = server.server_port, server.serve_forever
+    else:
+        server = create_server(app, host="127.0.0.1", port=0, threads=API_THREADS)
+        port, run = server.effective_port, server.run
+    threading.Thread(target=run, name="bench-api", daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+
+def control_body(name, count):
+    if name == "slots":
+        return {"command": "zapni_zasuvku" if count % 2 else "vypni_zasuvku", "slot": 1 + count % 4}
+    if name == "wol":
+        return {"command": "wake_device", "mac_address": MACS[count % len(MACS)]}
+    return {"command": "strecha"}
+
+
+def bench_api(url, actions, iterations, clients, requests_per_client):
+    import requests
+    results = {}
+    session = requests.Session()
+    for name in ("slots", "wol", "roof"):
+        samples, errors = [], 0
+        for i in range(iterations):
+            if name == "roof":
+                actions.wait_roof()
+            start = time.perf_counter()
+            response = session.post(url + "/control", json=control_body(name, i), timeout=30)
+            samples.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+        results[f"api.{name}"] = summarize(samples, errors)
+    session.close()
+
+    samples, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client(index):
+        own, failed = [], 0
+        with requests.Session() as session:
+            barrier.wait()
+            for i in range(requests_per_client):
+                name = "slots" if i % 2 else "wol"
+                start = time.perf_counter()
+                try:
+                    response = session.post(url + "/control", json=control_body(name, index + i), timeout=30)
+                    failed += response.status_code >= 400
+                except requests.RequestException:
+                    failed += 1
+                own.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(own)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    results["api.throughput"] = summarize(samples, sum(errors), elapsed)
+    results["api.throughput"]["clients"] = clients
+    return results
+
+
+def compare(base, current):
+    """Riadky tabuľky: benchmark, metrika, pôvodná a nová hodnota, zmena v %."""
+    rows = []
+    for name, values in current["results"].items():
+        old = base.get("results", {}).get(name)
+        if not old:
+            continue
+        for key in ("p50_ms", "p95_ms", "max_ms", "per_second", "errors"):
+            if key in values and key in old:
+                change = (values[key] - old[key]) / old[key] * 100 if old[key] else None
+                rows.append((name, key, old[key], values[key], change))
+    return rows
+
+
+def run(args):
+    if not os.environ.get("DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    gui_path = os.path.join(ROOT, args.gui)
+    workdir = tempfile.mkdtemp(prefix="jadiv-bench-")
+    os.chdir(workdir)
+    with open("config.json", "w") as f:
+        json.dump(BENCH_CONFIG, f)
+
+    from applog import setup_logging
+    from config import get_registry
+    from core import get_controller
+    from fakes import install
+    setup_logging()
+    get_registry().start()
+    fakes = install(sispm=args.sispm_latency, wol=args.wol_latency, relay=args.relay_latency,
+                    fail_rate=args.fail_rate, seed=args.seed)
+    controller = get_controller().start(monitor=False)
+    actions = Actions(controller)
+    results = bench_core(controller, actions, args.iterations)
+
+    # Okno až po meraní jadra, aby jeho detektor zablokovania nemeral čakanie bez slučky udalostí.
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    window = load_gui(gui_path).ControlApp([])
+    app.processEvents()
+    results.update(bench_gui(app, window, actions, args.iterations, args.burst))
+    results.update(bench_api(start_server(), actions, args.iterations, args.clients, args.requests))
+    # /control nečaká na dokončenie jobov; okno sa odpojí až po vyprázdnení frontu.
+    deadline = time.monotonic() + 30
+    while controller.executor.queue_depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+    window.jobs.close()
+    return {
+        "format": FORMAT_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "gui": args.gui,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "fakes": {"sispm": fakes["sispm"].injector.latency, "wol": fakes["wol"].injector.latency,
+                      "relay": args.relay_latency, "fail_rate": args.fail_rate, "seed": args.seed},
+            "sispmctl_calls": len(fakes["sispm"].invocations),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JadivDevControl na falošnom hardvéri")
+    parser.add_argument("--gui", default="main.py", help="verzia GUI s ControlApp (predvolene main.py)")
+    parser.add_argument("--iterations", type=int, default=20, help="počet opakovaní každej akcie")
+    parser.add_argument("--burst", type=int, default=30, help="počet príkazov naraz pri meraní odozvy GUI")
+    parser.add_argument("--clients", type=int, default=8, help="súbežní klienti API")
+    parser.add_argument("--requests", type=int, default=25, help="požiadavky na jedného klienta")
+    parser.add_argument("--sispm-latency", type=float, default=SLOT_LATENCY)
+    parser.add_argument("--wol-latency", type=float, default=WOL_LATENCY)
+    parser.add_argument("--relay-latency", type=float, default=RELAY_LATENCY)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="pravdepodobnosť chyby hardvéru (0 až 1)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="súbor pre JSON výsledok (inak stdout)")
+    parser.add_argument("--compare", help="predchádzajúci výsledok na porovnanie")
+    args = parser.parse_args(argv)
+    base = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            base = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+    report = run(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if base is not None:
+        for name, key, old, new, change in compare(base, report):
+            delta = f"{change:+.1f} %" if change is not None else ""
+            print(f"{name:18} {key:10} {old:>10} -> {new:<10} {delta}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
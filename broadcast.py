@@ -0,0 +1,216 @@
+"""Rozosielanie udalostí (log, joby, zásuvky, zariadenia) ľubovoľnému počtu odberateľov.
+
+Broadcaster má pre každého odberateľa ohraničený buffer; keď klient nestíha,
+zahodia sa jeho najstaršie udalosti a ostatní klienti nečakajú. Udalosti sa
+posielajú ako Server-Sent Events z malého asyncio servera (GET /events), takže
+ani stovky otvorených streamov nezaberajú vlákna WSGI servera.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from jobs import get_executor
+from monitor import get_monitor
+from roof import get_roof
+from slot_state import get_state_cache, state_text
+
+EVENTS_HOST = "0.0.0.0"
+EVENTS_PORT = 5001
+BUFFER_SIZE = 256
+KEEPALIVE = 15.0
+
+
+class Subscriber:
+    def __init__(self, maxlen=BUFFER_SIZE, types=None, notify=None):
+        self.types = set(types) if types else None
+        self.dropped = 0
+        self._events = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._notify = notify
+
+    def accepts(self, event_type):
+        return self.types is None or event_type in self.types
+
+    def push(self, event):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+        if self._notify is not None:
+            self._notify()
+
+    def drain(self):
+        with self._cond:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def get(self, timeout=None):
+        """Počká na aspoň jednu udalosť a vráti všetky čakajúce."""
+        with self._cond:
+            if not self._events:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+
+class Broadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._ids = itertools.count(1)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, maxlen=BUFFER_SIZE, types=None, notify=None):
+        subscriber = Subscriber(maxlen, types, notify)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event_type, data):
+        event = {"id": next(self._ids), "type": event_type, "time": time.time(), "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.accepts(event_type):
+                subscriber.push(event)
+        return event
+
+
+def format_sse(event):
+    payload = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class EventStreamServer:
+    """Asyncio HTTP server, ktorý na GET /events streamuje udalosti ako SSE."""
+
+    def __init__(self, broadcaster, host=EVENTS_HOST, port=EVENTS_PORT, buffer_size=BUFFER_SIZE, keepalive=KEEPALIVE):
+        self.broadcaster = broadcaster
+        self.host = host
+        self.port = port
+        self.buffer_size = buffer_size
+        self.keepalive = keepalive
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="events", daemon=True)
+            self._thread.start()
+            ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        # port=0 v testoch: skutočný port zistíme až po bindnutí
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        subscriber = None
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            url = urlsplit(parts[1]) if len(parts) >= 2 else None
+            if url is None or parts[0] != "GET" or url.path != "/events":
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+            types = [t for value in parse_qs(url.query).get("types", []) for t in value.split(",") if t]
+            wake = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            subscriber = self.broadcaster.subscribe(self.buffer_size, types or None,
+                                                    notify=lambda: loop.call_soon_threadsafe(wake.set))
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n"
+                         b"Access-Control-Allow-Origin: *\r\n\r\n: connected\n\n")
+            await writer.drain()
+            dropped = 0
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                wake.clear()
+                if subscriber.dropped != dropped:
+                    writer.write(f": dropped {subscriber.dropped - dropped} events\n\n".encode())
+                    dropped = subscriber.dropped
+                for event in subscriber.drain():
+                    writer.write(format_sse(event))
+                # Pomalý klient čaká len tu; jeho buffer je ohraničený a ostatných nebrzdí.
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if subscriber is not None:
+                self.broadcaster.unsubscribe(subscriber)
+            writer.close()
+
+
+def attach_sources(broadcaster):
+    """Napojí broadcaster na joby, cache zásuviek, monitor dostupnosti a strechu."""
+    def on_job(event, job):
+        if event == "finished":
+            broadcaster.publish("job", job.to_dict())
+
+    get_executor().add_listener(on_job)
+    get_state_cache().add_listener(lambda slot, on: broadcaster.publish("slot", {"slot": slot, "state": state_text(on)}))
+    get_monitor().add_listener(lambda ip, status: broadcaster.publish("device", status.to_dict()))
+    get_roof().add_listener(lambda status: broadcaster.publish("roof", status))
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """Zdieľaný broadcaster, už napojený na zdroje udalostí."""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            _broadcaster = Broadcaster()
+            attach_sources(_broadcaster)
+        return _broadcaster
+
+
+class LogEventHandler(logging.Handler):
+    """Sink pre applog: každý záznam logu pošle do streamu ako udalosť "log"."""
+
+    def emit(self, record):
+        try:
+            get_broadcaster().publish("log", {"level": record.levelname, "message": record.getMessage(),
+                                              **(getattr(record, "fields", None) or {})})
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,156 @@
+"""Klient REST API pre automatizačné skripty observatória.
+
+Používa jednu requests.Session s poolom keep-alive spojení, takže séria
+príkazov nemusí pre každý otvárať nové TCP spojenie. Pri nedostupnom
+serveri, pri prerušenej odpovedi a pri 503 (plný front, príkaz sa neprijal)
+sa požiadavka zopakuje s rastúcim odstupom. Každý POST nesie vlastnú
+hlavičku Idempotency-Key, takže opakovanie dostane pôvodný job a zásuvka
+ani strecha sa neprepnú dvakrát.
+
+    from client import ControlClient
+    api = ControlClient("http://172.20.20.133:5000")
+    api.batch(["zasuvka on 2 3", "wol C14", {"command": "wake_device", "mac_address": "..."}])
+
+CLI: python3 client.py [--url URL] status | wake <mac|meno>... | slot <n> on|off |
+roof [open|close] | batch <príkaz>... | sequence <meno> | job <id> [--wait]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_URL = os.environ.get("JADIV_API_URL", "http://localhost:5000")
+TIMEOUT = 10.0
+RETRIES = 3
+BACKOFF = 0.5
+POOL_SIZE = 4
+POLL_INTERVAL = 0.5
+
+
+class ApiClientError(RuntimeError):
+    """Server vrátil chybu; status_code a body sú z odpovede."""
+
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class ControlClient:
+    def __init__(self, base_url=DEFAULT_URL, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        # Opakovaný POST je bezpečný vďaka Idempotency-Key, ktorý urllib3 pošle znova.
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+                      status_forcelist=(503,), allowed_methods=frozenset(["GET", "POST"]),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method, path, json_body=None, params=None, key=None):
+        """Vráti JSON odpovede; 4xx/5xx (okrem 502 s výsledkom jobu) vyhodí ApiClientError."""
+        headers = {"Idempotency-Key": key or uuid.uuid4().hex} if method == "POST" else None
+        response = self.session.request(method, self.base_url + path, json=json_body, params=params,
+                                        headers=headers, timeout=self.timeout)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if response.status_code >= 400 and not (response.status_code == 502 and body and "id" in body):
+            message = body.get("message") if isinstance(body, dict) else response.text
+            raise ApiClientError(f"{response.status_code}: {message}", response.status_code, body)
+        return body
+
+    def status(self):
+        return self.request("GET", "/status")
+
+    def wake(self, macs, key=None):
+        macs = [macs] if isinstance(macs, str) else list(macs)
+        return self.request("POST", "/wake", {"mac_addresses": macs}, key=key)
+
+    def slot(self, slot, on, key=None):
+        return self.request("POST", f"/slots/{int(slot)}/{'on' if on else 'off'}", key=key)
+
+    def roof(self, direction=None, key=None):
+        return self.request("POST", "/roof", {"direction": direction} if direction else {}, key=key)
+
+    def roof_status(self):
+        return self.request("GET", "/roof")
+
+    def batch(self, commands, wait=None, key=None):
+        """Príkazy ako objekty /control alebo riadky terminálu ("zasuvka on 2", "wol C14")."""
+        params = {"wait": wait} if wait is not None else None
+        return self.request("POST", "/control/batch", {"commands": list(commands)}, params, key)
+
+    def run_sequence(self, name, key=None):
+        return self.request("POST", f"/sequences/{name}", key=key)
+
+    def job(self, job_id):
+        return self.request("GET", f"/jobs/{job_id}")
+
+    def wait_job(self, job_id, timeout=300.0, interval=POLL_INTERVAL):
+        """Čaká, kým job neskončí; vráti jeho posledný stav."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.job(job_id)
+            if job["status"] in ("done", "failed") or time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klient REST API JadivDevControl")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"adresa API (predvolene {DEFAULT_URL}, env JADIV_API_URL)")
+    parser.add_argument("--wait", action="store_true", help="počkať na dokončenie jobu")
+    parser.add_argument("command", choices=["status", "wake", "slot", "roof", "batch", "sequence", "job"])
+    parser.add_argument("args", nargs="*")
+    args = parser.parse_args(argv)
+    client = ControlClient(args.url)
+    try:
+        if args.command == "status":
+            result = client.status()
+        elif args.command == "wake":
+            result = client.wake(args.args)
+        elif args.command == "slot":
+            if len(args.args) != 2 or args.args[1] not in ("on", "off"):
+                parser.error("slot <n> on|off")
+            result = client.slot(args.args[0], args.args[1] == "on")
+        elif args.command == "roof":
+            result = client.roof(args.args[0] if args.args else None)
+        elif args.command == "batch":
+            result = client.batch(args.args)
+        elif args.command == "sequence":
+            result = client.run_sequence(args.args[0])
+        else:
+            result = client.job(args.args[0])
+        if args.wait and isinstance(result, dict) and "id" in result and result.get("status") not in ("done", "failed"):
+            result = client.wait_job(result["id"])
+    except (ApiClientError, requests.RequestException, IndexError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    failed = isinstance(result, dict) and result.get("status") in ("failed", "error")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""Príkazový jazyk terminálu a dávkové skripty.
+
+Príkazy sa oddeľujú bodkočiarkou alebo novým riadkom, # začína komentár.
+Skript sa najprv celý preloží do plánu (chyba na ktoromkoľvek riadku sa
+ohlási skôr, než sa čokoľvek spustí) a plán potom beží ako jeden job
+executora vo vlastnom vlákne, takže GUI nečaká a súbežné skripty nezaberú
+pracovníkov, ktoré potrebujú ich príkazy. Po sebe idúce príkazy zariadení
+(zasuvka, wol, strecha) sa odošlú naraz ako dávka a počká sa na všetky: WOL
+sa zlúčia do jedného odoslania a zásuvky do jedného volania sispmctl (pri
+tej istej zásuvke platí posledný príkaz). Dávku ukončí wait, sekvencia,
+update, rollback, výpis (sekvencie, plan) alebo blok parallel ... end, ktorý
+sa správa rovnako ako dávka.
+
+    zasuvka on 2 3; wol C14 "AZ2000 mount"
+    parallel
+      wol VNT
+      zasuvka off 4
+    end
+    wait 30
+    strecha open
+
+Spustenie súboru bez GUI: python3 commands.py udrzba.txt (alebo -c "..."),
+--check skript len preloží.
+"""
+import argparse
+import logging
+import shlex
+import sys
+import time
+
+from applog import setup_logging
+from config import get_config
+from core import get_controller
+from history import flush_history, start_recording
+from sispm import check_slot
+from wol import parse_mac
+
+log = logging.getLogger("jadiv.commands")
+
+USAGE = {
+    "zasuvka": "zasuvka on|off <n> [<n> ...]",
+    "wol": "wol <mac|meno> [...]",
+    "strecha": "strecha [open|close]",
+    "sekvencia": "sekvencia <meno>",
+    "sekvencie": "sekvencie",
+    "plan": "plan",
+    "update": "update",
+    "rollback": "rollback",
+    "wait": "wait <sekundy>",
+    "parallel": "parallel ... end",
+}
+
+
+# Príkazy zariadení sa zlučujú do dávok; ostatné (sekvencia, update, rollback) dávku ukončia.
+DEVICE_ACTIONS = ("set_slots", "wake", "roof")
+
+
+class CommandError(ValueError):
+    """Chyba v príkaze alebo skripte; obsahuje číslo riadku."""
+
+
+class Command:
+    """Jeden príkaz, ktorý pri vykonaní odošle job cez Controller."""
+
+    def __init__(self, line, text, action, *args, parts=None):
+        self.line = line
+        self.text = text
+        self.action = action
+        self.args = args
+        # Pôvodné príkazy, ak vznikol zlúčením (merge_commands).
+        self.parts = parts or [self]
+
+    def submit(self, controller, key=None):
+        return getattr(controller, self.action)(*self.args, key=key)
+
+
+class Info:
+    """Príkaz, ktorý len vypíše informáciu (bez jobu)."""
+
+    def __init__(self, line, text, func):
+        self.line = line
+        self.text = text
+        self.func = func
+
+
+class Wait:
+    def __init__(self, line, text, seconds):
+        self.line = line
+        self.text = text
+        self.seconds = seconds
+
+
+class Parallel:
+    def __init__(self, line, commands):
+        self.line = line
+        self.commands = commands
+
+    @property
+    def text(self):
+        return f"parallel({'; '.join(command.text for command in self.commands)})"
+
+
+class Plan:
+    """Preložený skript: zoznam krokov vykonávaných za sebou."""
+
+    def __init__(self, steps, source=None):
+        self.steps = steps
+        self.source = source
+
+    def __len__(self):
+        return sum(len(step.commands) if isinstance(step, Parallel) else 1 for step in self.steps)
+
+    def describe(self):
+        return "; ".join(step.text for step in self.steps)
+
+
+def split_statements(text):
+    """Rozdelí text na (riadok, tokeny); úvodzovky chránia medzery aj bodkočiarky."""
+    statements = []
+    for number, line in enumerate(text.splitlines(), 1):
+        lexer = shlex.shlex(line, posix=True, punctuation_chars=";")
+        lexer.whitespace_split = True
+        lexer.commenters = "#"
+        tokens = []
+        try:
+            for token in lexer:
+                if token and set(token) == {";"}:
+                    if tokens:
+                        statements.append((number, tokens))
+                    tokens = []
+                else:
+                    tokens.append(token)
+        except ValueError as e:
+            raise CommandError(f"Riadok {number}: {e}")
+        if tokens:
+            statements.append((number, tokens))
+    return statements
+
+
+def _resolve_mac(value, config):
+    device = config.find(value)
+    if device is not None:
+        return device['mac']
+    parse_mac(value)
+    return value
+
+
+def _list_schedule():
+    tasks = get_controller().scheduler.upcoming()
+    lines = [f"{time.strftime('%d.%m. %H:%M', time.localtime(task['next_run'])) if task['next_run'] else '-'}  "
+             f"{task['name']} ({task['rule']})" for task in tasks]
+    return "\n".join(lines) or "Plán je prázdny."
+
+
+def compile_statement(number, tokens, config):
+    name, args = tokens[0], tokens[1:]
+    text = " ".join(tokens)
+    usage = f"Použitie: {USAGE[name]}" if name in USAGE else ""
+    try:
+        if name == "zasuvka":
+            if len(args) < 2 or args[0] not in ("on", "off"):
+                raise CommandError(usage)
+            return Command(number, text, "set_slots", {check_slot(slot): args[0] == "on" for slot in args[1:]})
+        if name == "wol":
+            if not args:
+                raise CommandError("Nezadaná MAC adresa!")
+            return Command(number, text, "wake", [_resolve_mac(value, config) for value in args])
+        if name == "strecha":
+            if len(args) > 1 or (args and args[0] not in ("open", "close")):
+                raise CommandError(usage)
+            return Command(number, text, "roof", args[0] if args else None)
+        if name == "sekvencia":
+            if len(args) != 1:
+                raise CommandError(usage)
+            if args[0] not in config.sequences:
+                raise CommandError(f"Neznáma sekvencia: {args[0]}")
+            return Command(number, text, "run_sequence", args[0])
+        if name in ("update", "rollback") and not args:
+            return Command(number, text, name)
+        if name == "sekvencie" and not args:
+            return Info(number, text, lambda: f"Sekvencie: {', '.join(get_config().sequences) or 'žiadne'}")
+        if name == "plan" and not args:
+            return Info(number, text, _list_schedule)
+        if name == "wait":
+            if len(args) != 1:
+                raise CommandError(usage)
+            try:
+                seconds = float(args[0])
+            except ValueError:
+                raise CommandError(usage)
+            if not 0 <= seconds <= 3600:
+                raise CommandError("wait: 0 až 3600 s")
+            return Wait(number, text, seconds)
+    except (CommandError, ValueError) as e:
+        raise CommandError(f"Riadok {number}: {name}: {e}")
+    if usage:
+        raise CommandError(f"Riadok {number}: {usage}")
+    raise CommandError(f"Riadok {number}: neznámy príkaz {name}")
+
+
+def merge_commands(commands):
+    """WOL aj zásuvky sa pošlú jedným volaním (pri tej istej zásuvke platí posledný príkaz)."""
+    wakes = [command for command in commands if command.action == "wake"]
+    slots = [command for command in commands if command.action == "set_slots"]
+    merged = [command for command in commands if command.action not in ("wake", "set_slots")]
+    if wakes:
+        macs = list(dict.fromkeys(mac for command in wakes for mac in command.args[0]))
+        merged.insert(0, Command(wakes[0].line, "; ".join(command.text for command in wakes), "wake", macs,
+                                 parts=[part for command in wakes for part in command.parts]))
+    if slots:
+        states = {}
+        for command in slots:
+            states.update(command.args[0])
+        merged.insert(0, Command(slots[0].line, "; ".join(command.text for command in slots), "set_slots", states,
+                                 parts=[part for command in slots for part in command.parts]))
+    return merged
+
+
+def _batch_step(commands):
+    """Dávka príkazov zariadení ako jeden krok; jediný príkaz ostane samostatným krokom."""
+    commands = merge_commands(commands)
+    if len(commands) == 1:
+        return commands[0]
+    return Parallel(commands[0].line, commands)
+
+
+def compile_script(text, config=None, source=None):
+    """Preloží celý skript do Plan; pri chybe vyhodí CommandError s číslom riadku."""
+    config = config or get_config()
+    steps = []
+    block = None
+    batch = []
+
+    def flush():
+        if batch:
+            steps.append(_batch_step(batch))
+            batch.clear()
+
+    for number, tokens in split_statements(text):
+        if tokens[0] == "parallel":
+            if block is not None:
+                raise CommandError(f"Riadok {number}: vnorený parallel nie je povolený")
+            if len(tokens) > 1:
+                raise CommandError(f"Riadok {number}: {USAGE['parallel']}")
+            flush()
+            block = Parallel(number, [])
+            continue
+        if tokens[0] == "end":
+            if block is None:
+                raise CommandError(f"Riadok {number}: end bez parallel")
+            if block.commands:
+                steps.append(_batch_step(block.commands))
+            block = None
+            continue
+        step = compile_statement(number, tokens, config)
+        if block is not None:
+            if not isinstance(step, Command):
+                raise CommandError(f"Riadok {number}: v bloku parallel môžu byť len príkazy zariadení")
+            block.commands.append(step)
+        elif isinstance(step, Command) and step.action in DEVICE_ACTIONS:
+            batch.append(step)
+        else:
+            flush()
+            steps.append(step)
+    if block is not None:
+        raise CommandError(f"Riadok {block.line}: parallel bez end")
+    flush()
+    if not steps:
+        raise CommandError("Prázdny príkaz")
+    return Plan(steps, source)
+
+
+def load_script(path, config=None):
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_script(f.read(), config, source=path)
+
+
+def _submit(command, controller):
+    try:
+        return command.submit(controller)
+    except ValueError as e:
+        raise RuntimeError(f"Riadok {command.line}: {command.text}: {e}")
+
+
+def _check(command, job):
+    job.wait()
+    if not job.ok:
+        raise RuntimeError(f"Riadok {command.line}: {command.text}: {job.error_text}")
+    return job.duration or 0.0
+
+
+def execute_plan(plan, controller=None, output=None):
+    """Vykoná plán (blokujúco, ako job executora); na prvej chybe skončí s RuntimeError."""
+    controller = controller or get_controller()
+    output = output or log.info
+    start = time.monotonic()
+    busy = 0.0
+    for step in plan.steps:
+        if isinstance(step, Info):
+            output(step.func())
+        elif isinstance(step, Wait):
+            time.sleep(step.seconds)
+        elif isinstance(step, Parallel):
+            submitted = []
+            try:
+                for command in step.commands:
+                    submitted.append((command, _submit(command, controller)))
+            finally:
+                # Aj keď sa niektorý príkaz neprijal, počkáme na už odoslané.
+                results = [(command, job.wait()) for command, job in submitted]
+            for command, job in results:
+                busy += _check(command, job)
+        else:
+            busy += _check(step, _submit(step, controller))
+    elapsed = time.monotonic() - start
+    log.info(f"Skript: {len(plan)} príkazov za {elapsed:.1f} s (súčet trvania jobov {busy:.1f} s)")
+    return elapsed
+
+
+def submit_plan(plan, controller=None):
+    """Odošle plán ako jeden job; GUI ho sleduje ako každý iný job.
+
+    Plán čaká na joby svojich príkazov, preto beží vo vlastnom vlákne a nezaberá pracovníka poolu.
+    """
+    controller = controller or get_controller()
+    name = f"skript {plan.source}" if plan.source else "skript"
+    return controller.executor.submit(name, execute_plan, plan, controller, dedicated=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spustí skript príkazov JadivDevControl bez GUI")
+    parser.add_argument("script", nargs="?", help="súbor so skriptom (- = stdin)")
+    parser.add_argument("-c", dest="command", help="skript priamo v argumente")
+    parser.add_argument("--check", action="store_true", help="skript len preloží a vypíše plán")
+    args = parser.parse_args(argv)
+    if args.command is None and args.script is None:
+        parser.error("zadajte súbor alebo -c")
+    setup_logging()
+    try:
+        if args.command is not None:
+            plan = compile_script(args.command)
+        elif args.script == "-":
+            plan = compile_script(sys.stdin.read(), source="stdin")
+        else:
+            plan = load_script(args.script)
+    except (CommandError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.check:
+        print(f"{len(plan)} príkazov: {plan.describe()}")
+        return 0
+    controller = get_controller()
+    start_recording(controller.executor)
+    job = submit_plan(plan, controller).wait()
+    flush_history()
+    if not job.ok:
+        print(job.error_text, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
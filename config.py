@@ -0,0 +1,338 @@
+"""Konfigurácia zariadení: zoznam počítačov, názvy zásuviek, cesta k skriptu strechy, port API, sekvencie, plán a agenti.
+
+Súbor config.json sa načíta a overí raz do nemennej štruktúry s indexmi podľa
+mena, MAC a IP. Vlákno sleduje mtime súboru; po zmene sa konfigurácia načíta
+znova a listenery dostanú množinu zmenených sekcií. Chybný súbor sa zaloguje
+a ostáva posledná platná konfigurácia.
+"""
+import ipaddress
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+
+from scheduler import ScheduleError, parse_schedule
+from sequences import SequenceError, parse_sequences
+from sispm import check_slot
+from wol import parse_mac
+
+log = logging.getLogger("jadiv.config")
+
+CONFIG_FILE = "config.json"
+WATCH_INTERVAL = 2.0
+
+DEFAULT_CONFIG = {
+    "devices": [
+        {"name": "hlavny", "mac": "e0:d5:5e:df:c6:4e", "ip": "172.20.20.133"},
+        {"name": "VNT", "mac": "78:24:af:9c:06:e7", "ip": "172.20.20.123"},
+        {"name": "C14", "mac": "e0:d5:5e:37:4f:ad", "ip": "172.20.20.103"},
+        {"name": "AZ2000 mount", "mac": "00:c0:08:a9:c2:32", "ip": "172.20.20.10"},
+        {"name": "AZ2000 RPi allsky", "mac": "d8:3a:dd:9a:05:d4", "ip": "172.20.20.116"},
+        {"name": "GM3000 mount", "mac": "00:c0:08:aa:35:12", "ip": "172.20.20.12"},
+        {"name": "GM3000 RPi pi1", "mac": "d8:3a:dd:89:4d:d0", "ip": "172.20.20.112"},
+    ],
+    "slots": {"1": "none(1)", "2": "AZ2000(2)", "3": "C14(3)", "4": "UNKNOWN(4)"},
+    "strecha_dir": "/home/dpv/Downloads/usb-relay-hid-master/commandline/makemake",
+    "strecha_script": "./strecha_on.sh",
+    # Relé strechy: backend auto = USB HID relé, ak je modul hid a doska, inak strecha_script.
+    "roof": {"backend": "auto", "relay": 1, "serial": None, "pulse": 0.5, "travel_time": 60},
+    "api_port": 5000,
+    # Rovnaký príkaz zariadenia do toľkých sekúnd od predchádzajúceho sa zlúči (dvojklik, opakovaná požiadavka).
+    "dedup_window": 2.0,
+    # Kolonické sedlo; podľa neho sa počítajú udalosti Slnka v pláne.
+    "location": {"lat": 48.9339, "lon": 22.2736},
+    "sequences": {
+        "otvorenie": [
+            {"id": "napajanie", "action": "slots", "slots": {"2": True, "3": True}},
+            {"id": "montaz_az2000", "action": "wake", "devices": ["AZ2000 mount"], "after": ["napajanie"],
+             "wait_up": ["AZ2000 mount"], "timeout": 180},
+            {"id": "montaz_gm3000", "action": "wake", "devices": ["GM3000 mount"],
+             "wait_up": ["GM3000 mount"], "timeout": 180},
+            {"id": "pocitace", "action": "wake", "devices": ["C14", "VNT"], "after": ["napajanie"],
+             "wait_up": ["C14", "VNT"], "timeout": 300},
+            {"id": "strecha", "action": "roof", "direction": "open",
+             "after": ["montaz_az2000", "montaz_gm3000", "pocitace"]},
+        ],
+        "zatvorenie": [
+            {"id": "strecha", "action": "roof", "direction": "close"},
+            {"id": "vypnute_pocitace", "action": "wait", "after": ["strecha"],
+             "wait_down": ["C14", "AZ2000 mount"], "timeout": 900},
+            {"id": "napajanie", "action": "slots", "slots": {"2": False, "3": False}, "after": ["vypnute_pocitace"]},
+        ],
+    },
+    "schedule": [],
+    # Meno, pod ktorým sa tento počítač hlási ako agent (None = hostname).
+    "agent_name": None,
+    # Agenti na iných počítačoch, ktoré objavenie cez broadcast nenájde: [{"name": "pi1", "url": "http://..."}].
+    "agents": [],
+}
+
+
+class ConfigError(ValueError):
+    """Konfiguračný súbor je neplatný."""
+
+
+def normalize_mac(mac):
+    return ":".join(f"{b:02x}" for b in parse_mac(mac))
+
+
+def _agent(raw, index):
+    if not isinstance(raw, dict) or not isinstance(raw.get("name"), str) or not raw["name"].strip():
+        raise ConfigError(f"agents: položka #{index + 1} musí byť objekt s menom")
+    url = raw.get("url")
+    if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+        raise ConfigError(f"agents: {raw['name']}: url musí začínať http:// alebo https://")
+    return MappingProxyType({"name": raw["name"], "url": url.rstrip("/")})
+
+
+def _device(raw, index):
+    if not isinstance(raw, dict):
+        raise ConfigError(f"Zariadenie #{index + 1} musí byť objekt")
+    device = dict(raw)
+    name = device.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ConfigError(f"Zariadenie #{index + 1} nemá meno")
+    try:
+        device["mac"] = normalize_mac(device.get("mac"))
+        device["ip"] = str(ipaddress.ip_address(device.get("ip")))
+    except ValueError as e:
+        raise ConfigError(f"Zariadenie {name}: {e}")
+    if "ports" in device:
+        ports = device["ports"]
+        if not isinstance(ports, list) or not all(isinstance(p, int) and 0 < p < 65536 for p in ports):
+            raise ConfigError(f"Zariadenie {name}: ports musí byť zoznam portov")
+        device["ports"] = tuple(ports)
+    if "timeout" in device and not isinstance(device["timeout"], (int, float)):
+        raise ConfigError(f"Zariadenie {name}: timeout musí byť číslo")
+    return MappingProxyType(device)
+
+
+class Config:
+    """Overená konfigurácia; zariadenia sú len na čítanie."""
+
+    def __init__(self, data):
+        merged = dict(DEFAULT_CONFIG)
+        merged.update(data)
+        if not isinstance(merged["devices"], list):
+            raise ConfigError("devices musí byť zoznam")
+        self.devices = tuple(_device(raw, i) for i, raw in enumerate(merged["devices"]))
+        self.by_name = self._index("name")
+        self.by_mac = self._index("mac")
+        self.by_ip = self._index("ip")
+        try:
+            slots = {check_slot(slot): str(name) for slot, name in dict(merged["slots"]).items()}
+        except (TypeError, ValueError) as e:
+            raise ConfigError(f"slots: {e}")
+        self.slots = MappingProxyType(dict(sorted(slots.items())))
+        self.strecha_dir = str(merged["strecha_dir"])
+        self.strecha_script = str(merged["strecha_script"])
+        self.roof = self._roof(merged["roof"])
+        port = merged["api_port"]
+        if not isinstance(port, int) or not 0 < port < 65536:
+            raise ConfigError(f"Neplatný api_port: {port}")
+        self.api_port = port
+        window = merged["dedup_window"]
+        if not isinstance(window, (int, float)) or not 0 <= window <= 60:
+            raise ConfigError(f"dedup_window musí byť 0 až 60 s: {window}")
+        self.dedup_window = float(window)
+        try:
+            self.sequences = parse_sequences(merged["sequences"], self.find)
+        except SequenceError as e:
+            raise ConfigError(str(e))
+        self._sequence_source = merged["sequences"]
+        try:
+            location = dict(merged["location"])
+            self.location = (float(location["lat"]), float(location["lon"]))
+        except (TypeError, ValueError, KeyError) as e:
+            raise ConfigError(f"location musí mať lat a lon: {e}")
+        try:
+            self.schedule = parse_schedule(merged["schedule"], self.find, self.sequences, self.location)
+        except ScheduleError as e:
+            raise ConfigError(str(e))
+        self._schedule_source = merged["schedule"]
+        name = merged["agent_name"]
+        if name is not None and (not isinstance(name, str) or not name.strip()):
+            raise ConfigError("agent_name musí byť neprázdny reťazec")
+        self.agent_name = name
+        if not isinstance(merged["agents"], list):
+            raise ConfigError("agents musí byť zoznam")
+        self.agents = tuple(_agent(raw, i) for i, raw in enumerate(merged["agents"]))
+        if len({agent["name"] for agent in self.agents}) != len(self.agents):
+            raise ConfigError("agents: duplicitné meno")
+
+    def _roof(self, raw):
+        if not isinstance(raw, dict):
+            raise ConfigError("roof musí byť objekt")
+        roof = dict(DEFAULT_CONFIG["roof"])
+        roof.update(raw)
+        if roof["backend"] not in ("auto", "hid", "script", "fake"):
+            raise ConfigError(f"roof.backend: neznámy backend {roof['backend']}")
+        if not isinstance(roof["relay"], int) or not 1 <= roof["relay"] <= 8:
+            raise ConfigError(f"roof.relay: neplatné relé {roof['relay']}")
+        if roof["serial"] is not None and not isinstance(roof["serial"], str):
+            raise ConfigError("roof.serial musí byť reťazec")
+        for key in ("pulse", "travel_time"):
+            if not isinstance(roof[key], (int, float)) or roof[key] <= 0:
+                raise ConfigError(f"roof.{key} musí byť kladné číslo")
+        return MappingProxyType(roof)
+
+    def _index(self, key):
+        index = {}
+        for device in self.devices:
+            value = device[key]
+            if value in index:
+                raise ConfigError(f"Duplicitné {key}: {value}")
+            index[value] = device
+        return MappingProxyType(index)
+
+    def find(self, key):
+        """Zariadenie podľa mena, MAC alebo IP (None ak neexistuje)."""
+        key = str(key)
+        device = self.by_name.get(key) or self.by_ip.get(key)
+        if device is None:
+            try:
+                device = self.by_mac.get(normalize_mac(key))
+            except ValueError:
+                pass
+        return device
+
+    def slot_name(self, slot):
+        return self.slots.get(slot, str(slot))
+
+    def changes(self, other):
+        """Sekcie, ktoré sa oproti inej konfigurácii zmenili."""
+        changed = set()
+        if self.devices != other.devices:
+            changed.add("devices")
+        if self.slots != other.slots:
+            changed.add("slots")
+        if (self.strecha_dir, self.strecha_script, self.roof) != (other.strecha_dir, other.strecha_script, other.roof):
+            changed.add("strecha")
+        if self.api_port != other.api_port:
+            changed.add("api")
+        if self._sequence_source != other._sequence_source:
+            changed.add("sequences")
+        if (self._schedule_source, self.location) != (other._schedule_source, other.location):
+            changed.add("schedule")
+        if (self.agent_name, self.agents) != (other.agent_name, other.agents):
+            changed.add("agents")
+        return changed
+
+
+def load_config(path=CONFIG_FILE):
+    """Načíta a overí súbor; chýbajúci súbor znamená predvolenú konfiguráciu."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return Config({})
+    except ValueError as e:
+        raise ConfigError(f"{path}: {e}")
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: očakáva sa JSON objekt")
+    return Config(data)
+
+
+class ConfigRegistry:
+    """Aktuálna konfigurácia a sledovanie zmien súboru."""
+
+    def __init__(self, path=CONFIG_FILE, interval=WATCH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._stamp = self._file_stamp()
+        try:
+            self._config = load_config(path)
+        except ConfigError as e:
+            self.last_error = str(e)
+            log.warning(f"Chybná konfigurácia, použije sa predvolená: {e}")
+            self._config = Config({})
+
+    @property
+    def config(self):
+        return self._config
+
+    def add_listener(self, callback):
+        """callback(config, changed) po úspešnom načítaní zmeneného súboru; z vlákna sledovania."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force=False):
+        """Načíta súbor, ak sa zmenil; vráti množinu zmenených sekcií."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp and not force:
+                return set()
+            self._stamp = stamp
+            try:
+                config = load_config(self.path)
+            except ConfigError as e:
+                self.last_error = str(e)
+                log.warning(f"Chybná konfigurácia, ostáva predchádzajúca: {e}")
+                return set()
+            self.last_error = None
+            changed = config.changes(self._config)
+            self._config = config
+        if changed:
+            log.info(f"Konfigurácia načítaná, zmenené: {', '.join(sorted(changed))}")
+            for callback in list(self._listeners):
+                try:
+                    callback(config, changed)
+                except Exception:
+                    log.exception("Chyba v listeneri konfigurácie")
+        return changed
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="config-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.reload()
+
+    def save(self, data):
+        """Overí a atomicky zapíše nové nastavenia (sledovanie ich potom načíta)."""
+        Config(data)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        return self.reload()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ConfigRegistry()
+        return _registry
+
+
+def get_config():
+    """Aktuálna konfigurácia z pamäte (súbor sa tu nečíta)."""
+    return get_registry().config
@@ -0,0 +1,339 @@
+"""Koordinátor lokality: ovládanie agentov na viacerých počítačoch z jednej konzoly.
+
+Agentov nájde UDP broadcastom (agent.py odpovie menom a portom API) a pridá
+k nim tých z config.json (agents). Na každého agenta drží jeden ControlClient
+s keep-alive spojeniami; stav všetkých sa číta a príkazy sa posielajú súbežne
+z jedného poolu vlákien, takže pomalý alebo nedostupný agent nezdrží ostatných.
+Príkazy sú riadky terminálu (zasuvka on 2, strecha open, wol C14) a každý
+agent dostane svoje naraz cez POST /control/batch.
+
+CLI: python3 coordinator.py [--agent meno=url] discover | status | run <príkaz>... [--on meno,...]
+"""
+import argparse
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent import DISCOVERY_PORT, PROBE
+from client import ControlClient
+from config import get_config, get_registry
+
+log = logging.getLogger("jadiv.coordinator")
+
+BROADCAST = "255.255.255.255"
+DISCOVERY_TIMEOUT = 1.0
+POLL_INTERVAL = 2.0
+AGENT_TIMEOUT = 3.0
+MAX_WORKERS = 16
+COMMAND_WAIT = 5.0
+
+
+def discover(timeout=DISCOVERY_TIMEOUT, broadcast=BROADCAST, port=DISCOVERY_PORT):
+    """Pošle PROBE a počas `timeout` zbiera odpovede; vráti {meno: (url, info)}."""
+    found = {}
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.sendto(PROBE, (broadcast, port))
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                data, (host, _) = sock.recvfrom(65536)
+            except socket.timeout:
+                break
+            try:
+                info = json.loads(data)
+                found[str(info["name"])] = (f"http://{host}:{int(info['port'])}", info)
+            except (ValueError, KeyError, TypeError):
+                log.debug(f"Neplatná odpoveď na objavenie od {host}")
+    finally:
+        sock.close()
+    return found
+
+
+class Agent:
+    """Vzdialený agent: adresa, posledný stav a jeho klient s vlastným poolom spojení."""
+
+    def __init__(self, name, url, info=None, static=False, timeout=AGENT_TIMEOUT):
+        self.name = name
+        self.url = url
+        self.info = info or {}
+        self.static = static
+        self.client = ControlClient(url, timeout=timeout, retries=1, backoff=0.1)
+        self.status = None
+        self.error = None
+        self.latency = None
+        self.updated = None
+
+    @property
+    def online(self):
+        return self.status is not None and self.error is None
+
+    def to_dict(self):
+        return {"name": self.name, "url": self.url, "online": self.online, "error": self.error,
+                "latency": self.latency, "updated": self.updated, "info": self.info, "status": self.status}
+
+    def close(self):
+        self.client.close()
+
+
+class Coordinator:
+    def __init__(self, poll_interval=POLL_INTERVAL, max_workers=MAX_WORKERS, broadcast=BROADCAST,
+                 discovery_port=DISCOVERY_PORT):
+        self.poll_interval = poll_interval
+        self.broadcast = broadcast
+        self.discovery_port = discovery_port
+        self._agents = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="site")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """callback(agent_dict) po každej zmene agenta (z vlákna koordinátora)."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, agent):
+        state = agent.to_dict()
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception:
+                log.exception("Chyba v listeneri koordinátora")
+
+    def agents(self):
+        with self._lock:
+            return list(self._agents.values())
+
+    def get(self, name):
+        with self._lock:
+            return self._agents.get(name)
+
+    def add(self, name, url, info=None, static=False):
+        """Pridá agenta alebo mu aktualizuje adresu; nová adresa znamená nového klienta."""
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is not None and agent.url == url:
+                agent.info = info or agent.info
+                agent.static = agent.static or static
+                return agent
+            old, agent = agent, Agent(name, url, info, static)
+            self._agents[name] = agent
+        if old is not None:
+            old.close()
+        log.info(f"Agent {name}: {url}")
+        self._notify(agent)
+        return agent
+
+    def remove(self, name):
+        with self._lock:
+            agent = self._agents.pop(name, None)
+        if agent is not None:
+            agent.close()
+            log.info(f"Agent {name} odobratý")
+            self._notify(agent)
+
+    def load_config(self, config):
+        """Statickí agenti z config.json; tí, čo z konfigurácie zmizli, sa odoberú."""
+        names = {entry["name"] for entry in config.agents}
+        for agent in self.agents():
+            if agent.static and agent.name not in names:
+                self.remove(agent.name)
+        for entry in config.agents:
+            self.add(entry["name"], entry["url"], static=True)
+
+    def _on_config(self, config, changed):
+        if "agents" in changed:
+            self.load_config(config)
+
+    def discover(self, timeout=DISCOVERY_TIMEOUT):
+        """Objaví agentov v sieti, pridá ich a hneď načíta ich stav; vráti mená nájdených."""
+        found = discover(timeout, self.broadcast, self.discovery_port)
+        for name, (url, info) in found.items():
+            self.add(name, url, info)
+        log.info(f"Objavení agenti: {', '.join(sorted(found)) or 'žiadni'}")
+        self.refresh(list(found))
+        return sorted(found)
+
+    def _select(self, names):
+        agents = self.agents()
+        if names is None:
+            return agents
+        selected = [agent for agent in agents if agent.name in names]
+        unknown = set(names) - {agent.name for agent in selected}
+        if unknown:
+            raise ValueError(f"Neznámy agent: {', '.join(sorted(unknown))}")
+        return selected
+
+    def fan_out(self, func, names=None):
+        """Zavolá func(agent) pre všetkých (alebo vybraných) agentov súbežne; vráti {meno: (výsledok, chyba)}."""
+        agents = self._select(names)
+        futures = {agent.name: self._pool.submit(func, agent) for agent in agents}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = (future.result(), None)
+            except Exception as e:
+                results[name] = (None, str(e) or e.__class__.__name__)
+        return results
+
+    def _refresh_one(self, agent):
+        start = time.perf_counter()
+        try:
+            status = agent.client.status()
+            if not agent.info:
+                agent.info = agent.client.request("GET", "/agent")
+        except Exception as e:
+            changed = agent.error != str(e)
+            agent.error = str(e)
+            if changed:
+                log.warning(f"Agent {agent.name} nedostupný: {e}")
+        else:
+            if agent.error is not None:
+                log.info(f"Agent {agent.name} je opäť dostupný")
+            agent.status, agent.error = status, None
+            agent.latency = time.perf_counter() - start
+        agent.updated = time.time()
+        self._notify(agent)
+        return agent.online
+
+    def refresh(self, names=None):
+        """Načíta stav agentov súbežne; vráti {meno: online}."""
+        return {name: bool(result) for name, (result, _) in self.fan_out(self._refresh_one, names).items()}
+
+    def run(self, commands, names=None, wait=COMMAND_WAIT):
+        """Pošle riadky príkazov vybraným agentom (každému jednou dávkou) a obnoví ich stav."""
+        commands = [commands] if isinstance(commands, str) else list(commands)
+        if not commands:
+            raise ValueError("Prázdny príkaz")
+
+        def send(agent):
+            try:
+                return agent.client.batch(commands, wait=wait)
+            finally:
+                self._refresh_one(agent)
+        results = self.fan_out(send, names)
+        for name, (body, error) in sorted(results.items()):
+            if error is not None:
+                log.warning(f"{name}: {'; '.join(commands)}: {error}")
+            else:
+                log.info(f"{name}: {'; '.join(commands)}: {body['status']}")
+        return results
+
+    def run_each(self, commands_by_agent, wait=COMMAND_WAIT):
+        """Iné príkazy pre každého agenta {meno: [príkazy]}, všetko súbežne."""
+        def send(agent):
+            try:
+                return agent.client.batch(commands_by_agent[agent.name], wait=wait)
+            finally:
+                self._refresh_one(agent)
+        return self.fan_out(send, list(commands_by_agent))
+
+    def site_status(self):
+        """Spojený stav lokality: agenti, zásuvky ako "agent/zásuvka" a strechy."""
+        agents = self.agents()
+        slots, roofs = {}, {}
+        for agent in agents:
+            if agent.online:
+                for slot, state in agent.status.get("slots", {}).items():
+                    slots[f"{agent.name}/{slot}"] = state
+                roofs[agent.name] = agent.status.get("roof")
+        return {"agents": {agent.name: agent.to_dict() for agent in agents},
+                "online": sum(agent.online for agent in agents), "slots": slots, "roofs": roofs}
+
+    def submit(self, func, *args):
+        """Spustí operáciu koordinátora na pozadí (napr. z GUI vlákna); vráti Future."""
+        return self._pool.submit(func, *args)
+
+    def start(self, discover_now=True):
+        """Načíta statických agentov, voliteľne objaví ostatných a periodicky obnovuje stav."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        registry = get_registry()
+        registry.add_listener(self._on_config)
+        self.load_config(registry.config)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(discover_now,), name="coordinator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        get_registry().remove_listener(self._on_config)
+
+    def _loop(self, discover_now):
+        if discover_now:
+            try:
+                self.discover()
+            except OSError as e:
+                log.warning(f"Objavenie agentov zlyhalo: {e}")
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("Chyba pri obnove stavu agentov")
+            if self._stop.wait(self.poll_interval):
+                return
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_coordinator():
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = Coordinator()
+        return _coordinator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Koordinátor agentov JadivDevControl")
+    parser.add_argument("--agent", action="append", default=[], metavar="MENO=URL", help="agent mimo objavenia")
+    parser.add_argument("--broadcast", default=BROADCAST, help=f"adresa objavenia (predvolene {BROADCAST})")
+    parser.add_argument("--timeout", type=float, default=DISCOVERY_TIMEOUT, help="čas čakania na odpovede")
+    parser.add_argument("--on", help="len vybraní agenti (mená oddelené čiarkou)")
+    parser.add_argument("command", choices=["discover", "status", "run"])
+    parser.add_argument("args", nargs="*")
+    args = parser.parse_args(argv)
+    coordinator = Coordinator(broadcast=args.broadcast)
+    for entry in args.agent:
+        name, _, url = entry.partition("=")
+        coordinator.add(name, url, static=True)
+    for entry in get_config().agents:
+        coordinator.add(entry["name"], entry["url"], static=True)
+    names = args.on.split(",") if args.on else None
+    try:
+        coordinator.discover(args.timeout)
+        if args.command == "run":
+            results = coordinator.run(args.args, names)
+            output = {name: body if error is None else {"status": "error", "message": error}
+                      for name, (body, error) in results.items()}
+        elif args.command == "status":
+            coordinator.refresh(names)
+            output = coordinator.site_status()
+        else:
+            output = {agent.name: agent.url for agent in coordinator.agents()}
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Jadro ovládania bez GUI: zásuvky, WOL, strecha, aktualizácie a plán.
+
+GUI, REST API aj režim --headless volajú tie isté metódy Controller; každá
+akcia je job zdieľaného executora. Modul neimportuje PyQt5, Flask ani
+requests (OTA sa načíta až pri prvom použití). Plánované úlohy z config.json
+aj periodickú kontrolu OTA spúšťa jedno vlákno plánovača.
+"""
+import logging
+import os
+import threading
+import time
+
+from config import get_config, get_registry
+from dedup import CommandDeduper
+from history import start_recording
+from jobs import get_executor
+from metrics import instrument_executor
+from monitor import get_monitor
+from roof import create_relay, get_roof
+from scheduler import Every, get_scheduler
+from sequences import SequenceRunner
+from sispm import check_slot, get_strip
+from slot_state import get_poller, get_state_cache, state_text
+from wol import get_sender, parse_mac
+
+log = logging.getLogger("jadiv.core")
+
+UPDATE_INTERVAL = 3600
+
+
+def slots_job_name(states):
+    return "zasuvka " + " ".join(f"{slot} {'on' if on else 'off'}" for slot, on in states.items())
+
+
+class Controller:
+    """Akcie zariadení ako joby; chybný vstup vyhodí ValueError ešte pred odoslaním."""
+
+    def __init__(self, executor=None):
+        self.executor = executor or get_executor()
+        self.sequences = SequenceRunner(self, get_monitor())
+        self.scheduler = get_scheduler()
+        self.dedup = CommandDeduper()
+        self.telemetry = None
+        self._started = False
+
+    def start(self, poll=True, monitor=True, watch_config=True, poll_interval=None, update_interval=None):
+        """Spustí pozadie: históriu, sledovanie konfigurácie, poller zásuviek, monitor, telemetriu a plánovač.
+
+        S premennou JADIV_FAKE beží na falošnom hardvéri (fakes.py).
+        """
+        if self._started:
+            return self
+        self._started = True
+        if os.environ.get("JADIV_FAKE"):
+            from fakes import install_from_env
+            install_from_env()
+        start_recording(self.executor)
+        instrument_executor(self.executor)
+        registry = get_registry()
+        registry.add_listener(self._on_config)
+        if watch_config:
+            registry.start()
+        if poll:
+            get_poller(poll_interval).start()
+        if monitor:
+            get_monitor(list(registry.config.devices)).start()
+        if poll or monitor:
+            try:
+                from telemetry import start_telemetry
+                self.telemetry = start_telemetry()
+            except ImportError as e:
+                log.warning(f"Telemetria vypnutá, chýba numpy (pip install numpy): {e}")
+            except (OSError, ValueError) as e:
+                log.warning(f"Telemetria vypnutá: {e}")
+        if update_interval:
+            self.scheduler.add("ota check", Every(update_interval), self._check_updates, group="system",
+                               after=time.time() - update_interval)
+        self.load_schedule(registry.config)
+        self.scheduler.start()
+        return self
+
+    def stop(self):
+        self.scheduler.stop()
+        get_registry().stop()
+        get_poller().stop()
+        get_monitor().stop()
+        if self.telemetry is not None:
+            from telemetry import stop_telemetry
+            stop_telemetry()
+
+    def _on_config(self, config, changed):
+        if "devices" in changed:
+            get_monitor().set_devices(list(config.devices))
+        if "schedule" in changed:
+            self.load_schedule(config)
+        if "strecha" in changed:
+            try:
+                get_roof().configure(create_relay(config), config.roof["pulse"], config.roof["travel_time"])
+            except Exception as e:
+                log.warning(f"Relé strechy sa nepodarilo nastaviť: {e}")
+
+    def _check_updates(self):
+        from ota import check_for_updates
+        self.executor.submit("ota check", check_for_updates)
+
+    def load_schedule(self, config):
+        """Nahradí úlohy plánu z konfigurácie; systémové úlohy (kontrola OTA) ostanú."""
+        self.scheduler.clear("config")
+        for task in config.schedule:
+            self.scheduler.add(task.name, task.rule, lambda task=task: self.run_task(task), group="config")
+        if config.schedule:
+            log.info(f"Plán: {len(config.schedule)} úloh")
+
+    def run_task(self, task):
+        """Odošle job pre úlohu plánu."""
+        log.info(f"Plánovaná úloha {task.name} ({task.action})")
+        if task.action == "slots":
+            return self.set_slots(dict(task.slots))
+        if task.action == "wake":
+            return self.wake([device['mac'] for device in task.devices])
+        if task.action == "roof":
+            return self.roof()
+        if task.action == "update_check":
+            return self.check_update()
+        if task.action == "update":
+            return self.update()
+        if task.action == "sequence":
+            return self.run_sequence(task.sequence)
+        raise ValueError(f"Neznáma akcia: {task.action}")
+
+    def _submit(self, command, submit, key=None, targets=None):
+        """Rovnaký príkaz počas behu alebo v okne dedup_window vráti existujúci job.
+
+        Zlúči sa len s posledným príkazom pre tie isté ciele (zásuvky, MAC, strecha).
+        """
+        return self.dedup.submit(command, submit, get_config().dedup_window, key, targets)
+
+    def wake(self, macs, repeat=None, interval=None, key=None):
+        macs = [macs] if isinstance(macs, str) else list(macs)
+        if not macs:
+            raise ValueError("Nezadaná MAC adresa!")
+        for mac in macs:
+            parse_mac(mac)
+        job = self._submit(("wol", tuple(sorted(macs)), repeat, interval),
+                           lambda: self.executor.submit(f"wol {' '.join(macs)}", get_sender().wake_group, macs,
+                                                        repeat=repeat, interval=interval), key,
+                           [("wol", mac.lower()) for mac in macs])
+        get_monitor().boost_macs(macs)
+        return job
+
+    def set_slots(self, states, key=None):
+        """Prepne zásuvky {slot: zapnúť}; súbežné požiadavky sa zlúčia do jedného volania sispmctl."""
+        states = {check_slot(slot): bool(on) for slot, on in states.items()}
+        if not states:
+            raise ValueError("Nezadaná zásuvka")
+        return self._submit(("zasuvka", tuple(sorted(states.items()))),
+                            lambda: self.executor.submit(slots_job_name(states), get_strip().set_slots, states), key,
+                            [("zasuvka", slot) for slot in states])
+
+    def switch(self, slot, on, key=None):
+        return self.set_slots({slot: on}, key)
+
+    def roof(self, direction=None, key=None):
+        """Impulz relé strechy; počas pohybu alebo pri poruche vyhodí RoofBusy (ValueError)."""
+        if direction not in (None, "open", "close"):
+            raise ValueError(f"Neplatný smer strechy: {direction}")
+        roof = get_roof()
+
+        def submit():
+            roof.check_ready(direction)
+            return self.executor.submit("strecha", roof.trigger, direction)
+        return self._submit(("strecha", direction), submit, key, [("strecha",)])
+
+    def roof_status(self):
+        return get_roof().status()
+
+    def roof_reset(self, position="unknown"):
+        if position not in ("open", "closed", "unknown"):
+            raise ValueError(f"Neplatná poloha strechy: {position}")
+        get_roof().reset(position)
+        return get_roof().status()
+
+    def run_sequence(self, name, key=None):
+        """Spustí sekvenciu z konfigurácie ako jeden job; jednotlivé kroky sú ďalšie joby.
+
+        Sekvencia čaká na joby svojich krokov, preto beží vo vlastnom vlákne mimo poolu pracovníkov.
+        """
+        steps = get_config().sequences.get(name)
+        if steps is None:
+            raise ValueError(f"Neznáma sekvencia: {name}")
+
+        def submit():
+            if self.sequences.active is not None:
+                raise ValueError(f"Sekvencia {self.sequences.active} ešte beží")
+            return self.executor.submit(f"sekvencia {name}", self.sequences.run, name, steps, dedicated=True)
+        return self._submit(("sekvencia", name), submit, key)
+
+    def check_update(self, key=None):
+        from ota import get_checker
+        return self._submit(("ota check",), lambda: self.executor.submit("ota check", get_checker().check), key)
+
+    def update(self, key=None):
+        from ota import manual_update
+        return self._submit(("ota",), lambda: self.executor.submit("ota", manual_update), key)
+
+    def rollback(self, key=None):
+        from ota import rollback_update
+        return self._submit(("ota rollback",), lambda: self.executor.submit("ota rollback", rollback_update), key)
+
+    def status(self):
+        """Stav z cache a monitora; nesiaha na USB lištu ani na sieť."""
+        cache = get_state_cache()
+        return {
+            "slots": {str(slot): state_text(on) for slot, on in sorted(cache.snapshot().items())},
+            "updated": cache.updated,
+            "poll_error": get_poller().last_error,
+            "devices": list(get_monitor().snapshot().values()),
+            "sequence": self.sequences.active,
+            "roof": get_roof().status(),
+            "schedule": self.scheduler.upcoming()[:5],
+            "dedup": self.dedup.stats(),
+        }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = Controller()
+        return _controller
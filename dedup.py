@@ -0,0 +1,87 @@
+"""Zlučovanie rovnakých príkazov zariadení a idempotenčné kľúče.
+
+Rovnaký príkaz (napr. dvojklik na "Pohnúť strechou" alebo zopakovaná REST
+požiadavka) počas behu pôvodného jobu alebo do DEDUP_WINDOW sekúnd od jeho
+odoslania nevytvorí nový job: volajúci dostane ten istý Job a teda aj jeho
+výsledok. Zlyhaný job sa znova nepoužije, opakovanie po chybe sa vykoná.
+Nedávne joby sa pamätajú podľa cieľa (zásuvka, MAC, strecha): príkaz sa zlúči
+len s posledným príkazom pre ten istý cieľ, takže "on, off, on" v okne pošle
+všetky tri a tretí nevráti starý job prvého.
+
+Klient môže poslať idempotenčný kľúč; rovnaký kľúč s rovnakým príkazom vráti
+pôvodný job počas IDEMPOTENCY_TTL sekúnd bez ohľadu na jeho výsledok. Ten
+istý kľúč s iným príkazom je chyba (IdempotencyConflict).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import get_metrics
+
+DEDUP_WINDOW = 2.0
+IDEMPOTENCY_TTL = 600.0
+MAX_KEYS = 1000
+
+
+class IdempotencyConflict(ValueError):
+    """Idempotenčný kľúč už bol použitý s iným príkazom."""
+
+
+class CommandDeduper:
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_keys=MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.collapsed = 0
+        self.replayed = 0
+        self._recent = {}
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._counter = get_metrics().counter("jadiv_dedup_total", "Príkazy vybavené existujúcim jobom", ("reason",))
+
+    def _purge(self, now, window):
+        for target, (_, job, submitted) in list(self._recent.items()):
+            if job.done and now - submitted >= window:
+                del self._recent[target]
+        while self._keys and (len(self._keys) > self.max_keys or next(iter(self._keys.values()))[2] <= now):
+            self._keys.popitem(last=False)
+
+    def submit(self, command, submit, window=DEDUP_WINDOW, key=None, targets=None):
+        """Vráti bežiaci/nedávny Job pre `command` alebo zavolá submit() a zapamätá si nový.
+
+        `command` je hashovateľný odtlačok príkazu, `targets` zariadenia, ktorých sa týka
+        (predvolene príkaz sám), `key` voliteľný idempotenčný kľúč klienta.
+        """
+        targets = tuple(targets) if targets else (command,)
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now, window)
+            if key is not None and key in self._keys:
+                stored, job, _ = self._keys[key]
+                if stored != command:
+                    raise IdempotencyConflict(f"Idempotenčný kľúč {key} už bol použitý pre iný príkaz")
+                self.replayed += 1
+                self._counter.inc(reason="idempotency_key")
+                return job
+            # Zlúčiť sa dá len s jobom, ktorý je posledným príkazom pre všetky ciele.
+            recent = [self._recent.get(target) for target in targets]
+            first = recent[0]
+            if first is not None and first[0] == command and all(entry is not None and entry[1] is first[1]
+                                                                for entry in recent):
+                _, job, submitted = first
+                if not job.done or (job.ok and now - submitted < window):
+                    self.collapsed += 1
+                    self._counter.inc(reason="collapsed")
+                    if key is not None:
+                        self._keys[key] = (command, job, now + self.ttl)
+                    return job
+            # Odoslanie je pod zámkom, aby dva súbežné rovnaké príkazy nevytvorili dva joby.
+            job = submit()
+            for target in targets:
+                self._recent[target] = (command, job, now)
+            if key is not None:
+                self._keys[key] = (command, job, now + self.ttl)
+            return job
+
+    def stats(self):
+        return {"collapsed": self.collapsed, "replayed": self.replayed, "tracked": len(self._recent),
+                "keys": len(self._keys)}
@@ -0,0 +1,174 @@
+"""Falošný hardvér: sispmctl, WOL a relé strechy s nastaviteľným oneskorením a chybami.
+
+Slúži na skúšanie GUI, API a benchmarkov (bench.py) bez USB lišty, dosky relé
+a siete. install() vymení backendy zdieľaných objektov v tomto procese;
+premenná prostredia JADIV_FAKE ich zapne pri štarte ľubovoľnej verzie:
+
+    JADIV_FAKE=1 python3 7.4-beta4.1.py
+    JADIV_FAKE="sispm=0.3,relay=0.02,fail=0.1,seed=7" python3 main.py --headless
+
+Zmena sekcie strechy v config.json vráti strechu na skutočné relé.
+"""
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+
+import wol as wol_module
+from config import get_config
+from jobs import COMMAND_TIMEOUT
+from roof import CMD_ON, FakeHidDevice, HidRelay, get_roof
+from sispm import get_strip
+from wol import WolSender, magic_packet
+
+log = logging.getLogger("jadiv.fakes")
+
+FAKE_ENV = "JADIV_FAKE"
+# Typické časy skutočného hardvéru: sispmctl pri každom spustení prehľadá USB zbernicu.
+LATENCY = {"sispm": 0.2, "wol": 0.0, "relay": 0.01}
+SLOTS = 4
+
+
+class FaultInjector:
+    """Oneskorenie (s rozptylom ±jitter) a náhodné chyby s pravdepodobnosťou fail_rate."""
+
+    def __init__(self, latency=0.0, fail_rate=0.0, jitter=0.1, rng=None):
+        if not 0 <= fail_rate <= 1:
+            raise ValueError(f"fail_rate musí byť 0 až 1: {fail_rate}")
+        self.latency = max(0.0, float(latency))
+        self.fail_rate = fail_rate
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        """Počká a vráti True, ak má volanie zlyhať."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * (1 + self.jitter * (2 * self.rng.random() - 1))
+            failed = self.rng.random() < self.fail_rate
+            if failed:
+                self.failures += 1
+        if delay > 0:
+            time.sleep(delay)
+        return failed
+
+
+class FakeSispmctl:
+    """Runner pre PowerStrip: odpovedá ako sispmctl na -o/-f <n> a -g all."""
+
+    def __init__(self, injector=None, slots=SLOTS):
+        self.injector = injector or FaultInjector(LATENCY["sispm"])
+        self.states = {slot: False for slot in range(1, slots + 1)}
+        self.invocations = []
+        self._lock = threading.Lock()
+
+    def __call__(self, args, cwd=None, timeout=COMMAND_TIMEOUT):
+        args = list(args)
+        self.invocations.append(args)
+        if self.injector():
+            return subprocess.CompletedProcess(args, 1, "", "No GEMBIRD SiS-PM found. Check USB connections, please!\n")
+        lines = ["Accessing Gembird #0 USB device 001"]
+        flags = args[1:]
+        with self._lock:
+            for flag, value in zip(flags, flags[1:]):
+                if flag in ("-o", "-f"):
+                    slot = int(value)
+                    if slot not in self.states:
+                        return subprocess.CompletedProcess(args, 1, "", f"Invalid outlet number: {slot}\n")
+                    self.states[slot] = flag == "-o"
+                    lines.append(f"Switched outlet {slot} {'on' if flag == '-o' else 'off'}")
+                elif flag == "-g":
+                    lines += [f"Status of outlet {slot}:\t{'on' if on else 'off'}" for slot, on in self.states.items()]
+        return subprocess.CompletedProcess(args, 0, "\n".join(lines) + "\n", "")
+
+
+class FakeWolSender(WolSender):
+    """WOL bez siete: overí MAC adresy, počká a zapamätá si, komu by sa poslal paket."""
+
+    def __init__(self, injector=None, **kwargs):
+        super().__init__(**kwargs)
+        self.injector = injector or FaultInjector(LATENCY["wol"])
+        self.sent = []
+
+    def wake_group(self, macs, repeat=None, interval=None, broadcast=None, port=None):
+        for mac in macs:
+            magic_packet(mac)
+        if self.injector():
+            raise OSError("fake WOL: sieť je nedostupná")
+        self.sent += list(macs)
+        return len(macs)
+
+
+class FakeRelayDevice(FakeHidDevice):
+    """Doska relé, ktorej zápis trvá a občas zlyhá (zlyhá len zapnutie, vypnutie vždy prejde)."""
+
+    def __init__(self, injector=None, **kwargs):
+        super().__init__(**kwargs)
+        self.injector = injector or FaultInjector(LATENCY["relay"])
+
+    def send_feature_report(self, data):
+        if self.injector() and list(data)[1] == CMD_ON:
+            raise OSError("fake HID: zápis zlyhal")
+        return super().send_feature_report(data)
+
+
+def parse_spec(text):
+    """JADIV_FAKE: "1" alebo "sispm=0.2,wol=0,relay=0.01,fail=0.05,seed=1" -> kwargs pre install()."""
+    options = {}
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part or "=" not in part:
+            continue
+        name, value = (item.strip() for item in part.split("=", 1))
+        try:
+            if name in LATENCY:
+                options[name] = float(value)
+            elif name == "fail":
+                options["fail_rate"] = float(value)
+            elif name in ("seed", "slots"):
+                options[name] = int(value)
+            else:
+                raise ValueError(f"neznáma voľba {name}")
+        except ValueError as e:
+            raise ValueError(f"{FAKE_ENV}: {part}: {e}")
+    return options
+
+
+def install(sispm=None, wol=None, relay=None, fail_rate=0.0, seed=None, slots=SLOTS, config=None):
+    """Prepne lištu, WOL a strechu tohto procesu na falošný hardvér; vráti použité náhrady."""
+    config = config or get_config()
+    rng = random.Random(seed)
+
+    def injector(name, value):
+        return FaultInjector(LATENCY[name] if value is None else value, fail_rate, rng=rng)
+
+    strip = get_strip()
+    fake_strip = FakeSispmctl(injector("sispm", sispm), slots)
+    strip.runner = fake_strip
+    fake_wol = FakeWolSender(injector("wol", wol))
+    with wol_module._sender_lock:
+        wol_module._sender = fake_wol
+    relay_injector = injector("relay", relay)
+    devices = []
+
+    def opener(serial):
+        devices.append(FakeRelayDevice(relay_injector))
+        return devices[-1]
+    roof = get_roof(config)
+    roof.configure(HidRelay(config.roof["relay"], opener=opener), config.roof["pulse"], config.roof["travel_time"])
+    log.info(f"Falošný hardvér: sispmctl {fake_strip.injector.latency * 1000:.0f} ms, "
+             f"relé {relay_injector.latency * 1000:.0f} ms, chybovosť {fail_rate:.0%}")
+    return {"sispm": fake_strip, "wol": fake_wol, "relay": devices}
+
+
+def install_from_env():
+    """install() podľa JADIV_FAKE; bez premennej nerobí nič a vráti None."""
+    spec = os.environ.get(FAKE_ENV)
+    if not spec or spec == "0":
+        return None
+    return install(**parse_spec(spec))
@@ -0,0 +1,59 @@
+"""Režim bez GUI: jadro, REST API a stream udalostí ako démon.
+
+Spustenie: python3 main.py --headless (alebo python3 headless.py). PyQt5 sa
+vôbec neimportuje; Flask/waitress a requests sa načítajú, len ak je zapnuté API
+alebo kontrola aktualizácií. Vhodné pre Raspberry Pi na observatóriu.
+"""
+import argparse
+import signal
+import sys
+import threading
+import time
+
+from applog import add_sink, log_message
+from config import get_registry
+from core import UPDATE_INTERVAL, get_controller
+
+_started = time.monotonic()
+
+
+def start_services(api=True, events=True, api_port=None):
+    """Spustí REST API a stream udalostí na pozadí; ich moduly sa importujú až tu."""
+    if events:
+        from broadcast import EventStreamServer, LogEventHandler, get_broadcaster
+        add_sink(LogEventHandler())
+        EventStreamServer(get_broadcaster()).start()
+    if api:
+        from api import run_api
+        threading.Thread(target=run_api, kwargs={"port": api_port}, name="api", daemon=True).start()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="JadivDevControl bez GUI")
+    parser.add_argument("--headless", action="store_true", help="ignorované, pre spustenie cez main.py")
+    parser.add_argument("--no-api", action="store_true", help="nespúšťať REST API")
+    parser.add_argument("--no-events", action="store_true", help="nespúšťať stream udalostí (SSE)")
+    parser.add_argument("--api-port", type=int, default=None, help="port API (predvolene api_port z config.json)")
+    parser.add_argument("--update-interval", type=float, default=UPDATE_INTERVAL,
+                        help="interval kontroly OTA v sekundách, 0 = vypnuté")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    controller = get_controller().start(update_interval=args.update_interval or None)
+    start_services(api=not args.no_api, events=not args.no_events, api_port=args.api_port)
+    log_message(f"JadivDevControl beží bez GUI ({len(get_registry().config.devices)} zariadení), "
+                f"štart za {time.monotonic() - _started:.2f} s")
+    stop.wait()
+    log_message("JadivDevControl sa ukončuje.")
+    controller.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Trvalá história akcií v SQLite s indexmi podľa času, zariadenia a typu akcie.
+
+Každý dokončený job sa zapíše ako jeden alebo viac riadkov (napr. zlúčené
+prepnutie troch zásuviek = tri riadky). Zápis beží v samostatnom vlákne
+po dávkach, takže executor na disk nečaká.
+"""
+import logging
+import queue
+import sqlite3
+import threading
+
+from jobs import get_executor
+
+log = logging.getLogger("jadiv.history")
+
+HISTORY_FILE = "history.sqlite3"
+BATCH_SIZE = 100
+QUERY_LIMIT = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    action TEXT NOT NULL,
+    device TEXT NOT NULL,
+    value TEXT,
+    result TEXT NOT NULL,
+    duration REAL,
+    detail TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_actions_ts ON actions (ts);
+CREATE INDEX IF NOT EXISTS ix_actions_device_ts ON actions (device, ts);
+CREATE INDEX IF NOT EXISTS ix_actions_action_ts ON actions (action, ts);
+"""
+
+
+def job_rows(job, source=None):
+    """Rozloží job na riadky histórie podľa mena jobu.
+
+    Mená jobov: "zasuvka 1 on 2 off", "wol <mac> [<mac>...]", "strecha", iné
+    ako "<akcia> <cieľ>".
+    """
+    words = job.name.split()
+    if not words:
+        return []
+    kind, rest = words[0], words[1:]
+    ts = job.started or job.created
+    detail = job.error_text if not job.ok else None
+    outcome = (job.status, job.duration, detail, source)
+    if kind == "zasuvka" and len(rest) >= 2:
+        return [(ts, kind, f"zasuvka {slot}", state) + outcome for slot, state in zip(rest[::2], rest[1::2])]
+    if kind == "wol" and rest:
+        return [(ts, kind, mac.lower(), None) + outcome for mac in rest]
+    return [(ts, kind, " ".join(rest) or kind, None) + outcome]
+
+
+class ActionHistory:
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._local = threading.local()
+        self._writer = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._unwritten = 0
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _reader(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+            db.row_factory = sqlite3.Row
+        return db
+
+    def record(self, ts, action, device, result, value=None, duration=None, detail=None, source=None):
+        self._enqueue([(ts, action, device, value, result, duration, detail, source)])
+
+    def record_job(self, job, source=None):
+        self._enqueue(job_rows(job, source))
+
+    def _enqueue(self, rows):
+        if not rows:
+            return
+        with self._lock:
+            self._unwritten += 1
+            self._queue.put(rows)
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="history", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = list(self._queue.get())
+            taken = 1
+            # Čo sa medzitým nazbieralo, zapíšeme v jednej transakcii.
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.extend(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                taken += 1
+            try:
+                with db:
+                    db.executemany("INSERT INTO actions (ts, action, device, value, result, duration, detail, source) "
+                                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            except sqlite3.Error:
+                log.exception("Zápis do histórie akcií zlyhal")
+            with self._idle:
+                self._unwritten -= taken
+                self._idle.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Počká, kým writer zapíše všetko z fronty."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unwritten == 0, timeout)
+
+    def query(self, start=None, end=None, device=None, action=None, value=None, result=None, limit=QUERY_LIMIT):
+        """Akcie v časovom rozsahu (unix čas), od najnovšej; filtre sú presné zhody."""
+        where, params = [], []
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("ts < ?")
+            params.append(end)
+        if device:
+            where.append("device = ?")
+            params.append(device)
+        if action:
+            where.append("action = ?")
+            params.append(action)
+        if value:
+            where.append("value = ?")
+            params.append(value)
+        if result:
+            where.append("result = ?")
+            params.append(result)
+        sql = "SELECT ts, action, device, value, result, duration, detail, source FROM actions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        params.append(int(limit))
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    def devices(self):
+        return [row[0] for row in self._reader().execute("SELECT DISTINCT device FROM actions ORDER BY device")]
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history():
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = ActionHistory()
+        return _history
+
+
+def flush_history(timeout=5.0):
+    """Dopíše čakajúce riadky, ak sa história v tomto procese používa."""
+    if _history is not None:
+        _history.flush(timeout)
+
+
+_recording = set()
+
+
+def start_recording(executor=None, source=None):
+    """Zapisuje každý dokončený job zdieľaného executora do histórie (raz na executor)."""
+    history = get_history()
+    executor = executor or get_executor()
+    if id(executor) in _recording:
+        return history
+    _recording.add(id(executor))
+
+    def on_job(event, job):
+        if event == "finished":
+            history.record_job(job, source)
+
+    executor.add_listener(on_job)
+    return history
@@ -0,0 +1,221 @@
+"""Spúšťanie príkazov zariadení mimo GUI vlákna.
+
+Všetky príkazy (sispmctl, wakeonlan, strecha) idú cez jeden ohraničený
+JobExecutor. Každé volanie vráti Job so stavom, výstupom a návratovým kódom.
+Joby, ktoré len riadia a čakajú na iné joby (skript, sekvencia), bežia vo
+vlastnom vlákne mimo poolu, aby nezabrali pracovníkov svojim krokom.
+"""
+import itertools
+import logging
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+log = logging.getLogger("jadiv.jobs")
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_WORKERS = 4
+MAX_PENDING = 32
+COMMAND_TIMEOUT = 120
+HISTORY_SIZE = 200
+
+
+class ExecutorFull(RuntimeError):
+    """Front príkazov je plný, nový príkaz sa neprijal."""
+
+
+class Job:
+    """Jeden príkaz odoslaný do executora."""
+
+    def __init__(self, job_id, name, args=None):
+        self.id = job_id
+        self.name = name
+        self.args = args
+        self.status = PENDING
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.error = None
+        self.value = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def ok(self):
+        return self.status == DONE
+
+    @property
+    def error_text(self):
+        """Čitateľný dôvod zlyhania (stderr príkazu alebo výnimka)."""
+        return (self.stderr or "").strip() or self.error or ""
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def wait(self, timeout=None):
+        """Počká na dokončenie a vráti samotný job."""
+        if self.future is not None:
+            try:
+                self.future.result(timeout)
+            except Exception:
+                pass
+        return self
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "returncode": self.returncode,
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "error": self.error,
+            "created": self.created,
+            "duration": self.duration,
+        }
+
+
+def run_process(args, cwd=None, timeout=COMMAND_TIMEOUT):
+    """Spustí externý príkaz bez shellu a zachytí jeho výstup."""
+    return subprocess.run(args, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+
+
+class JobExecutor:
+    """Ohraničený pool vlákien pre príkazy zariadení."""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING, runner=run_process):
+        self.runner = runner
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._listeners = []
+        self._pending = 0
+
+    @property
+    def queue_depth(self):
+        """Počet prijatých, ešte nedokončených jobov."""
+        return self._pending
+
+    def add_listener(self, callback):
+        """callback(event, job) sa volá pri "started" a "finished" z pracovného vlákna."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, job):
+        for callback in list(self._listeners):
+            try:
+                callback(event, job)
+            except Exception:
+                log.exception(f"Chyba v listeneri jobu {job.id}")
+
+    def submit(self, name, func, *args, **kwargs):
+        """Odošle ľubovoľnú funkciu; CompletedProcess z nej sa rozbalí do jobu.
+
+        dedicated=True spustí job vo vlastnom vlákne mimo MAX_WORKERS (pre joby,
+        ktoré čakajú na iné joby); do max_pending sa počíta aj tak.
+        """
+        dedicated = kwargs.pop("dedicated", False)
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorFull(f"Príliš veľa čakajúcich príkazov, '{name}' sa neprijal.")
+        job = Job(f"{next(self._ids)}", name, kwargs.pop("job_args", None))
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > HISTORY_SIZE:
+                self._jobs.popitem(last=False)
+            self._pending += 1
+        try:
+            if dedicated:
+                job.future = self._start_thread(job, func, args, kwargs)
+            else:
+                job.future = self._pool.submit(self._run, job, func, args, kwargs)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+        return job
+
+    def _start_thread(self, job, func, args, kwargs):
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            future.set_result(self._run(job, func, args, kwargs))
+        threading.Thread(target=run, name=f"job-{job.id}", daemon=True).start()
+        return future
+
+    def run_command(self, name, args, cwd=None, timeout=COMMAND_TIMEOUT):
+        """Spustí externý príkaz (zoznam argumentov) v poole."""
+        return self.submit(name, self.runner, list(args), cwd=cwd, timeout=timeout, job_args=list(args))
+
+    def _run(self, job, func, args, kwargs):
+        job.status = RUNNING
+        job.started = time.time()
+        self._notify("started", job)
+        try:
+            value = func(*args, **kwargs)
+            job.value = value
+            if isinstance(value, subprocess.CompletedProcess):
+                job.returncode = value.returncode
+                job.stdout = value.stdout or ""
+                job.stderr = value.stderr or ""
+                job.status = DONE if value.returncode == 0 else FAILED
+                if value.returncode != 0:
+                    job.error = f"Príkaz skončil s kódom {value.returncode}"
+            else:
+                job.status = DONE
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e) or e.__class__.__name__
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            self._notify("finished", job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(str(job_id))
+
+    def jobs(self):
+        """Posledné joby, od najstaršieho."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Zdieľaný executor pre celý proces (GUI aj REST API)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor()
+        return _executor
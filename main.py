@@ -1,46 +1,69 @@
 import sys
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Bez GUI: PyQt5 sa vôbec nenačíta (démon pre Raspberry Pi).
+    from headless import main
+    sys.exit(main())
 import os
-import subprocess
-import requests
-from datetime import datetime
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QTextEdit, QHBoxLayout, QLineEdit
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QListWidget, QPlainTextEdit, QHBoxLayout, QLineEdit, QAbstractItemView
+from jobs import ExecutorFull, get_executor
+from qt_jobs import JobSignals, SlotStateSignals, HostStatusSignals, ConfigSignals, LogViewFlusher, StallDetector
+from applog import log_message
+from slot_state import get_state_cache, state_text
+from monitor import get_monitor, status_text
+from core import get_controller
+from config import get_config, get_registry
 
 # Program: JadivDevControl for C14, verzia 7.3
 
-def log_message(log_widget, message):
-    """Zapisuje správy do log widgetu a konzoly."""
-    timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
-    log_widget.append(f"{timestamp} {message}")
-    print(f"{timestamp} {message}")
-
 class ControlApp(QWidget):
     def __init__(self, devices):
         super().__init__()
         self.devices = devices
+        self.jobs = JobSignals(get_executor(), self)
+        self.slot_states = SlotStateSignals(get_state_cache(), self)
+        self.host_states = HostStatusSignals(get_monitor(self.devices), self)
+        self.config_signals = ConfigSignals(get_registry(), self)
+        self.stall = StallDetector(parent=self)
         self.init_ui()
+        self.slot_states.slot_changed.connect(self.zobraz_stav_zasuvky)
+        self.host_states.host_changed.connect(self.zobraz_dostupnost)
+        self.config_signals.config_changed.connect(self.zmen_konfiguraciu)
+        get_controller().start()
 
     def init_ui(self):
         layout = QVBoxLayout()
         self.intro_label = QLabel("JadivDevControl for C14, verzia 7.3")
         layout.addWidget(self.intro_label)
 
-        self.log_widget = QTextEdit()
+        self.log_widget = QPlainTextEdit()
         self.log_widget.setReadOnly(True)
+        self.log_view = LogViewFlusher(self.log_widget, parent=self)
         layout.addWidget(self.log_widget)
 
         self.init_wol_ui(layout)
         self.init_zasuvky_ui(layout)
         self.init_strecha_ui(layout)
+        self.init_sekvencie_ui(layout)
 
         self.setLayout(layout)
         self.setWindowTitle("JadivDevControl for C14, verzia 7.3")
         self.resize(800, 600)
 
+    def run_core(self, action, *args, on_done=None):
+        """Zavolá akciu jadra (Controller); on_done(job) príde cez Qt signál v GUI vlákne."""
+        try:
+            job = action(*args)
+        except (ExecutorFull, ValueError) as e:
+            log_message(str(e))
+            return None
+        return self.jobs.track(job, on_done)
+
     def init_wol_ui(self, layout):
         """Inicializácia sekcie Wake-on-LAN."""
         self.list_widget = QListWidget()
+        self.list_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
         for device in self.devices:
-            self.list_widget.addItem(f"{device['name']} - {device['mac']} - {device['ip']}")
+            self.list_widget.addItem(self.device_item_text(device))
         layout.addWidget(self.list_widget)
 
         self.mac_input = QLineEdit()
@@ -51,34 +74,59 @@ class ControlApp(QWidget):
         self.btn_wake.clicked.connect(self.wake_device)
         layout.addWidget(self.btn_wake)
 
+        self.btn_wake_all = QPushButton("Wake všetky")
+        self.btn_wake_all.clicked.connect(self.wake_all)
+        layout.addWidget(self.btn_wake_all)
+
+    def device_item_text(self, device):
+        stav = status_text(get_monitor().status(device['ip']))
+        return f"[{stav}] {device['name']} - {device['mac']} - {device['ip']}"
+
+    def zobraz_dostupnost(self, ip, status):
+        """Aktualizácia riadku v zozname WOL podľa monitora dostupnosti."""
+        for row, device in enumerate(self.devices):
+            if device['ip'] == ip:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
     def wake_device(self):
-        """Odoslanie WOL signálu."""
-        selected = self.list_widget.currentRow()
+        """Odoslanie WOL signálu pre vybrané zariadenia alebo zadanú MAC adresu."""
+        rows = sorted(index.row() for index in self.list_widget.selectedIndexes())
+        macs = [self.devices[row]['mac'] for row in rows]
         mac_address = self.mac_input.text().strip()
-        if selected >= 0:
-            device = self.devices[selected]
-            mac_address = device['mac']
-        if mac_address:
-            try:
-                subprocess.run(f"wakeonlan {mac_address}", shell=True, check=True)
-                log_message(self.log_widget, f"Odoslaný WOL pre {mac_address}")
-            except subprocess.CalledProcessError as e:
-                log_message(self.log_widget, f"Chyba pri WOL: {e}")
+        if not macs and mac_address:
+            macs = [mac_address]
+        if macs:
+            self.wake_group(macs)
         else:
-            log_message(self.log_widget, "Nezadaná MAC adresa!")
+            log_message("Nezadaná MAC adresa!")
+
+    def wake_all(self):
+        """Zobudenie všetkých zariadení zo zoznamu jedným volaním."""
+        self.wake_group([device['mac'] for device in self.devices])
+
+    def wake_group(self, macs):
+        """Odoslanie WOL paketov pre skupinu MAC adries cez zdieľaný socket."""
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Odoslaný WOL pre {', '.join(macs)}")
+            else:
+                log_message(f"Chyba pri WOL: {job.error_text}")
+        self.run_core(get_controller().wake, macs, on_done=hotovo)
 
     def init_zasuvky_ui(self, layout):
         """Inicializácia sekcie zásuviek."""
-        slot_names = {1: "none(1)", 2: "AZ2000(2)", 3: "C14(3)", 4: "UNKNOWN(4)"}
+        slot_names = get_config().slots
         self.slot_labels = {}
+        self.slot_buttons = {}
 
-        for slot in range(1, 5):
+        for slot in slot_names:
             zasuvka_layout = QHBoxLayout()
-            stav_label = QLabel("OFF")
+            stav_label = QLabel(state_text(get_state_cache().get(slot)))
             self.slot_labels[slot] = stav_label
 
             btn_on = QPushButton(f"Zapnúť {slot_names[slot]}")
             btn_off = QPushButton(f"Vypnúť {slot_names[slot]}")
+            self.slot_buttons[slot] = (btn_on, btn_off)
 
             btn_on.clicked.connect(lambda checked, s=slot: self.zapni_zasuvku(s))
             btn_off.clicked.connect(lambda checked, s=slot: self.vypni_zasuvku(s))
@@ -88,25 +136,66 @@ class ControlApp(QWidget):
             zasuvka_layout.addWidget(btn_off)
             layout.addLayout(zasuvka_layout)
 
+        vsetky_layout = QHBoxLayout()
+        btn_all_on = QPushButton("Zapnúť všetky")
+        btn_all_off = QPushButton("Vypnúť všetky")
+        btn_all_on.clicked.connect(lambda: self.nastav_zasuvky({s: True for s in self.slot_buttons}))
+        btn_all_off.clicked.connect(lambda: self.nastav_zasuvky({s: False for s in self.slot_buttons}))
+        vsetky_layout.addWidget(btn_all_on)
+        vsetky_layout.addWidget(btn_all_off)
+        layout.addLayout(vsetky_layout)
+
+    def zobraz_stav_zasuvky(self, slot, on):
+        """Štítky zásuviek sa menia len podľa cache stavu lišty."""
+        if slot in self.slot_labels:
+            self.slot_labels[slot].setText(state_text(on))
+
+    def zmen_konfiguraciu(self, config, changed):
+        """Po zmene config.json sa prekreslia len dotknuté časti okna."""
+        if "devices" in changed:
+            self.zmen_zariadenia(config.devices)
+        if "slots" in changed:
+            self.zmen_nazvy_zasuviek(config.slots)
+        if "sequences" in changed:
+            self.napln_sekvencie()
+
+    def zmen_zariadenia(self, devices):
+        old, self.devices = self.devices, list(devices)
+        if len(old) != len(self.devices):
+            self.list_widget.clear()
+            for device in self.devices:
+                self.list_widget.addItem(self.device_item_text(device))
+            return
+        for row, (pred, device) in enumerate(zip(old, self.devices)):
+            if pred != device:
+                self.list_widget.item(row).setText(self.device_item_text(device))
+
+    def zmen_nazvy_zasuviek(self, slots):
+        for slot, (btn_on, btn_off) in self.slot_buttons.items():
+            name = slots.get(slot, str(slot))
+            if btn_on.text() != f"Zapnúť {name}":
+                btn_on.setText(f"Zapnúť {name}")
+                btn_off.setText(f"Vypnúť {name}")
+        if set(slots) != set(self.slot_buttons):
+            log_message("Pridanie alebo odobratie zásuvky sa prejaví po reštarte programu.")
+
     def zapni_zasuvku(self, slot):
         """Zapnutie zásuvky cez syspmctl."""
-        try:
-            command = f"sispmctl -o {slot}"
-            subprocess.run(command, shell=True, check=True)
-            self.slot_labels[slot].setText("ON")
-            log_message(self.log_widget, f"Zásuvka {slot} zapnutá. Príkaz: {command}")
-        except subprocess.CalledProcessError as e:
-            log_message(self.log_widget, f"Chyba pri zapínaní zásuvky {slot}: {e}")
+        self.nastav_zasuvky({slot: True})
 
     def vypni_zasuvku(self, slot):
         """Vypnutie zásuvky cez syspmctl."""
-        try:
-            command = f"sispmctl -f {slot}"
-            subprocess.run(command, shell=True, check=True)
-            self.slot_labels[slot].setText("OFF")
-            log_message(self.log_widget, f"Zásuvka {slot} vypnutá. Príkaz: {command}")
-        except subprocess.CalledProcessError as e:
-            log_message(self.log_widget, f"Chyba pri vypínaní zásuvky {slot}: {e}")
+        self.nastav_zasuvky({slot: False})
+
+    def nastav_zasuvky(self, states):
+        """Prepnutie zásuviek {slot: zapnúť}; súbežné požiadavky sa zlúčia do jedného volania sispmctl."""
+        def hotovo(job):
+            for slot, on in states.items():
+                if job.ok:
+                    log_message(f"Zásuvka {slot} {'zapnutá' if on else 'vypnutá'}. Príkaz: {' '.join(job.value.args)}")
+                else:
+                    log_message(f"Chyba pri {'zapínaní' if on else 'vypínaní'} zásuvky {slot}: {job.error_text}")
+        self.run_core(get_controller().set_slots, states, on_done=hotovo)
 
     def init_strecha_ui(self, layout):
         """Inicializácia sekcie strechy."""
@@ -115,23 +204,40 @@ class ControlApp(QWidget):
         layout.addWidget(btn_strecha_on)
 
     def run_strecha_on(self):
-        """Ovládanie strechy cez shell skript."""
-        try:
-            command = "cd /home/dpv/Downloads/usb-relay-hid-master/commandline/makemake && ./strecha_on.sh"
-            subprocess.run(command, shell=True, check=True)
-            log_message(self.log_widget, "Strecha pohybovaná.")
-        except subprocess.CalledProcessError as e:
-            log_message(self.log_widget, f"Chyba pri pohybe strechy: {e}")
+        """Ručný impulz strechy cez Controller.roof (HID relé, bez relé strecha_on.sh)."""
+        def hotovo(job):
+            if job.ok:
+                log_message("Strecha pohybovaná.")
+            else:
+                log_message(f"Chyba pri pohybe strechy: {job.error_text}")
+        self.run_core(get_controller().roof, on_done=hotovo)
+
+    def init_sekvencie_ui(self, layout):
+        """Tlačidlá sekvencií (otvorenie/zatvorenie observatória)."""
+        self.sekvencie_layout = QHBoxLayout()
+        layout.addLayout(self.sekvencie_layout)
+        self.napln_sekvencie()
+
+    def napln_sekvencie(self):
+        while self.sekvencie_layout.count():
+            self.sekvencie_layout.takeAt(0).widget().deleteLater()
+        for name in get_config().sequences:
+            btn = QPushButton(f"Sekvencia: {name}")
+            btn.clicked.connect(lambda checked, n=name: self.spusti_sekvenciu(n))
+            self.sekvencie_layout.addWidget(btn)
+
+    def spusti_sekvenciu(self, name):
+        """Sekvencia z config.json; kroky bežia podľa závislostí, nezávislé vetvy súbežne."""
+        def hotovo(job):
+            if job.ok:
+                log_message(f"Sekvencia {name} hotová za {job.duration:.0f} s.")
+            else:
+                log_message(f"Sekvencia {name} zlyhala: {job.error_text}")
+        self.run_core(get_controller().run_sequence, name, on_done=hotovo)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    devices = [
-        {'name': 'hlavny', 'mac': 'e0:d5:5e:df:c6:4e', 'ip': '172.20.20.133'},
-        {'name': 'VNT', 'mac': '78:24:af:9c:06:e7', 'ip': '172.20.20.123'},
-        {'name': 'C14', 'mac': 'e0:d5:5e:37:4f:ad', 'ip': '172.20.20.103'},
-        {'name': 'AZ2000 mount', 'mac': '00:c0:08:a9:c2:32', 'ip': '172.20.20.10'},
-        {'name': 'GM3000 mount', 'mac': '00:c0:08:aa:35:12', 'ip': '172.20.20.12'}
-    ]
+    devices = list(get_registry().start().config.devices)
     window = ControlApp(devices)
     window.show()
     sys.exit(app.exec_())
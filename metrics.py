@@ -0,0 +1,384 @@
+"""Metriky akcií zariadení a profilovanie na požiadanie.
+
+Histogramy trvania a čakania jobov podľa akcie (zasuvka, wol, strecha, ...),
+počty úspechov/chýb, hĺbka frontu executora, oneskorenie GUI vlákna a trvanie
+OTA kontrol. Export je v textovom formáte Prometheus (GET /metrics) a
+súhrn s odhadom percentilov pre panel v 7.4.
+
+Profiler zbiera horúce miesta buď vzorkovaním zásobníkov všetkých vlákien
+(režim "sample", malá réžia), alebo cProfile vo vlákne, ktoré ho spustilo
+(režim "cprofile", napr. GUI vlákno).
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter as Tally
+
+log = logging.getLogger("jadiv.metrics")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SAMPLE_INTERVAL = 0.01
+PROFILE_DIR = "profiles"
+PROFILE_TOP = 30
+# Vlákna čakajúce na prácu (pool, poller, server) by zahltili vzorky.
+IDLE_FUNCTIONS = frozenset(["wait", "_worker", "_wait_for_tstate_lock", "select", "accept", "handler_thread"])
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(Metric):
+    """Hodnota nastavená cez set() alebo čítaná pri exporte z funkcie `source`."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), source=None):
+        super().__init__(name, help_text, labelnames)
+        self.source = source
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        if self.source is not None:
+            return self.source()
+        return self._values.get(self._key(labels))
+
+    def render(self):
+        if self.source is not None:
+            try:
+                return self.header() + [f"{self.name} {self.source()}"]
+            except Exception as e:
+                log.warning(f"Metrika {self.name}: {e}")
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            counts = state[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            state[1] += value
+            state[2] += 1
+            state[3] = max(state[3], value)
+
+    def summary(self, **labels):
+        """count, sum, max a percentily odhadnuté lineárne v rámci vedierka."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return None
+            counts, total, count, peak = list(state[0]), state[1], state[2], state[3]
+        result = {"count": count, "sum": total, "max": peak}
+        for q in (0.5, 0.95, 0.99):
+            rank = q * count
+            seen = 0
+            for index, n in enumerate(counts):
+                if n and seen + n >= rank:
+                    low = self.buckets[index - 1] if index > 0 else 0.0
+                    high = self.buckets[index] if index < len(self.buckets) else peak
+                    result[f"p{int(q * 100)}"] = min(low + (high - low) * (rank - seen) / n, peak)
+                    break
+                seen += n
+        return result
+
+    def label_sets(self):
+        with self._lock:
+            return [dict(zip(self.labelnames, key)) for key in sorted(self._values)]
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            items = sorted((key, [list(state[0]), state[1], state[2]]) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Metrics:
+    """Register metrík; rovnaké meno vráti existujúcu metriku."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=(), source=None):
+        return self._get(Gauge, name, help_text, labelnames, source)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        return self._get(Histogram, name, help_text, labelnames, buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Textový formát Prometheus (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def action_label(job_name):
+    """Akcia bez argumentov: "zasuvka 2 on" -> zasuvka, OTA akcie ostávajú celé."""
+    first = job_name.split()[0] if job_name else "?"
+    return job_name if first == "ota" else first
+
+
+class timed:
+    """Meria jedno volanie zariadenia (sispmctl, wakeonlan, relé, OTA); výnimka alebo ok=False je chyba.
+
+        with timed("sispmctl") as call:
+            result = runner(args)
+            call.ok = result.returncode == 0
+    """
+
+    def __init__(self, command, metrics=None):
+        self.command = command
+        self.metrics = metrics or get_metrics()
+        self.ok = True
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        self.metrics.histogram("jadiv_command_duration_seconds", "Trvanie volania zariadenia",
+                               ("command",)).observe(self.seconds, command=self.command)
+        if exc_type is not None or not self.ok:
+            self.metrics.counter("jadiv_command_errors_total", "Zlyhané volania zariadenia",
+                                 ("command",)).inc(command=self.command)
+        return False
+
+
+_instrumented = set()
+
+
+def instrument_executor(executor, metrics=None):
+    """Histogramy trvania/čakania a počty výsledkov pre každý job executora (raz na executor)."""
+    metrics = metrics or get_metrics()
+    if id(executor) in _instrumented:
+        return
+    _instrumented.add(id(executor))
+    duration = metrics.histogram("jadiv_action_duration_seconds", "Trvanie akcie zariadenia", ("action",))
+    queued = metrics.histogram("jadiv_action_queue_seconds", "Čakanie akcie vo fronte executora", ("action",))
+    results = metrics.counter("jadiv_actions_total", "Dokončené akcie podľa výsledku", ("action", "result"))
+    metrics.gauge("jadiv_executor_queue_depth", "Prijaté, ešte nedokončené joby", source=lambda: executor.queue_depth)
+
+    def on_job(event, job):
+        action = action_label(job.name)
+        if event == "started":
+            queued.observe(job.started - job.created, action=action)
+        elif job.duration is not None:
+            duration.observe(job.duration, action=action)
+            results.inc(action=action, result="ok" if job.ok else "error")
+
+    executor.add_listener(on_job)
+
+
+def action_summary(metrics=None):
+    """Súhrn pre GUI: {akcia: {count, errors, p50, p95, max, ...}}."""
+    metrics = metrics or get_metrics()
+    duration = metrics.get("jadiv_action_duration_seconds")
+    results = metrics.get("jadiv_actions_total")
+    summary = {}
+    if duration is None:
+        return summary
+    for labels in duration.label_sets():
+        row = duration.summary(**labels) or {}
+        row["errors"] = results.value(action=labels["action"], result="error") if results else 0
+        summary[labels["action"]] = row
+    return summary
+
+
+class Profiler:
+    """Profilovanie na požiadanie; stop() zapíše správu do PROFILE_DIR a vráti jej cestu."""
+
+    def __init__(self, directory=PROFILE_DIR, interval=SAMPLE_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.mode = None
+        self.started = None
+        self._profile = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._self = Tally()
+        self._total = Tally()
+        self._samples = 0
+
+    @property
+    def running(self):
+        return self.mode is not None
+
+    def start(self, mode="sample"):
+        if self.running:
+            raise ValueError("Profilovanie už beží")
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Neznámy režim profilovania: {mode}")
+        self.mode = mode
+        self.started = time.time()
+        if mode == "cprofile":
+            # cProfile a pstats sa načítajú až pri profilovaní, nie pri štarte GUI.
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._self.clear()
+            self._total.clear()
+            self._samples = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+            self._thread.start()
+        log.info(f"Profilovanie spustené ({mode})")
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if code.co_name in IDLE_FUNCTIONS:
+                    continue
+                thread = names.get(ident, str(ident))
+                self._self[f"{thread}: {code.co_filename}:{frame.f_lineno} {code.co_name}"] += 1
+                seen = set()
+                while frame is not None:
+                    code = frame.f_code
+                    key = f"{os.path.basename(code.co_filename)}:{code.co_firstlineno} {code.co_name}"
+                    if key not in seen:
+                        self._total[key] += 1
+                        seen.add(key)
+                    frame = frame.f_back
+            self._samples += 1
+
+    def stop(self):
+        if not self.running:
+            raise ValueError("Profilovanie nebeží")
+        mode, self.mode = self.mode, None
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"profile-{stamp}-{mode}.txt")
+        if mode == "cprofile":
+            self._profile.disable()
+            self._profile.dump_stats(path[:-4] + ".prof")
+            import io
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            report = out.getvalue()
+            self._profile = None
+        else:
+            self._stop.set()
+            self._thread.join()
+            duration = time.time() - self.started
+            lines = [f"{self._samples} vzoriek za {duration:.1f} s (interval {self.interval * 1000:.0f} ms)", "",
+                     "Najčastejšie vykonávané riadky (vlákno: miesto, bez nečinných vlákien):"]
+            lines += [f"{count:6d}  {key}" for key, count in self._self.most_common(PROFILE_TOP)]
+            lines += ["", "Funkcie na zásobníku (kumulatívne):"]
+            lines += [f"{count:6d}  {key}" for key, count in self._total.most_common(PROFILE_TOP)]
+            report = "\n".join(lines) + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(report)
+        log.info(f"Profil uložený do {path}")
+        return path
+
+
+_metrics = None
+_profiler = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+def get_profiler():
+    global _profiler
+    with _metrics_lock:
+        if _profiler is None:
+            _profiler = Profiler()
+        return _profiler
@@ -0,0 +1,270 @@
+"""Súbežná kontrola dostupnosti zariadení zo zoznamu `devices`.
+
+Jedno vlákno s asyncio slučkou skúša všetky zariadenia naraz (TCP connect na
+bežné porty, ak nič neodpovie, tak ICMP ping). Výsledky idú do zdieľanej
+tabuľky stavov. Po WOL sa zariadenie kontroluje častejšie, kým nenabehne.
+"""
+import asyncio
+import logging
+import shutil
+import threading
+import time
+
+log = logging.getLogger("jadiv.monitor")
+
+PORTS = (22, 3389, 445, 80, 5900)
+TIMEOUT = 1.0
+INTERVAL = 30.0
+FAST_INTERVAL = 2.0
+FAST_PERIOD = 180.0
+MAX_PROBES = 64
+
+
+class HostStatus:
+    def __init__(self, name, ip):
+        self.name = name
+        self.ip = ip
+        self.up = None
+        self.latency = None
+        self.method = None
+        self.checked = None
+        self.changed = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "ip": self.ip,
+            "up": self.up,
+            "latency": self.latency,
+            "method": self.method,
+            "checked": self.checked,
+            "changed": self.changed,
+        }
+
+
+def status_text(status):
+    """Krátky popis pre zoznam v GUI."""
+    if status is None or status.up is None:
+        return "?"
+    if not status.up:
+        return "DOWN"
+    if status.latency is None:
+        return "UP"
+    return f"UP {status.latency * 1000:.0f} ms"
+
+
+async def tcp_probe(ip, port, timeout):
+    """True ak host odpovie na TCP (aj odmietnutie spojenia znamená, že žije)."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def icmp_probe(ip, timeout):
+    if shutil.which("ping") is None:
+        return False
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-W", str(max(1, int(round(timeout)))), ip,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        return await asyncio.wait_for(proc.wait(), timeout + 1) == 0
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+
+class ReachabilityMonitor:
+    """Asyncio monitor pre desiatky hostov bez vlákna na každý host."""
+
+    def __init__(self, devices, ports=PORTS, timeout=TIMEOUT, interval=INTERVAL,
+                 fast_interval=FAST_INTERVAL, fast_period=FAST_PERIOD, icmp=True):
+        self.ports = tuple(ports)
+        self.timeout = timeout
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.fast_period = fast_period
+        self.icmp = icmp
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._status = {}
+        self._boost_until = {}
+        self._listeners = []
+        self._loop = None
+        self._thread = None
+        self._tasks = {}
+        self._wakeups = {}
+        self._sem = None
+        self.set_devices(devices)
+
+    def add_listener(self, callback):
+        """callback(ip, HostStatus) pri zmene stavu; volá sa z vlákna monitora."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def status(self, ip):
+        with self._lock:
+            return self._status.get(ip)
+
+    def snapshot(self):
+        with self._lock:
+            return {ip: status.to_dict() for ip, status in self._status.items()}
+
+    def set_devices(self, devices):
+        """Nový zoznam zariadení; staré úlohy sa zrušia, nové spustia."""
+        with self._lock:
+            self._devices = {device['ip']: device for device in devices if device.get('ip')}
+            for ip, device in self._devices.items():
+                if ip not in self._status:
+                    self._status[ip] = HostStatus(device.get('name', ip), ip)
+                else:
+                    self._status[ip].name = device.get('name', ip)
+            for ip in list(self._status):
+                if ip not in self._devices:
+                    del self._status[ip]
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._sync_tasks)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="reachability", daemon=True)
+            self._thread.start()
+            ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def boost(self, ips=None, period=None):
+        """Častejšie kontroly po WOL (ips=None znamená všetky zariadenia)."""
+        until = time.monotonic() + (self.fast_period if period is None else period)
+        with self._lock:
+            targets = list(self._devices) if ips is None else [ip for ip in ips if ip in self._devices]
+            for ip in targets:
+                self._boost_until[ip] = until
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake, targets)
+
+    def boost_macs(self, macs):
+        macs = {mac.lower() for mac in macs}
+        with self._lock:
+            ips = [ip for ip, device in self._devices.items() if device.get('mac', '').lower() in macs]
+        self.boost(ips)
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._sem = asyncio.Semaphore(MAX_PROBES)
+        self._sync_tasks()
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            self._loop.close()
+
+    def _sync_tasks(self):
+        with self._lock:
+            wanted = set(self._devices)
+        for ip in list(self._tasks):
+            if ip not in wanted:
+                self._tasks.pop(ip).cancel()
+                self._wakeups.pop(ip, None)
+        for ip in wanted - set(self._tasks):
+            self._wakeups[ip] = asyncio.Event()
+            self._tasks[ip] = self._loop.create_task(self._watch(ip))
+
+    def _wake(self, ips):
+        for ip in ips:
+            event = self._wakeups.get(ip)
+            if event is not None:
+                event.set()
+
+    def next_delay(self, ip):
+        with self._lock:
+            status = self._status.get(ip)
+            boosted = self._boost_until.get(ip, 0) > time.monotonic()
+            if boosted and status is not None and status.up:
+                # Host po zobudení nabehol, vrátime sa k pomalšiemu intervalu.
+                self._boost_until.pop(ip, None)
+                boosted = False
+        return self.fast_interval if boosted else self.interval
+
+    async def probe(self, ip):
+        """Vráti (up, latencia, metóda)."""
+        with self._lock:
+            device = self._devices.get(ip, {})
+        ports = device.get('ports', self.ports)
+        timeout = device.get('timeout', self.timeout)
+        start = time.monotonic()
+        async with self._sem:
+            if ports:
+                probes = [asyncio.ensure_future(tcp_probe(ip, port, timeout)) for port in ports]
+                try:
+                    for done in asyncio.as_completed(probes):
+                        if await done:
+                            return True, time.monotonic() - start, "tcp"
+                finally:
+                    for probe in probes:
+                        probe.cancel()
+            if self.icmp:
+                start = time.monotonic()
+                if await icmp_probe(ip, timeout):
+                    return True, time.monotonic() - start, "icmp"
+        return False, None, None
+
+    async def _watch(self, ip):
+        while True:
+            up, latency, method = await self.probe(ip)
+            self._record(ip, up, latency, method)
+            event = self._wakeups.get(ip)
+            try:
+                await asyncio.wait_for(event.wait(), self.next_delay(ip))
+            except asyncio.TimeoutError:
+                pass
+            event.clear()
+
+    def _record(self, ip, up, latency, method):
+        now = time.time()
+        with self._lock:
+            status = self._status.get(ip)
+            if status is None:
+                return
+            changed = status.up != up
+            status.up = up
+            status.latency = latency
+            status.method = method
+            status.checked = now
+            if changed:
+                status.changed = now
+        # Latencia sa mení stále, listenerov voláme len pri zmene UP/DOWN.
+        if changed:
+            for callback in list(self._listeners):
+                try:
+                    callback(ip, status)
+                except Exception:
+                    log.exception(f"Chyba v listeneri monitora {ip}")
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor(devices=None):
+    """Zdieľaný monitor; pri prvom volaní treba zadať zoznam zariadení."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = ReachabilityMonitor(devices or [])
+        elif devices is not None:
+            _monitor.set_devices(devices)
+        return _monitor
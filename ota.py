@@ -0,0 +1,436 @@
+"""OTA aktualizácie: podmienené kontroly (ETag/Last-Modified) a porovnanie hashov.
+
+Jednotkou aktualizácie je celá sada modulov, nie len main.py: na serveri je
+manifest.json {"files": {"main.py": "<sha256>", "core.py": "<sha256>", ...}}
+s hashom každého súboru (vytvorí ho python3 ota.py manifest *.py) a súbory
+ležia vedľa neho. Nezmenená kontrola stojí jednu odpoveď 304 bez tela. Nová
+verzia sa hlási vtedy, keď sa niektorý súbor z manifestu líši od
+nainštalovaného.
+
+Inštalácia stiahne zmenené súbory po blokoch do dočasného priečinka vedľa
+programu, každý overí voči hashu z manifestu, celú sadu skontroluje
+(kompilácia a import všetkých modulov v samostatnom procese; moduly, ktorým
+tu chýba voliteľná knižnica ako PyQt5, sa preskočia) a až potom súbory
+vymení cez os.replace, main.py ako posledný. Nahradené súbory sa odložia
+a posledných KEEP_VERSIONS sád ostáva na rollback.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from applog import stop_logging
+from history import flush_history
+from jobs import run_process
+from metrics import get_metrics, timed
+from slot_state import get_state_cache
+
+log = logging.getLogger("jadiv.ota")
+
+UPDATE_URL = 'https://github.com/jan-tdy/aplikacia8ejw8idue8wo/raw/main/manifest.json'
+TARGET_PATH = '/home/dpv/j44softapps-socketcontrol/main.py'
+CACHE_FILE = "ota_cache.json"
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 3
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 15
+VERIFY_TIMEOUT = 60
+
+# Knižnice, ktoré na niektorom počítači chýbať smú (PyQt5 na Raspberry Pi bez
+# GUI, Flask pri vypnutom API, numpy, hidapi). Modul, ktorý padne len na nich,
+# sa pri kontrole preskočí; program bez nich beží aj dnes.
+OPTIONAL_DEPENDENCIES = ("PyQt5", "flask", "werkzeug", "waitress", "numpy", "hid")
+
+# Import všetkých modulov kandidáta v samostatnom procese: odhalí chýbajúce
+# moduly a chyby na úrovni modulu bez toho, aby sa spustil blok __main__.
+# Beží v priečinku kandidáta, takže importuje jeho moduly, nie nainštalované.
+IMPORT_CHECK = """
+import importlib, importlib.util, sys
+optional, names = sys.argv[1].split(","), sys.argv[2:]
+for number, name in enumerate(names):
+    module = name[:-3]
+    try:
+        if module.isidentifier():
+            importlib.import_module(module)
+        else:
+            spec = importlib.util.spec_from_file_location(f"ota_candidate_{number}", name)
+            spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    except ModuleNotFoundError as e:
+        if (e.name or "").split(".")[0] not in optional:
+            raise
+        print(f"{name}: preskočený, chýba {e.name}")
+"""
+
+
+class InstallError(RuntimeError):
+    """Stiahnutá verzia neprešla kontrolou, pôvodný program ostal nezmenený."""
+
+
+def file_sha256(path, chunk_size=65536):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_sha256(files):
+    """Hash celej sady {súbor: sha256}; rovnaký pre rovnaké súbory bez ohľadu na poradie."""
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+
+
+def parse_manifest(data):
+    """Z tela manifest.json vráti {súbor: sha256}; neplatný manifest vyhodí InstallError."""
+    try:
+        files = json.loads(data)["files"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InstallError(f"Neplatný manifest: {e}")
+    if not isinstance(files, dict) or not files:
+        raise InstallError("Neplatný manifest: prázdny zoznam súborov")
+    for name, sha in files.items():
+        # Len súbory v priečinku programu, žiadne cesty von.
+        if os.path.basename(name) != name or name.startswith(".") or not isinstance(sha, str) or len(sha) != 64:
+            raise InstallError(f"Neplatný manifest: {name}")
+    return files
+
+
+def build_manifest(paths):
+    return {"files": {os.path.basename(path): file_sha256(path) for path in sorted(paths)}}
+
+
+class UpdateStatus:
+    def __init__(self, available, new, status_code, remote_sha256, local_sha256, not_modified, duration, changed=()):
+        self.available = available
+        self.new = new
+        self.status_code = status_code
+        self.remote_sha256 = remote_sha256
+        self.local_sha256 = local_sha256
+        self.not_modified = not_modified
+        self.duration = duration
+        self.changed = list(changed)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class UpdateChecker:
+    """Kontroluje manifest na jednej URL cez zdieľanú requests.Session s podmienenými GET."""
+
+    def __init__(self, url=UPDATE_URL, target_path=TARGET_PATH, cache_file=CACHE_FILE, session=None, timeout=TIMEOUT):
+        self.url = url
+        self.target_path = target_path
+        self.cache_file = cache_file
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = {}
+        self._reported = None
+        self.cache = self._load_cache()
+
+    @property
+    def directory(self):
+        """Priečinok programu; v ňom ležia všetky súbory z manifestu."""
+        return os.path.dirname(os.path.abspath(self.target_path))
+
+    @property
+    def entry(self):
+        return os.path.basename(self.target_path)
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Cache platí len pre URL, pre ktorú vznikla, a len s manifestom.
+        return cache if cache.get("url") == self.url and cache.get("files") else {}
+
+    def _save_cache(self):
+        tmp = self.cache_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.cache, f, indent=4)
+        os.replace(tmp, self.cache_file)
+
+    def local_file_sha256(self, name):
+        """Hash nainštalovaného súboru (None ak chýba); prepočíta sa len po zmene mtime/veľkosti."""
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._local.get(name)
+        if cached is None or cached[0] != key:
+            cached = self._local[name] = (key, file_sha256(path))
+        return cached[1]
+
+    def local_files(self, names=None):
+        names = names or self.cache.get("files") or [self.entry]
+        return {name: self.local_file_sha256(name) for name in names}
+
+    def local_sha256(self, names=None):
+        """Hash nainštalovanej sady súborov v tvare manifest_sha256."""
+        return manifest_sha256(self.local_files(names))
+
+    def conditional_headers(self):
+        headers = {}
+        if self.cache.get("etag"):
+            headers["If-None-Match"] = self.cache["etag"]
+        if self.cache.get("last_modified"):
+            headers["If-Modified-Since"] = self.cache["last_modified"]
+        return headers
+
+    def check(self):
+        """Vráti UpdateStatus; pri sieťovej chybe vyhodí requests.RequestException, pri zlom manifeste InstallError."""
+        with self._lock, timed("ota_check"):
+            start = time.monotonic()
+            response = self.session.get(self.url, headers=self.conditional_headers(), timeout=self.timeout)
+            try:
+                if response.status_code == 304:
+                    files = self.cache.get("files")
+                elif response.status_code == 200:
+                    files = parse_manifest(response.content)
+                    self.cache.update({
+                        "url": self.url,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "sha256": manifest_sha256(files),
+                        "files": files,
+                        "checked": time.time(),
+                    })
+                    self._save_cache()
+                else:
+                    response.raise_for_status()
+                    raise requests.HTTPError(f"Neočakávaná odpoveď {response.status_code}", response=response)
+            finally:
+                response.close()
+            remote_sha = manifest_sha256(files) if files else None
+            local = self.local_files(files)
+            local_sha = manifest_sha256(local)
+            changed = sorted(name for name, sha in (files or {}).items() if local[name] != sha)
+            available = bool(changed)
+            # "new" je True len pri prvej kontrole, ktorá daný hash uvidí.
+            new = available and remote_sha != self._reported
+            if available:
+                self._reported = remote_sha
+            metrics = get_metrics()
+            metrics.counter("jadiv_ota_checks_total", "Kontroly OTA podľa odpovede servera",
+                            ("result",)).inc(result="not_modified" if response.status_code == 304 else "modified")
+            metrics.gauge("jadiv_ota_last_check_timestamp_seconds", "Čas poslednej úspešnej kontroly OTA").set(time.time())
+            return UpdateStatus(available, new, response.status_code, remote_sha, local_sha,
+                                response.status_code == 304, time.monotonic() - start, changed)
+
+    def versions_dir(self):
+        return os.path.join(self.directory, VERSIONS_DIR)
+
+    def versions(self):
+        """Zálohy predchádzajúcich sád (priečinky), od najnovšej."""
+        directory = self.versions_dir()
+        try:
+            names = [name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name))]
+        except OSError:
+            return []
+        return [os.path.join(directory, name) for name in sorted(names, reverse=True)]
+
+    def file_url(self, name):
+        return self.url.rsplit("/", 1)[0] + "/" + name
+
+    def download(self, name, sha256, directory):
+        """Stiahne jeden súbor do `directory` a počas sťahovania ho overí voči manifestu."""
+        digest = hashlib.sha256()
+        with open(os.path.join(directory, name), "wb") as f:
+            with self.session.get(self.file_url(name), stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        if digest.hexdigest() != sha256:
+            raise InstallError(f"{name}: stiahnutý súbor nesedí s hashom v manifeste")
+
+    def stage(self, files, changed):
+        """Poskladá úplnú sadu do dočasného priečinka vedľa programu; vráti jeho cestu."""
+        staging = tempfile.mkdtemp(prefix=".ota-", dir=self.directory)
+        try:
+            for name, sha in files.items():
+                if name in changed:
+                    self.download(name, sha, staging)
+                else:
+                    shutil.copy2(os.path.join(self.directory, name), os.path.join(staging, name))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return staging
+
+    def verify(self, staging):
+        """Skompiluje a naimportuje všetky moduly kandidáta; pri chybe vyhodí InstallError."""
+        names = sorted(name for name in os.listdir(staging) if name.endswith(".py"))
+        for name in names:
+            path = os.path.join(staging, name)
+            with open(path, "rb") as f:
+                source = f.read()
+            try:
+                compile(source, path, "exec")
+            except (SyntaxError, ValueError) as e:
+                raise InstallError(f"Nová verzia sa nedá skompilovať: {e}")
+        try:
+            result = run_process([sys.executable, "-B", "-c", IMPORT_CHECK, ",".join(OPTIONAL_DEPENDENCIES)] + names,
+                                 cwd=staging, timeout=VERIFY_TIMEOUT)
+        except Exception as e:
+            raise InstallError(f"Import novej verzie zlyhal: {e}")
+        if result.returncode != 0:
+            lines = (result.stderr or "").strip().splitlines()
+            raise InstallError(f"Import novej verzie zlyhal: {lines[-1] if lines else result.returncode}")
+        for line in (result.stdout or "").splitlines():
+            log.info(f"Kontrola novej verzie: {line}")
+
+    def backup(self, names):
+        """Odloží nainštalované súbory sady do VERSIONS_DIR a nechá len KEEP_VERSIONS najnovších sád."""
+        names = [name for name in names if os.path.exists(os.path.join(self.directory, name))]
+        if not names:
+            return None
+        sha = self.local_sha256(names)
+        path = os.path.join(self.versions_dir(), f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{sha[:8]}")
+        os.makedirs(path)
+        for name in names:
+            shutil.copy2(os.path.join(self.directory, name), os.path.join(path, name))
+        for old in self.versions()[KEEP_VERSIONS:]:
+            shutil.rmtree(old, ignore_errors=True)
+        return path
+
+    def _swap_in(self, source_dir, names, keep_source):
+        """Vymení súbory sady za súbory zo `source_dir`; vstupný súbor ako posledný."""
+        for name in sorted(names, key=lambda name: (name == self.entry, name)):
+            target = os.path.join(self.directory, name)
+            mode = os.stat(target).st_mode & 0o777 if os.path.exists(target) else 0o644
+            if keep_source:
+                fd, tmp = tempfile.mkstemp(prefix=f".{name}-", dir=self.directory)
+                os.close(fd)
+                shutil.copyfile(os.path.join(source_dir, name), tmp)
+            else:
+                tmp = os.path.join(source_dir, name)
+            os.chmod(tmp, mode)
+            os.replace(tmp, target)
+
+    def install(self):
+        """Stiahne, overí a nainštaluje novú sadu; vráti True ak sa niečo zmenilo."""
+        status = self.check()
+        if not status.available:
+            return False
+        start = time.monotonic()
+        staging = self.stage(self.cache["files"], status.changed)
+        try:
+            self.verify(staging)
+            backup = self.backup(self.cache["files"])
+            try:
+                self._swap_in(staging, status.changed, keep_source=False)
+            except OSError:
+                # Polovičná výmena by nechala moduly z dvoch verzií; vrátime zálohu.
+                if backup is not None:
+                    self._swap_in(backup, os.listdir(backup), keep_source=True)
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        log.info(f"Nová verzia {status.remote_sha256[:8]} nainštalovaná "
+                 f"({', '.join(status.changed)}) za {time.monotonic() - start:.2f} s")
+        return True
+
+    def rollback(self, version=None):
+        """Vráti zálohovanú sadu (predvolene najnovšiu zálohu); vráti jej cestu."""
+        versions = self.versions()
+        if version is None:
+            if not versions:
+                raise InstallError("Nie je uložená žiadna predchádzajúca verzia.")
+            version = versions[0]
+        self._swap_in(version, os.listdir(version), keep_source=True)
+        return version
+
+
+_checker = None
+_checker_lock = threading.Lock()
+
+
+def get_checker():
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = UpdateChecker()
+        return _checker
+
+
+def check_for_updates(checker=None):
+    """Periodická kontrola; novú verziu zaloguje len raz pre každý nový hash."""
+    checker = checker or get_checker()
+    try:
+        status = checker.check()
+    except (requests.RequestException, InstallError) as e:
+        log.warning(f"Chyba pri kontrole aktualizácie: {e}")
+        return None
+    if status.new:
+        log.info("Nová verzia aplikácie je dostupná na Githube!")
+    return status
+
+
+def restart(target_path=TARGET_PATH, argv=None):
+    """Nahradí bežiaci proces nainštalovanou verziou; stav zásuviek prežije v súbore."""
+    get_state_cache().save()
+    flush_history()
+    log.info("Reštartujem aplikáciu...")
+    stop_logging()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    argv = sys.argv[1:] if argv is None else argv
+    os.execv(sys.executable, [sys.executable, target_path] + list(argv))
+
+
+def manual_update(checker=None, restart_after=True):
+    checker = checker or get_checker()
+    try:
+        if not checker.install():
+            log.info("Aplikácia je aktuálna, nie je čo sťahovať.")
+            return False
+    except InstallError as e:
+        log.warning(f"{e} Ostáva pôvodná verzia.")
+        return False
+    except (requests.RequestException, OSError) as e:
+        log.warning(f"Chyba pri sťahovaní aktualizácie: {e}")
+        return False
+    if restart_after:
+        restart(checker.target_path)
+    return True
+
+
+def rollback_update(checker=None, restart_after=True):
+    checker = checker or get_checker()
+    try:
+        version = checker.rollback()
+    except (InstallError, OSError) as e:
+        log.warning(f"Rollback zlyhal: {e}")
+        return False
+    log.info(f"Vrátená verzia {os.path.basename(version)}")
+    if restart_after:
+        restart(checker.target_path)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manifest OTA aktualizácie JadivDevControl")
+    parser.add_argument("command", choices=["manifest"])
+    parser.add_argument("files", nargs="+", help="všetky moduly programu (napr. *.py)")
+    args = parser.parse_args(argv)
+    print(json.dumps(build_manifest(args.files), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Jednoduchý graf časového radu pre PyQt5 bez ďalších knižníc (QPainter).
+
+Kreslí priemer ako čiaru a pásmo minimum-maximum z agregovaných vrstiev
+telemetrie; medzery (NaN) čiaru prerušia. Súradnice sa prepočítajú v numpy,
+takže prekreslenie tisícky bodov trvá zlomok milisekundy.
+"""
+from datetime import datetime
+
+import numpy as np
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+MARGIN_LEFT = 75
+MARGIN = 20
+TICKS = 5
+
+
+def segments(mask):
+    """Súvislé úseky True v maske ako dvojice (začiatok, koniec)."""
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask.astype(np.int8), [0]])))
+    return zip(edges[::2], edges[1::2])
+
+
+class TimeSeriesGraph(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = None
+        self.unit = ""
+        self.span = None
+        self.message = "Žiadne dáta"
+        self.setMinimumHeight(180)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_series(self, series, start, end, unit=""):
+        """series z TelemetryStore.series(); start/end je zobrazený rozsah (unix čas)."""
+        self.series = series if series is not None and len(series["times"]) else None
+        self.span = (start, end)
+        self.unit = unit
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        text_color = self.palette().windowText().color()
+        area = QRectF(MARGIN_LEFT, MARGIN, max(1, self.width() - MARGIN_LEFT - MARGIN),
+                      max(1, self.height() - 2 * MARGIN))
+        painter.setPen(QPen(text_color))
+        painter.drawRect(area)
+        if self.series is None:
+            painter.drawText(area, Qt.AlignCenter, self.message)
+            return
+        times = self.series["times"]
+        low, mean, high = self.series["min"], self.series["mean"], self.series["max"]
+        start, end = self.span
+        bottom, top = np.nanmin(low), np.nanmax(high)
+        if not np.isfinite(bottom):
+            painter.drawText(area, Qt.AlignCenter, self.message)
+            return
+        if top - bottom < 1e-9:
+            bottom, top = bottom - 0.5, top + 0.5
+        xs = area.left() + (times - start) / max(end - start, 1e-9) * area.width()
+        scale = area.height() / (top - bottom)
+
+        def ys(values):
+            return area.bottom() - (values - bottom) * scale
+
+        band, line = QColor(70, 130, 180, 70), QColor(70, 130, 180)
+        valid = ~np.isnan(mean)
+        for first, last in segments(valid):
+            x = xs[first:last]
+            upper = [QPointF(a, b) for a, b in zip(x, ys(high[first:last]))]
+            lower = [QPointF(a, b) for a, b in zip(x[::-1], ys(low[first:last])[::-1])]
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(band)
+            painter.drawPolygon(QPolygonF(upper + lower))
+            painter.setPen(QPen(line, 1.5))
+            painter.drawPolyline(QPolygonF([QPointF(a, b) for a, b in zip(x, ys(mean[first:last]))]))
+
+        painter.setPen(QPen(text_color))
+        unit = f" {self.unit}" if self.unit else ""
+        for i in range(TICKS + 1):
+            value = bottom + (top - bottom) * i / TICKS
+            y = ys(value)
+            painter.drawLine(QPointF(area.left() - 4, y), QPointF(area.left(), y))
+            painter.drawText(QRectF(0, y - 8, MARGIN_LEFT - 6, 16), Qt.AlignRight | Qt.AlignVCenter, f"{value:.3g}{unit}")
+        fmt = "%H:%M" if end - start <= 86400 else "%d.%m."
+        for i in range(TICKS + 1):
+            x = area.left() + area.width() * i / TICKS
+            label = datetime.fromtimestamp(start + (end - start) * i / TICKS).strftime(fmt)
+            painter.drawText(QRectF(x - 40, area.bottom() + 2, 80, MARGIN - 2), Qt.AlignHCenter | Qt.AlignTop, label)
@@ -0,0 +1,193 @@
+"""Mosty medzi jadrom a Qt: výsledky jobov a zmeny stavov prichádzajú ako signály v GUI vlákne."""
+import logging
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from applog import MAX_LOG_LINES, BufferHandler, add_sink, remove_sink
+
+log = logging.getLogger("jadiv.gui")
+
+FLUSH_INTERVAL_MS = 200
+FINISHED_IDS = 200
+HEARTBEAT_MS = 100
+STALL_THRESHOLD = 0.25
+
+
+class JobSignals(QObject):
+    job_started = pyqtSignal(object)
+    job_finished = pyqtSignal(object)
+
+    def __init__(self, executor, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self._callbacks = {}
+        self._finished = OrderedDict()
+        self.job_finished.connect(self._dispatch)
+        executor.add_listener(self._on_event)
+
+    def _on_event(self, event, job):
+        # Volá sa z pracovného vlákna; emit do objektu v GUI vlákne je queued.
+        if event == "started":
+            self.job_started.emit(job)
+        else:
+            self.job_finished.emit(job)
+
+    def run(self, name, args, on_done=None, cwd=None):
+        """Spustí príkaz a on_done(job) zavolá v GUI vlákne po dokončení."""
+        return self.track(self.executor.run_command(name, args, cwd=cwd), on_done)
+
+    def submit(self, name, func, *args, on_done=None, **kwargs):
+        return self.track(self.executor.submit(name, func, *args, **kwargs), on_done)
+
+    def track(self, job, on_done):
+        """Zaregistruje on_done(job) pre job odoslaný inde (napr. cez Controller).
+
+        Zlúčený príkaz (dvojklik) vráti ten istý job, takže callbackov môže byť viac;
+        ak už job skončil a jeho signál prešiel, callback sa zavolá hneď v ďalšom cykle.
+        """
+        if on_done is None:
+            return job
+        if job.id in self._finished:
+            QTimer.singleShot(0, lambda: on_done(job))
+        else:
+            # Signal o dokončení je vo fronte udalostí, takže callback tu stihneme zaregistrovať.
+            self._callbacks.setdefault(job.id, []).append(on_done)
+        return job
+
+    def _dispatch(self, job):
+        self._finished[job.id] = None
+        if len(self._finished) > FINISHED_IDS:
+            self._finished.popitem(last=False)
+        for callback in self._callbacks.pop(job.id, []):
+            callback(job)
+
+    def close(self):
+        self.executor.remove_listener(self._on_event)
+
+
+class SlotStateSignals(QObject):
+    """Zmeny v SlotStateCache ako Qt signál slot_changed(zásuvka, zapnutá)."""
+    slot_changed = pyqtSignal(int, object)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self._emit = self.slot_changed.emit
+        cache.add_listener(self._emit)
+
+    def close(self):
+        self.cache.remove_listener(self._emit)
+
+
+class HostStatusSignals(QObject):
+    """Zmeny dostupnosti z ReachabilityMonitor ako Qt signál host_changed(ip, HostStatus)."""
+    host_changed = pyqtSignal(str, object)
+
+    def __init__(self, monitor, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self._emit = self.host_changed.emit
+        monitor.add_listener(self._emit)
+
+    def close(self):
+        self.monitor.remove_listener(self._emit)
+
+
+class ConfigSignals(QObject):
+    """Zmeny konfigurácie z ConfigRegistry ako Qt signál config_changed(Config, zmenené sekcie)."""
+    config_changed = pyqtSignal(object, object)
+
+    def __init__(self, registry, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self._emit = self.config_changed.emit
+        registry.add_listener(self._emit)
+
+    def close(self):
+        self.registry.remove_listener(self._emit)
+
+
+class RoofSignals(QObject):
+    """Zmeny stavu strechy z RoofController ako Qt signál roof_changed(status)."""
+    roof_changed = pyqtSignal(object)
+
+    def __init__(self, roof, parent=None):
+        super().__init__(parent)
+        self.roof = roof
+        self._emit = self.roof_changed.emit
+        roof.add_listener(self._emit)
+
+    def close(self):
+        self.roof.remove_listener(self._emit)
+
+
+class SiteSignals(QObject):
+    """Zmeny agentov z Coordinator ako Qt signál agent_changed(stav agenta)."""
+    agent_changed = pyqtSignal(object)
+
+    def __init__(self, coordinator, parent=None):
+        super().__init__(parent)
+        self.coordinator = coordinator
+        self._emit = self.agent_changed.emit
+        coordinator.add_listener(self._emit)
+
+    def close(self):
+        self.coordinator.remove_listener(self._emit)
+
+
+class LogViewFlusher(QObject):
+    """Dávkovo vypisuje riadky z logovacej pipeline do QPlainTextEdit s obmedzeným počtom riadkov."""
+
+    def __init__(self, widget, interval_ms=FLUSH_INTERVAL_MS, max_lines=MAX_LOG_LINES, parent=None):
+        super().__init__(parent)
+        self.widget = widget
+        widget.setMaximumBlockCount(max_lines)
+        self.handler = add_sink(BufferHandler(max_lines))
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(interval_ms)
+
+    def flush(self):
+        lines = self.handler.drain()
+        if lines:
+            self.widget.appendPlainText("\n".join(lines))
+
+    def close(self):
+        self.timer.stop()
+        remove_sink(self.handler)
+
+
+class StallDetector(QObject):
+    """Meria oneskorenie udalostnej slučky GUI: časovač tiká každých HEARTBEAT_MS a
+    o koľko neskôr príde, toľko bolo GUI vlákno zablokované."""
+
+    def __init__(self, interval_ms=HEARTBEAT_MS, threshold=STALL_THRESHOLD, parent=None):
+        super().__init__(parent)
+        self.interval = interval_ms / 1000
+        self.threshold = threshold
+        self.max_lag = 0.0
+        from metrics import LAG_BUCKETS, get_metrics
+        metrics = get_metrics()
+        self.lag = metrics.histogram("jadiv_gui_lag_seconds", "Oneskorenie udalostnej slučky GUI", buckets=LAG_BUCKETS)
+        self.stalls = metrics.counter("jadiv_gui_stalls_total", f"Zablokovania GUI vlákna dlhšie ako {threshold} s")
+        self.blocked = metrics.counter("jadiv_gui_blocked_seconds_total", "Celkový čas zablokovaného GUI vlákna")
+        self._last = time.monotonic()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._beat)
+        self.timer.start(interval_ms)
+
+    def _beat(self):
+        now = time.monotonic()
+        lag = max(now - self._last - self.interval, 0.0)
+        self._last = now
+        self.lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            self.stalls.inc()
+            self.blocked.inc(lag)
+            log.warning(f"GUI vlákno bolo zablokované {lag * 1000:.0f} ms")
+
+    def close(self):
+        self.timer.stop()
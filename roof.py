@@ -0,0 +1,380 @@
+"""Ovládanie strechy cez USB HID relé priamo z procesu.
+
+Doska usb-relay-hid (V-USB, 16c0:05df) sa otvorí raz a handle ostáva otvorený;
+pohyb strechy je jeden impulz relé (zapnúť, počkať PULSE_TIME, vypnúť), teda
+dva zápisy feature reportu namiesto spustenia shellu, skriptu a CLI.
+
+Strecha nemá koncové snímače, preto sa poloha sleduje stavovým automatom:
+impulz z polohy "closed" začne otváranie, z "open" zatváranie; po TRAVEL_TIME
+sekundách je strecha opäť "idle" v novej polohe. Počas pohybu sa ďalší impulz
+odmietne (druhý impulz by motor zastavil uprostred). Chyba relé prepne
+automat do stavu "fault"; z neho ho vyvedie reset() alebo úspešný ručný
+impulz. Príkazy so smerom (sekvencie, plán) sa odmietnu, kým poloha nie je
+známa (po štarte bez uloženej polohy, po poruche alebo po ručnom impulze
+z neznámej polohy); známu polohu nastaví obsluha cez reset(). Posledná
+známa poloha sa ukladá do roof_state.json, takže prežije reštart aj OTA.
+
+Ak modul hid (pip install hidapi) alebo doska chýba, použije sa pôvodný
+skript strecha_on.sh s rovnakým stavovým automatom.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from config import get_config
+from jobs import run_process
+from metrics import timed
+
+log = logging.getLogger("jadiv.roof")
+
+VENDOR_ID = 0x16C0
+PRODUCT_ID = 0x05DF
+REPORT_SIZE = 9
+CMD_ON = 0xFF
+CMD_OFF = 0xFD
+
+RELAY = 1
+PULSE_TIME = 0.5
+TRAVEL_TIME = 60.0
+ROOF_STATE_FILE = "roof_state.json"
+
+IDLE = "idle"
+OPENING = "opening"
+CLOSING = "closing"
+FAULT = "fault"
+
+OPEN = "open"
+CLOSED = "closed"
+UNKNOWN = "unknown"
+
+
+class RoofError(RuntimeError):
+    """Relé strechy nereaguje."""
+
+
+class RoofBusy(ValueError):
+    """Strecha sa práve hýbe alebo je v poruche; príkaz sa neodoslal."""
+
+
+class FakeHidDevice:
+    """Náhrada dosky relé pre skúšky: pamätá si stav relé a všetky zápisy."""
+
+    def __init__(self, relays=2, serial="FAKE1", fail=False):
+        self.relays = relays
+        self.serial = serial
+        self.fail = fail
+        self.state = 0
+        self.writes = []
+        self.closed = False
+
+    def send_feature_report(self, data):
+        if self.fail:
+            raise OSError("fake HID: zápis zlyhal")
+        data = list(data)
+        self.writes.append((time.monotonic(), data[1], data[2]))
+        bit = 1 << (data[2] - 1)
+        self.state = self.state | bit if data[1] == CMD_ON else self.state & ~bit
+        return len(data)
+
+    def get_feature_report(self, report_id, size):
+        if self.fail:
+            raise OSError("fake HID: čítanie zlyhalo")
+        report = list(self.serial.encode()[:5].ljust(5, b"\0")) + [0, 0, self.state, 0]
+        return report[:size]
+
+    def close(self):
+        self.closed = True
+
+
+def _open_hid(serial=None):
+    """Otvorí prvú dosku (alebo dosku so sériovým číslom z feature reportu)."""
+    try:
+        import hid
+    except ImportError as e:
+        raise RoofError(f"Modul hid nie je nainštalovaný (pip install hidapi): {e}")
+    for info in hid.enumerate(VENDOR_ID, PRODUCT_ID):
+        device = hid.device()
+        try:
+            device.open_path(info["path"])
+            if serial is None or bytes(device.get_feature_report(0, REPORT_SIZE)[:5]).rstrip(b"\0").decode() == serial:
+                return device
+        except (OSError, ValueError):
+            pass
+        device.close()
+    raise RoofError("USB HID relé nebolo nájdené" + (f" (sériové číslo {serial})" if serial else ""))
+
+
+class HidRelay:
+    """Trvalý handle na dosku relé; po chybe sa raz pokúsi zariadenie otvoriť znova."""
+
+    def __init__(self, relay=RELAY, serial=None, opener=_open_hid):
+        self.relay = relay
+        self.serial = serial
+        self.opener = opener
+        self._device = None
+
+    def open(self):
+        if self._device is None:
+            self._device = self.opener(self.serial)
+        return self._device
+
+    def close(self):
+        if self._device is not None:
+            try:
+                self._device.close()
+            except OSError:
+                pass
+            self._device = None
+
+    def _write(self, command):
+        report = [0, command, self.relay] + [0] * (REPORT_SIZE - 3)
+        for attempt in (1, 2):
+            try:
+                self.open().send_feature_report(report)
+                return
+            except (OSError, ValueError) as e:
+                self.close()
+                if attempt == 2:
+                    raise RoofError(f"Zápis do relé zlyhal: {e}")
+
+    def set(self, on):
+        self._write(CMD_ON if on else CMD_OFF)
+
+    def is_on(self):
+        try:
+            report = self.open().get_feature_report(0, REPORT_SIZE)
+        except (OSError, ValueError) as e:
+            self.close()
+            raise RoofError(f"Čítanie relé zlyhalo: {e}")
+        return bool(report[7] & (1 << (self.relay - 1)))
+
+    def pulse(self, duration=PULSE_TIME):
+        self.set(True)
+        try:
+            time.sleep(duration)
+        finally:
+            self.set(False)
+
+
+class ScriptRelay:
+    """Pôvodný spôsob: skript strecha_on.sh v priečinku usb-relay-hid."""
+
+    def __init__(self, script, cwd, runner=run_process):
+        self.script = script
+        self.cwd = cwd
+        self.runner = runner
+
+    def pulse(self, duration=PULSE_TIME):
+        try:
+            result = self.runner([self.script], cwd=self.cwd)
+        except OSError as e:
+            raise RoofError(str(e))
+        if result.returncode != 0:
+            raise RoofError((result.stderr or "").strip() or f"Skript skončil s kódom {result.returncode}")
+
+    def close(self):
+        pass
+
+
+def load_position(path=ROOF_STATE_FILE):
+    """Posledná uložená poloha strechy; bez súboru alebo s chybným súborom UNKNOWN."""
+    try:
+        with open(path, "r") as f:
+            position = json.load(f).get("position")
+    except (OSError, ValueError, AttributeError):
+        return UNKNOWN
+    return position if position in (OPEN, CLOSED) else UNKNOWN
+
+
+class RoofController:
+    """Stavový automat strechy nad jedným relé (HidRelay alebo ScriptRelay)."""
+
+    def __init__(self, relay, pulse_time=PULSE_TIME, travel_time=TRAVEL_TIME, position=UNKNOWN, state_file=None):
+        self.relay = relay
+        self.pulse_time = pulse_time
+        self.travel_time = travel_time
+        self.position = position
+        self.state_file = state_file
+        self.error = None
+        self.last_latency = None
+        self._state = IDLE
+        self._moved = None
+        self._start_position = position
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(status) po každej zmene stavu (z vlákna, ktoré ju spôsobilo)."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        status = self.status()
+        for callback in list(self._listeners):
+            try:
+                callback(status)
+            except Exception:
+                log.exception("Chyba v listeneri strechy")
+
+    def _settle(self):
+        """Ukončí pohyb, ktorý už trvá dlhšie ako travel_time (volá sa pod zámkom)."""
+        if self._state in (OPENING, CLOSING) and time.monotonic() - self._moved >= self.travel_time:
+            # Z neznámej polohy nevieme, kam impulz strechu poslal.
+            if self._start_position != UNKNOWN:
+                self.position = OPEN if self._state == OPENING else CLOSED
+            self._state = IDLE
+            self._save()
+            return True
+        return False
+
+    def _save(self):
+        """Zapíše polohu (pod zámkom); počas pohybu je poloha na disku neznáma."""
+        if self.state_file is None:
+            return
+        position = self.position if self._state == IDLE else UNKNOWN
+        try:
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"position": position, "updated": time.time()}, f)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            log.warning(f"Polohu strechy sa nepodarilo uložiť: {e}")
+
+    def _refuse(self, direction):
+        """Dôvod odmietnutia impulzu (volá sa pod zámkom) alebo None."""
+        if self._state in (OPENING, CLOSING):
+            remaining = self.travel_time - (time.monotonic() - self._moved)
+            return f"Strecha sa hýbe ({self._state}), skúste o {max(remaining, 0):.0f} s"
+        if direction is None:
+            return None
+        if self._state == FAULT:
+            return f"Strecha je v poruche: {self.error}"
+        if self.position == UNKNOWN:
+            return "Poloha strechy nie je známa; po kontrole ju nastavte (POST /roof/reset s position)"
+        return None
+
+    @property
+    def state(self):
+        with self._lock:
+            settled = self._settle()
+        if settled:
+            self._notify()
+        return self._state
+
+    def check_ready(self, direction=None):
+        """Vyhodí RoofBusy, ak by sa impulz teraz odmietol."""
+        self.state
+        with self._lock:
+            reason = self._refuse(direction)
+        if reason is not None:
+            raise RoofBusy(reason)
+
+    def trigger(self, direction=None):
+        """Jeden impulz relé; `direction` (open/close) preskočí impulz, ak je strecha už v cieľovej polohe."""
+        with self._lock:
+            self._settle()
+            reason = self._refuse(direction)
+            if reason is not None:
+                raise RoofBusy(reason)
+            if direction is not None and {"open": OPEN, "close": CLOSED}.get(direction) == self.position:
+                return self.status_locked()
+            self._start_position = self.position
+            self._state = CLOSING if self.position == OPEN else OPENING
+            self.error = None
+            self._moved = time.monotonic()
+            self._save()
+            relay = self.relay
+        # Stav už je "opening"/"closing", takže súbežný impulz sa odmietne aj bez držania zámku.
+        try:
+            with timed("relay" if isinstance(relay, HidRelay) else "strecha_on.sh") as call:
+                relay.pulse(self.pulse_time)
+        except RoofError as e:
+            with self._lock:
+                self._state = FAULT
+                self.error = str(e)
+                self.position = UNKNOWN
+                self._save()
+            self._notify()
+            log.warning(f"Porucha strechy: {e}")
+            raise
+        self.last_latency = call.seconds - self.pulse_time
+        # Koniec pohybu oznámi časovač, aby GUI nemuselo stav periodicky čítať.
+        timer = threading.Timer(max(self.travel_time - (time.monotonic() - self._moved), 0), lambda: self.state)
+        timer.daemon = True
+        timer.start()
+        self._notify()
+        status = self.status()
+        log.info(f"Strecha: {'otváranie' if status['state'] == OPENING else 'zatváranie'}")
+        return status
+
+    def configure(self, relay, pulse_time, travel_time):
+        """Vymení relé a časovanie po zmene konfigurácie (prebiehajúci pohyb dobehne)."""
+        with self._lock:
+            old, self.relay = self.relay, relay
+            self.pulse_time = pulse_time
+            self.travel_time = travel_time
+        if old is not relay:
+            old.close()
+
+    def reset(self, position=UNKNOWN):
+        """Zruší poruchu alebo pohyb a nastaví známu polohu (po kontrole na mieste)."""
+        with self._lock:
+            self._state = IDLE
+            self.error = None
+            self.position = position
+            self._save()
+            self.relay.close()
+        self._notify()
+
+    def status_locked(self):
+        remaining = None
+        if self._state in (OPENING, CLOSING):
+            remaining = max(self.travel_time - (time.monotonic() - self._moved), 0.0)
+        return {"state": self._state, "position": self.position, "remaining": remaining,
+                "error": self.error, "latency": self.last_latency}
+
+    def status(self):
+        with self._lock:
+            self._settle()
+            return self.status_locked()
+
+
+def create_relay(config):
+    """Relé podľa config.roof; pri backend auto bez modulu hid alebo dosky ScriptRelay."""
+    settings = config.roof
+    backend = settings["backend"]
+    if backend == "script":
+        return ScriptRelay(config.strecha_script, config.strecha_dir)
+    if backend == "fake":
+        return HidRelay(settings["relay"], opener=lambda serial: FakeHidDevice())
+    relay = HidRelay(settings["relay"], settings["serial"])
+    if backend == "hid":
+        # Doska sa otvorí až pri prvom impulze; chyba potom prepne strechu do poruchy.
+        return relay
+    try:
+        relay.open()
+        return relay
+    except RoofError as e:
+        log.info(f"{e}; strecha pôjde cez {config.strecha_script}")
+    return ScriptRelay(config.strecha_script, config.strecha_dir)
+
+
+_roof = None
+_roof_lock = threading.Lock()
+
+
+def get_roof(config=None):
+    """Zdieľaný automat strechy; relé sa pri prvom použití vyberie podľa konfigurácie."""
+    global _roof
+    with _roof_lock:
+        if _roof is None:
+            config = config or get_config()
+            settings = config.roof
+            _roof = RoofController(create_relay(config), settings["pulse"], settings["travel_time"],
+                                   load_position(), ROOF_STATE_FILE)
+        return _roof
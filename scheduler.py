@@ -0,0 +1,284 @@
+"""Plánovač akcií v konkrétny čas alebo pri udalostiach Slnka.
+
+Všetky opakované úlohy obsluhuje jedno vlákno nad haldou (heapq) zoradenou
+podľa času ďalšieho spustenia; nepotrebuje vlákno na každú úlohu. Úloha len
+odošle job do executora, takže pomalá akcia plánovač nezdrží. Vlákno spí
+najviac MAX_SLEEP sekúnd, aby sa po zmene systémového času (NTP po štarte
+Raspberry Pi) plán rýchlo zorientoval.
+
+Plán v config.json ("schedule") je zoznam úloh, napr.
+{"name": "vecer", "event": "nautical_dusk", "offset": -10, "action": "sequence", "sequence": "otvorenie"}
+alebo {"name": "rano", "at": "06:30", "action": "slots", "slots": {"2": false}}.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from types import MappingProxyType
+
+log = logging.getLogger("jadiv.scheduler")
+
+MAX_SLEEP = 60.0
+ACTIONS = ("slots", "wake", "roof", "update_check", "update", "sequence")
+
+
+class ScheduleError(ValueError):
+    """Neplatná definícia plánu."""
+
+
+class Every:
+    """Opakovanie každých `seconds` sekúnd."""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ScheduleError("Interval musí byť kladný")
+        self.seconds = float(seconds)
+
+    def next(self, after):
+        return after + self.seconds
+
+    def describe(self):
+        return f"každých {self.seconds:.0f} s"
+
+
+class Daily:
+    """Každý deň v miestnom čase HH:MM."""
+
+    def __init__(self, at):
+        try:
+            parsed = datetime.strptime(at, "%H:%M")
+        except (TypeError, ValueError):
+            raise ScheduleError(f"Neplatný čas {at}, očakáva sa HH:MM")
+        self.at = at
+        self.hour = parsed.hour
+        self.minute = parsed.minute
+
+    def next(self, after):
+        when = datetime.fromtimestamp(after).replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if when.timestamp() <= after:
+            when = (when + timedelta(days=1)).replace(hour=self.hour, minute=self.minute)
+        return when.timestamp()
+
+    def describe(self):
+        return f"denne o {self.at}"
+
+
+class SunEvent:
+    """Udalosť Slnka (astro.EVENTS) posunutá o `offset` minút."""
+
+    def __init__(self, event, offset=0.0, location=None):
+        try:
+            from astro import EVENTS, get_table
+        except ImportError as e:
+            raise ScheduleError(f"Udalosti Slnka potrebujú numpy: {e}")
+        if event not in EVENTS:
+            raise ScheduleError(f"Neznáma udalosť {event}, možnosti: {', '.join(EVENTS)}")
+        self.event = event
+        self.offset = float(offset) * 60
+        self.table = get_table(*location) if location else get_table()
+
+    def next(self, after):
+        when = self.table.next(self.event, after - self.offset)
+        return None if when is None else when + self.offset
+
+    def describe(self):
+        if not self.offset:
+            return self.event
+        return f"{self.event} {self.offset / 60:+.0f} min"
+
+
+class Task:
+    """Overená úloha plánu z konfigurácie; zariadenia sú už vyhľadané."""
+
+    def __init__(self, name, rule, action, slots=None, devices=(), sequence=None):
+        self.name = name
+        self.rule = rule
+        self.action = action
+        self.slots = MappingProxyType(dict(slots or {}))
+        self.devices = tuple(devices)
+        self.sequence = sequence
+
+
+def parse_rule(raw, location=None):
+    if "every" in raw:
+        try:
+            return Every(float(raw["every"]))
+        except (TypeError, ValueError) as e:
+            raise ScheduleError(f"every: {e}")
+    if "at" in raw:
+        return Daily(raw["at"])
+    if "event" in raw:
+        try:
+            offset = float(raw.get("offset", 0))
+        except (TypeError, ValueError) as e:
+            raise ScheduleError(f"offset: {e}")
+        return SunEvent(raw["event"], offset, location)
+    raise ScheduleError("chýba at, event alebo every")
+
+
+def parse_schedule(raw, find_device, sequences, location=None):
+    """Overí zoznam úloh plánu (unikátne mená, známe akcie, zariadenia a sekvencie)."""
+    if not isinstance(raw, list):
+        raise ScheduleError("schedule musí byť zoznam úloh")
+    tasks = []
+    for index, item in enumerate(raw):
+        if not isinstance(item, dict):
+            raise ScheduleError(f"Úloha #{index + 1} musí byť objekt")
+        name = str(item.get("name") or f"uloha{index + 1}")
+        try:
+            rule = parse_rule(item, location)
+            action = item.get("action")
+            if action not in ACTIONS:
+                raise ScheduleError(f"neznáma akcia {action}")
+            slots = {int(slot): bool(on) for slot, on in dict(item.get("slots") or {}).items()}
+            if action == "slots" and not slots:
+                raise ScheduleError("chýba slots")
+            devices = []
+            for value in item.get("devices") or []:
+                device = find_device(value)
+                if device is None:
+                    raise ScheduleError(f"neznáme zariadenie {value}")
+                devices.append(device)
+            if action == "wake" and not devices:
+                raise ScheduleError("chýba devices")
+            sequence = item.get("sequence")
+            if action == "sequence" and sequence not in sequences:
+                raise ScheduleError(f"neznáma sekvencia {sequence}")
+        except (ScheduleError, TypeError, ValueError) as e:
+            raise ScheduleError(f"Plán, úloha {name}: {e}")
+        tasks.append(Task(name, rule, action, slots, devices, sequence))
+    names = [task.name for task in tasks]
+    if len(set(names)) != len(names):
+        raise ScheduleError("Plán: duplicitné mená úloh")
+    return tuple(tasks)
+
+
+class Entry:
+    """Naplánovaná úloha v plánovači."""
+
+    def __init__(self, name, rule, callback, group):
+        self.name = name
+        self.rule = rule
+        self.callback = callback
+        self.group = group
+        self.next_run = None
+        self.last_run = None
+        self.last_error = None
+        self.runs = 0
+        self.token = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "group": self.group,
+            "rule": self.rule.describe(),
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+            "runs": self.runs,
+        }
+
+
+class Scheduler:
+    """Jedno časovacie vlákno nad haldou (čas, poradie, úloha); zrušené položky sa z haldy len preskočia."""
+
+    def __init__(self, max_sleep=MAX_SLEEP):
+        self.max_sleep = max_sleep
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def _push(self, entry, after):
+        when = entry.rule.next(after)
+        entry.next_run = when
+        entry.token = next(self._counter)
+        if when is not None:
+            heapq.heappush(self._heap, (when, entry.token, entry))
+
+    def add(self, name, rule, callback, group=None, after=None):
+        """Naplánuje callback(); úloha s rovnakým menom sa nahradí."""
+        entry = Entry(name, rule, callback, group)
+        with self._cond:
+            old = self._entries.get(name)
+            if old is not None:
+                old.token = None
+            self._entries[name] = entry
+            self._push(entry, time.time() if after is None else after)
+            self._cond.notify()
+        return entry
+
+    def remove(self, name):
+        with self._cond:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                entry.token = None
+
+    def clear(self, group):
+        with self._cond:
+            for name in [name for name, entry in self._entries.items() if entry.group == group]:
+                self._entries.pop(name).token = None
+
+    def upcoming(self):
+        with self._cond:
+            entries = list(self._entries.values())
+        return [entry.to_dict() for entry in sorted(entries, key=lambda e: (e.next_run is None, e.next_run or 0))]
+
+    def start(self):
+        with self._cond:
+            self._stop = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+    def _due(self):
+        """Počká na najbližšiu platnú úlohu a vyberie ju z haldy (None pri zastavení)."""
+        with self._cond:
+            while not self._stop:
+                while self._heap and self._heap[0][2].token != self._heap[0][1]:
+                    heapq.heappop(self._heap)
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    entry = heapq.heappop(self._heap)[2]
+                    # Ďalší termín sa počíta od "teraz", zmeškané spustenia sa nedobiehajú.
+                    self._push(entry, now)
+                    return entry
+                delay = self._heap[0][0] - now if self._heap else self.max_sleep
+                self._cond.wait(min(delay, self.max_sleep))
+            return None
+
+    def _run(self):
+        while True:
+            entry = self._due()
+            if entry is None:
+                return
+            entry.last_run = time.time()
+            entry.runs += 1
+            try:
+                entry.callback()
+                entry.last_error = None
+            except Exception as e:
+                entry.last_error = str(e)
+                log.warning(f"Plánovaná úloha {entry.name} zlyhala: {e}")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
@@ -0,0 +1,295 @@
+"""Sekvencie krokov so závislosťami (napr. otvorenie a zatvorenie observatória).
+
+Kroky sa definujú v config.json v sekcii "sequences". Každý krok môže čakať na
+iné kroky ("after"), na dostupnosť zariadení ("wait_up"/"wait_down") a má
+časový limit. Nezávislé vetvy bežia súbežne, takže celá sekvencia trvá len
+toľko ako jej najdlhšia (kritická) cesta.
+
+Príklad kroku: {"id": "montaze", "action": "wake", "devices": ["AZ2000 mount"],
+"after": ["napajanie"], "wait_up": ["AZ2000 mount"], "timeout": 180}
+"""
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+log = logging.getLogger("jadiv.sequences")
+
+ACTIONS = ("slots", "wake", "roof", "wait")
+STEP_TIMEOUT = 300.0
+POLL_INTERVAL = 1.0
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class SequenceError(ValueError):
+    """Neplatná definícia sekvencie."""
+
+
+class Step:
+    """Jeden krok sekvencie; zariadenia sú už vyhľadané v konfigurácii."""
+
+    def __init__(self, step_id, action, after=(), slots=None, devices=(), seconds=0.0,
+                 wait_up=(), wait_down=(), timeout=STEP_TIMEOUT, direction=None):
+        self.id = step_id
+        self.action = action
+        self.after = tuple(after)
+        self.slots = MappingProxyType(dict(slots or {}))
+        self.devices = tuple(devices)
+        self.seconds = seconds
+        self.wait_up = tuple(wait_up)
+        self.wait_down = tuple(wait_down)
+        self.timeout = timeout
+        self.direction = direction
+
+
+def _devices(name, step_id, key, values, find_device):
+    if isinstance(values, str):
+        values = [values]
+    devices = []
+    for value in values or []:
+        device = find_device(value)
+        if device is None:
+            raise SequenceError(f"Sekvencia {name}, krok {step_id}: neznáme zariadenie {value} v {key}")
+        devices.append(device)
+    return devices
+
+
+def parse_sequence(name, raw_steps, find_device):
+    """Overí kroky jednej sekvencie (unikátne id, známe závislosti, bez cyklov)."""
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise SequenceError(f"Sekvencia {name} musí byť neprázdny zoznam krokov")
+    steps = []
+    for index, raw in enumerate(raw_steps):
+        if not isinstance(raw, dict):
+            raise SequenceError(f"Sekvencia {name}, krok #{index + 1} musí byť objekt")
+        step_id = str(raw.get("id") or f"krok{index + 1}")
+        action = raw.get("action")
+        if action not in ACTIONS:
+            raise SequenceError(f"Sekvencia {name}, krok {step_id}: neznáma akcia {action}")
+        after = raw.get("after", [])
+        after = [after] if isinstance(after, str) else list(after)
+        try:
+            slots = {int(slot): bool(on) for slot, on in dict(raw.get("slots") or {}).items()}
+            seconds = float(raw.get("seconds", 0))
+            timeout = float(raw.get("timeout", STEP_TIMEOUT))
+        except (TypeError, ValueError) as e:
+            raise SequenceError(f"Sekvencia {name}, krok {step_id}: {e}")
+        if action == "slots" and not slots:
+            raise SequenceError(f"Sekvencia {name}, krok {step_id}: chýba slots")
+        devices = _devices(name, step_id, "devices", raw.get("devices"), find_device)
+        if action == "wake" and not devices:
+            raise SequenceError(f"Sekvencia {name}, krok {step_id}: chýba devices")
+        direction = raw.get("direction")
+        if direction not in (None, "open", "close"):
+            raise SequenceError(f"Sekvencia {name}, krok {step_id}: direction musí byť open alebo close")
+        steps.append(Step(step_id, action, after, slots, devices, seconds,
+                          _devices(name, step_id, "wait_up", raw.get("wait_up"), find_device),
+                          _devices(name, step_id, "wait_down", raw.get("wait_down"), find_device),
+                          timeout, direction))
+    ids = [step.id for step in steps]
+    if len(set(ids)) != len(ids):
+        raise SequenceError(f"Sekvencia {name}: duplicitné id krokov")
+    for step in steps:
+        for dep in step.after:
+            if dep not in ids:
+                raise SequenceError(f"Sekvencia {name}, krok {step.id}: neznámy krok {dep} v after")
+    # Kahnov algoritmus: ak nejaký krok nikdy nemá splnené závislosti, je v cykle.
+    waiting = {step.id: set(step.after) for step in steps}
+    while waiting:
+        ready = [step_id for step_id, deps in waiting.items() if not deps]
+        if not ready:
+            raise SequenceError(f"Sekvencia {name}: cyklus v závislostiach ({', '.join(sorted(waiting))})")
+        for step_id in ready:
+            del waiting[step_id]
+        for deps in waiting.values():
+            deps.difference_update(ready)
+    return tuple(steps)
+
+
+def parse_sequences(raw, find_device):
+    if not isinstance(raw, dict):
+        raise SequenceError("sequences musí byť objekt {meno: [kroky]}")
+    return MappingProxyType({str(name): parse_sequence(name, steps, find_device) for name, steps in raw.items()})
+
+
+class StepRun:
+    def __init__(self, step):
+        self.step = step
+        self.status = PENDING
+        self.job = None
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.monotonic()) - self.started
+
+    def to_dict(self):
+        return {
+            "id": self.step.id,
+            "action": self.step.action,
+            "after": list(self.step.after),
+            "status": self.status,
+            "duration": self.duration,
+            "error": self.error,
+            "job_id": self.job.id if self.job is not None else None,
+        }
+
+
+class SequenceRun:
+    """Priebeh jedného spustenia sekvencie."""
+
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = {step.id: StepRun(step) for step in steps}
+        self.status = RUNNING
+        self.created = time.time()
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def duration(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def failures(self):
+        return [f"{run.step.id}: {run.error}" for run in self.steps.values() if run.status == FAILED]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "created": self.created,
+            "duration": self.duration,
+            "steps": [run.to_dict() for run in self.steps.values()],
+        }
+
+
+class SequenceRunner:
+    """Vykonáva kroky cez Controller; naraz beží najviac jedna sekvencia."""
+
+    def __init__(self, controller, monitor, poll=POLL_INTERVAL):
+        self.controller = controller
+        self.monitor = monitor
+        self.poll = poll
+        self.active = None
+        self.runs = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def _changed(self, *args):
+        self._wake.set()
+
+    def run(self, name, steps):
+        """Blokujúce vykonanie (job executora vo vlastnom vlákne); pri zlyhaní kroku vyhodí RuntimeError."""
+        with self._lock:
+            if self.active is not None:
+                raise RuntimeError(f"Sekvencia {self.active} ešte beží")
+            self.active = name
+        run = SequenceRun(name, steps)
+        self.runs[name] = run
+        self.controller.executor.add_listener(self._changed)
+        self.monitor.add_listener(self._changed)
+        try:
+            self._loop(run)
+        finally:
+            self.controller.executor.remove_listener(self._changed)
+            self.monitor.remove_listener(self._changed)
+            run.finished = time.monotonic()
+            with self._lock:
+                self.active = None
+        failures = run.failures()
+        run.status = FAILED if failures else DONE
+        total = sum(step_run.duration or 0 for step_run in run.steps.values())
+        log.info(f"Sekvencia {name} {'zlyhala' if failures else 'hotová'} za {run.duration:.0f} s "
+                 f"(súčet krokov {total:.0f} s)")
+        if failures:
+            raise RuntimeError("; ".join(failures))
+        return run
+
+    def _loop(self, run):
+        while True:
+            self._wake.clear()
+            progressed = False
+            for step_run in run.steps.values():
+                if step_run.status == PENDING:
+                    deps = [run.steps[dep] for dep in step_run.step.after]
+                    if any(dep.status in (FAILED, SKIPPED) for dep in deps):
+                        step_run.status = SKIPPED
+                        step_run.error = "predchádzajúci krok zlyhal"
+                        progressed = True
+                    elif all(dep.status == DONE for dep in deps):
+                        self._start(run, step_run)
+                        progressed = True
+                if step_run.status == RUNNING:
+                    progressed = self._advance(run, step_run) or progressed
+            if all(step_run.status not in (PENDING, RUNNING) for step_run in run.steps.values()):
+                return
+            if not progressed:
+                self._wake.wait(self.poll)
+
+    def _start(self, run, step_run):
+        step = step_run.step
+        step_run.status = RUNNING
+        step_run.started = time.monotonic()
+        log.info(f"{run.name}: krok {step.id} ({step.action})")
+        try:
+            if step.action == "slots":
+                step_run.job = self.controller.set_slots(dict(step.slots))
+            elif step.action == "wake":
+                step_run.job = self.controller.wake([device['mac'] for device in step.devices])
+            elif step.action == "roof":
+                step_run.job = self.controller.roof(step.direction)
+        except Exception as e:
+            self._finish(run, step_run, FAILED, str(e))
+            return
+        watched = [device['ip'] for device in step.wait_up + step.wait_down]
+        if watched:
+            self.monitor.boost(watched, step.timeout)
+
+    def _ready(self, step_run):
+        step = step_run.step
+        if step.action == "wait" and step_run.duration < step.seconds:
+            return False
+        # Krok strechy je hotový až po dobehnutí pohybu, nie po impulze relé.
+        if step.action == "roof" and self.controller.roof_status()["state"] in ("opening", "closing"):
+            return False
+        for device in step.wait_up:
+            status = self.monitor.status(device['ip'])
+            if status is None or not status.up:
+                return False
+        for device in step.wait_down:
+            status = self.monitor.status(device['ip'])
+            if status is None or status.up is not False:
+                return False
+        return True
+
+    def _advance(self, run, step_run):
+        """Posunie bežiaci krok; vráti True, ak sa skončil."""
+        job = step_run.job
+        if job is not None and job.done and not job.ok:
+            self._finish(run, step_run, FAILED, job.error_text)
+            return True
+        if (job is None or job.done) and self._ready(step_run):
+            self._finish(run, step_run, DONE)
+            return True
+        if step_run.duration > step_run.step.timeout:
+            self._finish(run, step_run, FAILED, f"časový limit {step_run.step.timeout:.0f} s")
+            return True
+        return False
+
+    def _finish(self, run, step_run, status, error=None):
+        step_run.status = status
+        step_run.error = error
+        step_run.finished = time.monotonic()
+        if status == DONE:
+            log.info(f"{run.name}: krok {step_run.step.id} hotový za {step_run.duration:.1f} s")
+        else:
+            log.warning(f"{run.name}: krok {step_run.step.id} zlyhal: {error}")
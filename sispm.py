@@ -0,0 +1,144 @@
+"""Ovládanie zásuviek sispmctl cez jednu reláciu na každú lištu.
+
+sispmctl pri každom spustení znovu hľadá USB zariadenie, preto sa požiadavky
+na zapnutie/vypnutie, ktoré prídu krátko po sebe, zlúčia do jedného volania
+(sispmctl -o 1 -o 2 -f 3). Protichodné požiadavky pre tú istú zásuvku sa
+nezlúčia: neskoršia ide do ďalšieho volania, takže zapni-vypni sa vykoná
+celé a každý čakajúci dostane výsledok volania so svojimi stavmi. Všetky
+volania na USB zbernicu sú serializované, takže GUI a REST API si navzájom
+neskočia do príkazu.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from jobs import run_process
+from metrics import timed
+
+log = logging.getLogger("jadiv.sispm")
+
+SISPMCTL = "sispmctl"
+BATCH_WINDOW = 0.05
+
+# sispmctl pri štarte prehľadá celú zbernicu, takže zámok je spoločný pre všetky lišty.
+USB_LOCK = threading.Lock()
+
+
+def check_slot(slot):
+    try:
+        slot = int(slot)
+    except (TypeError, ValueError):
+        raise ValueError(f"Neplatná zásuvka: {slot}") from None
+    if slot < 1:
+        raise ValueError(f"Neplatná zásuvka: {slot}")
+    return slot
+
+
+class PowerStrip:
+    """Relácia jednej lišty: zlučuje čakajúce požiadavky a posiela ich naraz."""
+
+    def __init__(self, device=None, runner=run_process, batch_window=BATCH_WINDOW, command=SISPMCTL):
+        self.device = device
+        self.runner = runner
+        self.batch_window = batch_window
+        self.command = command
+        self.invocations = 0
+        self._cond = threading.Condition()
+        # Dávky (stavy, čakajúci) v poradí príchodu; jedna dávka = jedno volanie sispmctl.
+        self._batches = []
+        self._thread = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(states, result) po každom zlúčenom prepnutí (z vlákna relácie)."""
+        self._listeners.append(callback)
+
+    def base_args(self):
+        args = [self.command]
+        if self.device is not None:
+            args += ["-d", str(self.device)]
+        return args
+
+    def run(self, *flags):
+        """Priame serializované volanie sispmctl (napr. -g all)."""
+        with USB_LOCK, timed("sispmctl") as call:
+            self.invocations += 1
+            result = self.runner(self.base_args() + [str(flag) for flag in flags])
+            call.ok = result.returncode == 0
+            return result
+
+    def switch_async(self, slot, on):
+        return self.set_slots_async({slot: on})
+
+    def set_slots_async(self, states):
+        """Zaradí {zásuvka: True/False} do najbližšieho zlúčeného volania; vráti Future."""
+        states = {check_slot(slot): bool(on) for slot, on in states.items()}
+        future = Future()
+        with self._cond:
+            last = self._batches[-1] if self._batches else None
+            if last is not None and all(last[0].get(slot, on) == on for slot, on in states.items()):
+                last[0].update(states)
+                last[1].append(future)
+            else:
+                self._batches.append((dict(states), [future]))
+            self._ensure_thread()
+            self._cond.notify()
+        return future
+
+    def switch(self, slot, on):
+        """Blokujúca verzia pre JobExecutor; vráti CompletedProcess zlúčeného volania."""
+        return self.switch_async(slot, on).result()
+
+    def set_slots(self, states):
+        return self.set_slots_async(states).result()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            name = f"sispm-{self.device if self.device is not None else 0}"
+            self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._batches:
+                    self._cond.wait()
+            # Krátko počkáme, aby sa pridali ďalšie požiadavky z toho istého kliku/skriptu.
+            if self.batch_window:
+                time.sleep(self.batch_window)
+            with self._cond:
+                batches, self._batches = self._batches, []
+            for pending, waiters in batches:
+                self._send(pending, waiters)
+
+    def _send(self, pending, waiters):
+        flags = []
+        for slot, on in sorted(pending.items()):
+            flags += ["-o" if on else "-f", str(slot)]
+        try:
+            result = self.run(*flags)
+        except Exception as e:
+            for future in waiters:
+                future.set_exception(e)
+        else:
+            for callback in list(self._listeners):
+                try:
+                    callback(pending, result)
+                except Exception:
+                    log.exception("Chyba v listeneri lišty")
+            for future in waiters:
+                future.set_result(result)
+
+
+_strips = {}
+_strips_lock = threading.Lock()
+
+
+def get_strip(device=None):
+    """Zdieľaná relácia pre lištu (None = prvá nájdená sispmctl)."""
+    with _strips_lock:
+        strip = _strips.get(device)
+        if strip is None:
+            strip = _strips[device] = PowerStrip(device)
+        return strip
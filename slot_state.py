@@ -0,0 +1,206 @@
+"""Pamäťová cache stavu zásuviek a poller, ktorý ju plní cez sispmctl -g all.
+
+GUI aj REST API čítajú stav z cache a o zmenách sa dozvedia cez listenery,
+takže počet zobrazení nezvyšuje záťaž USB lišty.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from sispm import get_strip
+
+log = logging.getLogger("jadiv.slot_state")
+
+POLL_INTERVAL = 10.0
+MAX_INTERVAL = 300.0
+STATE_FILE = "slot_state.json"
+MAX_STATE_AGE = 300.0
+
+_STATUS_RE = re.compile(r"outlet\s+(\d+)\s*:\s*(on|off)", re.IGNORECASE)
+
+
+def state_text(on):
+    """Text do štítku zásuvky."""
+    if on is None:
+        return "?"
+    return "ON" if on else "OFF"
+
+
+def parse_status(output):
+    """Z výstupu `sispmctl -g all` vráti {zásuvka: True/False}."""
+    return {int(slot): state.lower() == "on" for slot, state in _STATUS_RE.findall(output or "")}
+
+
+class SlotStateCache:
+    """Posledný známy stav každej zásuvky (True/False, None = neznámy)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+        self._listeners = []
+        self.updated = None
+
+    def add_listener(self, callback):
+        """callback(slot, on) sa volá len pri zmene, z vlákna, ktoré zmenu zapísalo."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def get(self, slot):
+        with self._lock:
+            return self._states.get(slot)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._states)
+
+    def update(self, states):
+        changed = []
+        with self._lock:
+            for slot, on in states.items():
+                if self._states.get(slot) != on:
+                    self._states[slot] = on
+                    changed.append((slot, on))
+            self.updated = time.time()
+        self._notify(changed)
+        return changed
+
+    def _notify(self, changed):
+        for slot, on in changed:
+            for callback in list(self._listeners):
+                try:
+                    callback(slot, on)
+                except Exception:
+                    log.exception(f"Chyba v listeneri zásuvky {slot}")
+
+    def save(self, path=STATE_FILE):
+        """Uloží stav pred reštartom procesu (napr. po OTA), aby GUI nezačínalo s "?"."""
+        with self._lock:
+            data = {"updated": self.updated, "states": {str(slot): on for slot, on in self._states.items()}}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def restore(self, path=STATE_FILE, max_age=MAX_STATE_AGE):
+        """Načíta stav uložený pred reštartom; súbor sa potom zmaže, starý stav sa ignoruje.
+
+        Zásuvky, ktorých stav už prečítal poller, sa neprepíšu.
+        """
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError):
+            return False
+        updated = data.get("updated")
+        if updated is None or time.time() - updated > max_age:
+            return False
+        changed = []
+        with self._lock:
+            for slot, on in data.get("states", {}).items():
+                if int(slot) not in self._states:
+                    self._states[int(slot)] = on
+                    changed.append((int(slot), on))
+            if self.updated is None:
+                self.updated = updated
+        self._notify(changed)
+        return True
+
+
+class StatusPoller:
+    """Vlákno, ktoré periodicky číta stav lišty; pri chybách predlžuje interval."""
+
+    def __init__(self, strip, cache, interval=POLL_INTERVAL, max_interval=MAX_INTERVAL):
+        self.strip = strip
+        self.cache = cache
+        self.interval = interval
+        self.max_interval = max_interval
+        self.failures = 0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        strip.add_listener(self._on_switched)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="slot-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def poke(self):
+        """Vynúti okamžité čítanie (napr. po prepnutí zásuvky)."""
+        self._wake.set()
+
+    def current_delay(self):
+        if not self.failures:
+            return self.interval
+        return min(self.max_interval, self.interval * (2 ** self.failures))
+
+    def poll_once(self):
+        try:
+            result = self.strip.run("-g", "all")
+            if result.returncode != 0:
+                raise RuntimeError((result.stderr or "").strip() or f"sispmctl -g all skončil s kódom {result.returncode}")
+            states = parse_status(result.stdout)
+            if not states:
+                raise RuntimeError("sispmctl -g all nevrátil stav zásuviek")
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            return None
+        self.failures = 0
+        self.last_error = None
+        self.cache.update(states)
+        return states
+
+    def _on_switched(self, states, result):
+        # Úspešný príkaz zapíšeme hneď a skutočný stav overí najbližšie čítanie.
+        if result.returncode == 0:
+            self.cache.update(states)
+        self.poke()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._wake.wait(self.current_delay())
+            self._wake.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_state_cache():
+    """Zdieľaná cache; uložený stav sa načíta raz, skôr než ju dostane poller."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache = SlotStateCache()
+            cache.restore()
+            _cache = cache
+        return _cache
+
+
+def get_poller(interval=None):
+    """Zdieľaný poller prvej lišty; treba ho ešte spustiť cez start()."""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = StatusPoller(get_strip(), get_state_cache())
+        if interval is not None:
+            _poller.interval = float(interval)
+        return _poller
@@ -0,0 +1,397 @@
+"""Časové rady stavu zásuviek, dostupnosti zariadení a latencie príkazov.
+
+Každých poll_interval sekúnd (rovnaký interval ako čítanie lišty) sa z cache
+stavu, monitora a metrík zapíše jeden riadok do kruhového bufferu "raw".
+Súčasne sa v numpy priebežne agregujú vrstvy "minute" a "hour" (priemer,
+minimum, maximum), takže graf za mesiac číta ~720 hodinových riadkov namiesto
+surových vzoriek.
+
+Všetky vrstvy majú pevnú kapacitu a ležia v jednom binárnom súbore
+telemetry.bin, ktorý sa pri štarte otvorí cez np.memmap. Zápis ide priamo do
+mapovanej pamäte (prežije aj reštart po OTA), flush() ho len vynúti na disk.
+Kanál je pomenovaný textom ("zasuvka 2", "host C14", "odozva C14",
+"prikaz sispmctl"); hodnota chýbajúceho kanála je NaN.
+"""
+import json
+import logging
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from metrics import get_metrics
+
+log = logging.getLogger("jadiv.telemetry")
+
+TELEMETRY_FILE = "telemetry.bin"
+MAGIC = b"JADIVTS1"
+VERSION = 1
+MAX_CHANNELS = 64
+NAMES_SIZE = 4096
+# (meno, dĺžka kroku v s alebo None pre surové vzorky, kapacita): deň vzoriek, týždeň minút, rok hodín.
+TIERS = (("raw", None, 8640), ("minute", 60, 7 * 1440), ("hour", 3600, 366 * 24))
+SAMPLE_INTERVAL = 10.0
+FLUSH_INTERVAL = 300.0
+MAX_POINTS = 1000
+# Vrstva sa použije, ak má najviac MAX_POINTS * DECIMATE riadkov; zvyšok zhustí decimate().
+DECIMATE = 4
+UNITS = {"zasuvka": "", "host": "", "odozva": "ms", "prikaz": "ms", "front": ""}
+
+
+def channel_unit(channel):
+    return UNITS.get(channel.split(" ", 1)[0], "")
+
+
+def decimate(series, max_points):
+    """Zlúči susedné body tak, aby ich bolo najviac max_points (priemer priemerov, min minim, max maxím)."""
+    n = len(series["times"])
+    if n <= max_points:
+        return series
+    k = -(-n // max_points)
+    pad = (-n) % k
+
+    def groups(values):
+        return np.concatenate([values, np.full(pad, np.nan)]).reshape(-1, k)
+    with warnings.catch_warnings():
+        # Skupina samých NaN (kanál vtedy neexistoval) dá NaN, to je v poriadku.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return {"tier": series["tier"], "times": np.nanmean(groups(series["times"]), axis=1),
+                "mean": np.nanmean(groups(series["mean"]), axis=1),
+                "min": np.nanmin(groups(series["min"]), axis=1), "max": np.nanmax(groups(series["max"]), axis=1)}
+
+
+class Tier:
+    """Kruhový buffer jednej vrstvy: časy a hodnoty (raw 1 pole, agregáty priemer/min/max)."""
+
+    def __init__(self, name, step, capacity, times, values, meta):
+        self.name = name
+        self.step = step
+        self.capacity = capacity
+        self.times = times
+        self.values = values
+        self._meta = meta
+
+    @property
+    def head(self):
+        return int(self._meta[0])
+
+    @property
+    def count(self):
+        return int(self._meta[1])
+
+    def append(self, t, row):
+        head = self.head
+        self.times[head] = t
+        self.values[head] = row
+        self._meta[0] = (head + 1) % self.capacity
+        self._meta[1] = min(self.count + 1, self.capacity)
+
+    def order(self):
+        """Indexy platných riadkov od najstaršieho."""
+        return (self.head - self.count + np.arange(self.count)) % self.capacity
+
+    def last_time(self):
+        return float(self.times[(self.head - 1) % self.capacity]) if self.count else None
+
+    def first_time(self):
+        return float(self.times[(self.head - self.count) % self.capacity]) if self.count else None
+
+    def select(self, column, start=None, end=None):
+        """(časy, hodnoty) kanála v rozsahu [start, end) od najstaršieho."""
+        order = self.order()
+        times = self.times[order]
+        lo = 0 if start is None else int(np.searchsorted(times, start, "left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, "left"))
+        rows = order[lo:hi]
+        return times[lo:hi], self.values[rows, column]
+
+
+class Bucket:
+    """Rozpracovaný agregát jednej vrstvy (súčet, počet, min, max po kanáloch)."""
+
+    def __init__(self, channels):
+        self.start = None
+        self.sum = np.zeros(channels)
+        self.count = np.zeros(channels, dtype=np.int64)
+        self.min = np.full(channels, np.inf)
+        self.max = np.full(channels, -np.inf)
+
+    def add(self, rows):
+        """Pridá jeden alebo viac surových riadkov (NaN sa nepočíta)."""
+        rows = np.atleast_2d(rows)
+        valid = ~np.isnan(rows)
+        self.sum += np.where(valid, rows, 0.0).sum(axis=0)
+        self.count += valid.sum(axis=0)
+        self.min = np.fmin(self.min, np.where(valid, rows, np.inf).min(axis=0))
+        self.max = np.fmax(self.max, np.where(valid, rows, -np.inf).max(axis=0))
+
+    def row(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.sum / self.count
+        empty = self.count == 0
+        low = np.where(empty, np.nan, self.min)
+        high = np.where(empty, np.nan, self.max)
+        return np.stack([mean, low, high], axis=1)
+
+    def reset(self, start):
+        self.start = start
+        self.sum[:] = 0
+        self.count[:] = 0
+        self.min[:] = np.inf
+        self.max[:] = -np.inf
+
+
+class TelemetryStore:
+    """Všetky vrstvy v jednom memmap súbore s pevnou veľkosťou."""
+
+    def __init__(self, path=TELEMETRY_FILE, tiers=TIERS, max_channels=MAX_CHANNELS):
+        self.path = path
+        self.max_channels = max_channels
+        self._lock = threading.Lock()
+        self._full_logged = False
+        self._layout = [(name, step, capacity) for name, step, capacity in tiers]
+        meta_size = 8 * (4 + 2 * len(self._layout))
+        offset = len(MAGIC) + meta_size + NAMES_SIZE
+        sections = []
+        for name, step, capacity in self._layout:
+            fields = 1 if step is None else 3
+            sections.append((offset, offset + 8 * capacity, fields))
+            offset += 8 * capacity + 4 * capacity * max_channels * fields
+        self.size = offset
+        self._mm = self._open()
+        self._meta = np.ndarray((4 + 2 * len(self._layout),), np.int64, self._mm, len(MAGIC))
+        self._names = self._mm[len(MAGIC) + meta_size:len(MAGIC) + meta_size + NAMES_SIZE]
+        self.tiers = {}
+        for index, ((name, step, capacity), (times_at, values_at, fields)) in enumerate(zip(self._layout, sections)):
+            times = np.ndarray((capacity,), np.float64, self._mm, times_at)
+            shape = (capacity, max_channels) if fields == 1 else (capacity, max_channels, 3)
+            values = np.ndarray(shape, np.float32, self._mm, values_at)
+            self.tiers[name] = Tier(name, step, capacity, times, values, self._meta[4 + 2 * index:6 + 2 * index])
+        self.raw = self.tiers[self._layout[0][0]]
+        self.channels = self._load_names()
+        self._index = {name: column for column, name in enumerate(self.channels)}
+        self._buckets = {name: Bucket(max_channels) for name, step, _ in self._layout if step}
+        self._resume()
+
+    def _header(self):
+        return [VERSION, self.max_channels, len(self._layout), self.size]
+
+    def _open(self):
+        """Otvorí existujúci súbor, ak sedí rozloženie; inak ho založí nanovo."""
+        try:
+            mm = np.memmap(self.path, np.uint8, "r+")
+            meta = np.ndarray((4,), np.int64, mm, len(MAGIC))
+            if mm.size == self.size and bytes(mm[:len(MAGIC)]) == MAGIC and list(meta) == self._header():
+                return mm
+            log.warning(f"Súbor {self.path} má iný formát, zakladám nový")
+            del mm
+        except (OSError, ValueError):
+            pass
+        mm = np.memmap(self.path, np.uint8, "w+", shape=(self.size,))
+        mm[:len(MAGIC)] = np.frombuffer(MAGIC, np.uint8)
+        np.ndarray((4,), np.int64, mm, len(MAGIC))[:] = self._header()
+        return mm
+
+    def _load_names(self):
+        data = bytes(self._names).rstrip(b"\0")
+        try:
+            return list(json.loads(data)) if data else []
+        except ValueError:
+            return []
+
+    def _save_names(self):
+        data = json.dumps(self.channels).encode()
+        if len(data) > NAMES_SIZE:
+            raise ValueError("Mená kanálov sa nezmestia do hlavičky")
+        self._names[:] = 0
+        self._names[:len(data)] = np.frombuffer(data, np.uint8)
+
+    def _resume(self):
+        """Rozpracované agregáty po reštarte dopočíta zo surových vzoriek v bufferi."""
+        last = self.raw.last_time()
+        if last is None:
+            return
+        order = self.raw.order()
+        times = self.raw.times[order]
+        for name, bucket in self._buckets.items():
+            step = self.tiers[name].step
+            bucket.reset(last // step * step)
+            lo = int(np.searchsorted(times, bucket.start, "left"))
+            if lo < len(times):
+                bucket.add(self.raw.values[order[lo:]])
+
+    def column(self, channel, create=False):
+        column = self._index.get(channel)
+        if column is None and create:
+            if len(self.channels) >= self.max_channels:
+                if not self._full_logged:
+                    self._full_logged = True
+                    log.warning(f"Telemetria: viac ako {self.max_channels} kanálov, {channel} sa nezapíše")
+                return None
+            column = self._index[channel] = len(self.channels)
+            self.channels.append(channel)
+            self._save_names()
+        return column
+
+    def append(self, t, values):
+        """Zapíše vzorku {kanál: hodnota} v čase t a uzavrie agregáty, ktorým skončil interval."""
+        with self._lock:
+            last = self.raw.last_time()
+            if last is not None and t <= last:
+                return False
+            row = np.full(self.max_channels, np.nan, dtype=np.float32)
+            for channel, value in values.items():
+                column = self.column(channel, create=True)
+                if column is not None and value is not None:
+                    row[column] = value
+            for name, bucket in self._buckets.items():
+                step = self.tiers[name].step
+                start = t // step * step
+                if bucket.start is not None and start != bucket.start and bucket.count.any():
+                    self.tiers[name].append(bucket.start, bucket.row())
+                if start != bucket.start:
+                    bucket.reset(start)
+                bucket.add(row)
+            self.raw.append(t, row)
+            return True
+
+    def series(self, channel, start=None, end=None, max_points=MAX_POINTS):
+        """Body kanála z najjemnejšej vrstvy, ktorá pokryje rozsah, zhustené na najviac max_points.
+
+        Vráti {"tier", "times", "mean", "min", "max"} (numpy polia) alebo None pre neznámy kanál.
+        """
+        with self._lock:
+            column = self.column(channel)
+            if column is None:
+                return None
+            chosen = None
+            for name, step, _ in self._layout:
+                tier = self.tiers[name]
+                first = tier.first_time()
+                if first is None:
+                    continue
+                times, values = tier.select(column, start, end)
+                chosen = (name, step, times, values)
+                # Kým sa buffer neotočil, má všetky dáta od začiatku záznamu a hrubšia vrstva nemá staršie.
+                covers = start is None or first <= start or tier.count < tier.capacity
+                if covers and len(times) <= max_points * DECIMATE:
+                    break
+            if chosen is None:
+                return {"tier": self.raw.name, "times": np.empty(0), "mean": np.empty(0),
+                        "min": np.empty(0), "max": np.empty(0)}
+            name, step, times, values = chosen
+            values = np.array(values, dtype=np.float64)
+            times = np.array(times)
+        if step is None:
+            series = {"tier": name, "times": times, "mean": values, "min": values, "max": values}
+        else:
+            # Časy agregátov sú začiatky intervalov, bod kreslíme do stredu.
+            series = {"tier": name, "times": times + step / 2, "mean": values[:, 0],
+                      "min": values[:, 1], "max": values[:, 2]}
+        return decimate(series, max_points)
+
+    def flush(self):
+        with self._lock:
+            self._mm.flush()
+
+    def stats(self):
+        return {name: {"count": tier.count, "capacity": tier.capacity, "from": tier.first_time(),
+                       "to": tier.last_time()} for name, tier in self.tiers.items()}
+
+
+class TelemetryRecorder:
+    """Vlákno, ktoré v intervale čítania lišty zapisuje stav z cache a metrík (na hardvér nesiaha)."""
+
+    def __init__(self, store, interval=None):
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._commands = {}
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="telemetry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def current_interval(self):
+        if self.interval is not None:
+            return self.interval
+        from slot_state import get_poller
+        return get_poller().interval or SAMPLE_INTERVAL
+
+    def collect(self):
+        """Jedna vzorka: zásuvky (1/0), dostupnosť (1/0) a odozva hostov, priemerné trvanie príkazov."""
+        from jobs import get_executor
+        from monitor import get_monitor
+        from slot_state import get_state_cache
+        values = {}
+        for slot, on in get_state_cache().snapshot().items():
+            if on is not None:
+                values[f"zasuvka {slot}"] = float(on)
+        for host in get_monitor().snapshot().values():
+            if host["up"] is not None:
+                values[f"host {host['name']}"] = float(host["up"])
+            if host["latency"] is not None:
+                values[f"odozva {host['name']}"] = host["latency"] * 1000
+        commands = get_metrics().get("jadiv_command_duration_seconds")
+        for labels in (commands.label_sets() if commands else []):
+            summary = commands.summary(**labels)
+            count, total = self._commands.get(labels["command"], (0, 0.0))
+            if summary["count"] > count:
+                values[f"prikaz {labels['command']}"] = (summary["sum"] - total) / (summary["count"] - count) * 1000
+            self._commands[labels["command"]] = (summary["count"], summary["sum"])
+        values["front prikazov"] = float(get_executor().queue_depth)
+        return values
+
+    def sample(self):
+        return self.store.append(time.time(), self.collect())
+
+    def _loop(self):
+        flushed = time.monotonic()
+        while True:
+            try:
+                self.sample()
+                if time.monotonic() - flushed >= FLUSH_INTERVAL:
+                    self.store.flush()
+                    flushed = time.monotonic()
+            except Exception:
+                log.exception("Chyba pri zápise telemetrie")
+            if self._stop.wait(self.current_interval()):
+                self.store.flush()
+                return
+
+
+_store = None
+_recorder = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    global _store
+    with _telemetry_lock:
+        if _store is None:
+            _store = TelemetryStore()
+        return _store
+
+
+def start_telemetry(interval=None):
+    """Spustí zapisovanie vzoriek (raz na proces); vráti store."""
+    global _recorder
+    store = get_telemetry()
+    with _telemetry_lock:
+        if _recorder is None:
+            _recorder = TelemetryRecorder(store, interval)
+    _recorder.start()
+    return store
+
+
+def stop_telemetry():
+    if _recorder is not None:
+        _recorder.stop()
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from commands import Command, CommandError, Parallel, Wait, compile_script, execute_plan, submit_plan
+from jobs import JobExecutor
+
+
+class StubController:
+    """Controller, ktorého akcie len krátko bežia v poole executora."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.calls = []
+
+    def set_slots(self, states, key=None):
+        self.calls.append(dict(states))
+        return self.executor.submit("zasuvka", time.sleep, 0.05)
+
+    def wake(self, macs, key=None):
+        self.calls.append(list(macs))
+        return self.executor.submit("wol", time.sleep, 0.3)
+
+    def roof(self, direction=None, key=None):
+        self.calls.append(direction)
+        return self.executor.submit("strecha", time.sleep, 0.3)
+
+
+@pytest.fixture
+def controller():
+    executor = JobExecutor(max_workers=2)
+    yield StubController(executor)
+    executor.shutdown(wait=False)
+
+
+def test_concurrent_plans_do_not_starve_workers(controller):
+    plan = compile_script("zasuvka on 1; wait 0; zasuvka off 1")
+    jobs = [submit_plan(plan, controller) for _ in range(6)]
+    for job in jobs:
+        assert job.wait(10).ok, job.error_text
+    assert len(controller.calls) == 12
+
+
+def test_compile_error_has_line_number():
+    with pytest.raises(CommandError, match="Riadok 2"):
+        compile_script("zasuvka on 1\nzasuvka maybe 2")
+
+
+def test_consecutive_device_commands_form_one_batch():
+    plan = compile_script("zasuvka on 1\nzasuvka off 2\nwol C14\nstrecha open\nwait 1\nzasuvka on 3")
+    assert [type(step) for step in plan.steps] == [Parallel, Wait, Command]
+    batch = plan.steps[0]
+    assert sorted(command.action for command in batch.commands) == ["roof", "set_slots", "wake"]
+    slots = next(command for command in batch.commands if command.action == "set_slots")
+    assert slots.args[0] == {1: True, 2: False}
+
+
+def test_sequence_is_a_barrier():
+    plan = compile_script("zasuvka on 1; sekvencie; zasuvka on 2")
+    assert len(plan.steps) == 3
+
+
+def test_batch_runs_concurrently(controller):
+    # WOL a strecha trvajú po 0,3 s, zásuvky 0,05 s; za sebou by skript trval aspoň 0,65 s.
+    plan = compile_script("wol C14\nstrecha open\nwol VNT\nzasuvka on 1")
+    start = time.monotonic()
+    execute_plan(plan, controller)
+    assert time.monotonic() - start < 0.5
+    assert len(controller.calls) == 3
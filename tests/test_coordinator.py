@@ -0,0 +1,60 @@
+import socket
+
+import pytest
+
+from agent import DiscoveryResponder
+from coordinator import Coordinator, discover
+
+LOOPBACK_BROADCAST = "127.255.255.255"
+
+
+def free_port(kind=socket.SOCK_DGRAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def agents():
+    port = free_port()
+    # Porty API nikto nepočúva, takže obnova stavu skončí hneď odmietnutým spojením.
+    responders = [DiscoveryResponder(port, info=lambda name=name: {"name": name, "port": free_port(socket.SOCK_STREAM)})
+                  for name in ("a1", "a2")]
+    for responder in responders:
+        responder.start()
+    yield port
+    for responder in responders:
+        responder.stop()
+
+
+def test_discover_finds_both_agents(agents):
+    found = discover(0.5, LOOPBACK_BROADCAST, agents)
+    assert sorted(found) == ["a1", "a2"]
+    for name, (url, info) in found.items():
+        assert url == f"http://127.0.0.1:{info['port']}"
+
+
+def test_coordinator_adds_discovered_agents(agents):
+    coordinator = Coordinator(broadcast=LOOPBACK_BROADCAST, discovery_port=agents)
+    assert coordinator.discover(0.5) == ["a1", "a2"]
+    status = coordinator.site_status()
+    assert sorted(status["agents"]) == ["a1", "a2"]
+    assert status["online"] == 0
+    assert all(agent.error for agent in coordinator.agents())
+
+
+def test_fan_out_isolates_failing_agent(agents):
+    coordinator = Coordinator(broadcast=LOOPBACK_BROADCAST, discovery_port=agents)
+    coordinator.discover(0.5)
+
+    def call(agent):
+        if agent.name == "a1":
+            raise RuntimeError("nedostupný")
+        return agent.name
+    assert coordinator.fan_out(call) == {"a1": (None, "nedostupný"), "a2": ("a2", None)}
+    with pytest.raises(ValueError):
+        coordinator.fan_out(call, ["a3"])
+
+
+def test_no_agents():
+    assert discover(0.2, LOOPBACK_BROADCAST, free_port()) == {}
@@ -0,0 +1,60 @@
+import pytest
+
+from dedup import CommandDeduper, IdempotencyConflict
+from jobs import JobExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(max_workers=2)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def slots(executor, deduper, slot, on, **kwargs):
+    command = ("zasuvka", ((slot, on),))
+    return deduper.submit(command, lambda: executor.submit(f"zasuvka {slot}", lambda: on), 2.0,
+                          targets=[("zasuvka", slot)], **kwargs)
+
+
+def test_repeated_command_collapses(executor):
+    deduper = CommandDeduper()
+    first = slots(executor, deduper, 3, True).wait()
+    assert slots(executor, deduper, 3, True) is first
+    assert deduper.collapsed == 1
+
+
+def test_on_off_on_sends_every_command(executor):
+    deduper = CommandDeduper()
+    first = slots(executor, deduper, 3, True).wait()
+    second = slots(executor, deduper, 3, False).wait()
+    third = slots(executor, deduper, 3, True).wait()
+    assert len({first.id, second.id, third.id}) == 3
+    assert third.value is True
+    assert deduper.collapsed == 0
+
+
+def test_other_target_does_not_drop_entry(executor):
+    deduper = CommandDeduper()
+    first = slots(executor, deduper, 3, True).wait()
+    slots(executor, deduper, 4, False).wait()
+    assert slots(executor, deduper, 3, True) is first
+
+
+def test_failed_job_is_not_reused(executor):
+    deduper = CommandDeduper()
+
+    def fail():
+        raise OSError("lišta nedostupná")
+    failed = deduper.submit(("x",), lambda: executor.submit("x", fail)).wait()
+    assert not failed.ok
+    assert deduper.submit(("x",), lambda: executor.submit("x", lambda: 1)) is not failed
+
+
+def test_idempotency_key(executor):
+    deduper = CommandDeduper()
+    job = slots(executor, deduper, 2, True, key="k1").wait()
+    slots(executor, deduper, 2, False).wait()
+    assert slots(executor, deduper, 2, True, key="k1") is job
+    with pytest.raises(IdempotencyConflict):
+        slots(executor, deduper, 2, False, key="k1")
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ota import InstallError, UpdateChecker, build_manifest
+
+OLD = {"main.py": "import core\nVALUE = core.VALUE\n", "core.py": "VALUE = 1\n"}
+NEW = {"main.py": "import core\nVALUE = core.VALUE\n", "core.py": "VALUE = 2\n"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = self.server.files.get(self.path.lstrip("/"))
+        if body is None:
+            self.send_error(404)
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server:
+    """Miestna náhrada servera s aktualizáciami: manifest.json a súbory vedľa neho."""
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.files = {}
+        self.httpd.requests = []
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/manifest.json"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def publish(self, files, manifest=None):
+        self.httpd.files = {name: text.encode() for name, text in files.items()}
+        if manifest is None:
+            manifest = {"files": {name: hashlib.sha256(text.encode()).hexdigest() for name, text in files.items()}}
+        self.httpd.files["manifest.json"] = json.dumps(manifest).encode()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def app(tmp_path):
+    directory = tmp_path / "app"
+    directory.mkdir()
+    for name, text in OLD.items():
+        (directory / name).write_text(text)
+    return directory
+
+
+def checker(server, app, tmp_path):
+    return UpdateChecker(server.url, str(app / "main.py"), str(tmp_path / "ota_cache.json"))
+
+
+def read(app):
+    return {name: (app / name).read_text() for name in OLD}
+
+
+def test_check_uses_etag(server, app, tmp_path):
+    server.publish(NEW)
+    ota = checker(server, app, tmp_path)
+    first = ota.check()
+    assert first.available and first.new and not first.not_modified
+    assert first.changed == ["core.py"]
+    second = ota.check()
+    assert second.not_modified and second.available and not second.new
+    assert second.remote_sha256 == first.remote_sha256
+    # Nová inštancia si ETag prečíta z ota_cache.json.
+    assert checker(server, app, tmp_path).check().not_modified
+
+
+def test_up_to_date(server, app, tmp_path):
+    server.publish(OLD)
+    ota = checker(server, app, tmp_path)
+    status = ota.check()
+    assert not status.available
+    assert status.remote_sha256 == status.local_sha256
+    assert not ota.install()
+
+
+def test_install_and_rollback(server, app, tmp_path):
+    server.publish(NEW)
+    ota = checker(server, app, tmp_path)
+    assert ota.install()
+    assert read(app) == NEW
+    assert "/core.py" in server.requests and "/main.py" not in server.requests
+    assert not ota.check().available
+    assert [name for name in os.listdir(app) if name.startswith(".")] == []
+    version = ota.rollback()
+    assert sorted(os.listdir(version)) == ["core.py", "main.py"]
+    assert read(app) == OLD
+    assert ota.check().available
+
+
+def test_hash_mismatch_is_rejected(server, app, tmp_path):
+    manifest = build_manifest([str(app / "main.py")])
+    manifest["files"]["core.py"] = hashlib.sha256(b"VALUE = 3\n").hexdigest()
+    server.publish(NEW, manifest=manifest)
+    ota = checker(server, app, tmp_path)
+    with pytest.raises(InstallError):
+        ota.install()
+    assert read(app) == OLD
+    assert sorted(os.listdir(app)) == ["core.py", "main.py"]
+
+
+def test_incomplete_module_set_is_rejected(server, app, tmp_path):
+    server.publish({"main.py": "import helper\n"})
+    ota = checker(server, app, tmp_path)
+    with pytest.raises(InstallError):
+        ota.install()
+    assert read(app) == OLD
+
+
+def test_invalid_manifest(server, app, tmp_path):
+    server.publish({}, manifest={"files": {"../evil.py": "0" * 64}})
+    with pytest.raises(InstallError):
+        checker(server, app, tmp_path).check()
+
+
+def test_rollback_without_backup(server, app, tmp_path):
+    with pytest.raises(InstallError):
+        checker(server, app, tmp_path).rollback()
+
+
+@pytest.fixture
+def no_qt(tmp_path, monkeypatch):
+    """Podproces kontroly nenájde PyQt5, ako na Raspberry Pi bez GUI."""
+    blocker = tmp_path / "block" / "PyQt5"
+    blocker.mkdir(parents=True)
+    (blocker / "__init__.py").write_text('raise ModuleNotFoundError("No module named \'PyQt5\'", name="PyQt5")\n')
+    monkeypatch.setenv("PYTHONPATH", str(blocker.parent))
+
+
+GUI = {"main.py": "from PyQt5.QtWidgets import QApplication\nimport core\n", "core.py": "VALUE = 2\n",
+       "headless.py": "import core\nVALUE = core.VALUE\n"}
+
+
+def test_install_without_qt_checks_gui_free_modules(server, app, tmp_path, no_qt):
+    server.publish(GUI)
+    ota = checker(server, app, tmp_path)
+    assert ota.install()
+    assert read(app) == {name: GUI[name] for name in OLD}
+
+
+def test_broken_gui_free_module_rejected_without_qt(server, app, tmp_path, no_qt):
+    server.publish(dict(GUI, **{"core.py": "raise RuntimeError('chyba')\n"}))
+    ota = checker(server, app, tmp_path)
+    with pytest.raises(InstallError):
+        ota.install()
+    assert read(app) == OLD
+
+
+def test_published_manifest_matches_tree():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(root, "manifest.json")) as f:
+        published = json.load(f)
+    modules = [os.path.join(root, name) for name in os.listdir(root) if name.endswith(".py")]
+    # Po zmene modulu treba manifest pregenerovať: python3 ota.py manifest *.py > manifest.json
+    assert published == build_manifest(modules)
@@ -0,0 +1,108 @@
+import time
+
+import pytest
+
+from roof import (CLOSED, CLOSING, CMD_OFF, CMD_ON, FAULT, IDLE, OPEN, OPENING, UNKNOWN, FakeHidDevice, HidRelay,
+                  RoofBusy, RoofController, RoofError, load_position)
+
+TRAVEL = 0.2
+
+
+def controller(position=CLOSED, fail=False, state_file=None):
+    device = FakeHidDevice(fail=fail)
+    relay = HidRelay(relay=1, opener=lambda serial: device)
+    return RoofController(relay, pulse_time=0.01, travel_time=TRAVEL, position=position, state_file=state_file), device
+
+
+def settle(roof):
+    time.sleep(TRAVEL + 0.05)
+    return roof.state
+
+
+def test_open_close_cycle():
+    roof, device = controller(CLOSED)
+    roof.trigger("open")
+    assert roof.state == OPENING
+    assert [(command, relay) for _, command, relay in device.writes] == [(CMD_ON, 1), (CMD_OFF, 1)]
+    assert settle(roof) == IDLE
+    assert roof.position == OPEN
+    roof.trigger("close")
+    assert roof.state == CLOSING
+    settle(roof)
+    assert roof.position == CLOSED
+
+
+def test_busy_while_moving():
+    roof, _ = controller(CLOSED)
+    roof.trigger()
+    with pytest.raises(RoofBusy):
+        roof.trigger()
+    with pytest.raises(RoofBusy):
+        roof.check_ready()
+
+
+def test_direction_already_reached_skips_pulse():
+    roof, device = controller(OPEN)
+    roof.trigger("open")
+    assert device.writes == []
+    assert roof.state == IDLE
+
+
+def test_relay_failure_faults_and_refuses_direction():
+    roof, _ = controller(CLOSED, fail=True)
+    with pytest.raises(RoofError):
+        roof.trigger("open")
+    assert roof.state == FAULT
+    assert roof.position == UNKNOWN
+    with pytest.raises(RoofBusy):
+        roof.trigger("open")
+    with pytest.raises(RoofBusy):
+        roof.check_ready("close")
+
+
+def test_unknown_position_refuses_direction_until_reset():
+    roof, device = controller(UNKNOWN)
+    for direction in ("open", "close"):
+        with pytest.raises(RoofBusy):
+            roof.trigger(direction)
+    assert device.writes == []
+    roof.reset(CLOSED)
+    roof.trigger("open")
+    settle(roof)
+    assert roof.position == OPEN
+
+
+def test_manual_pulse_from_unknown_keeps_position_unknown():
+    roof, _ = controller(UNKNOWN)
+    roof.trigger()
+    settle(roof)
+    assert roof.position == UNKNOWN
+    with pytest.raises(RoofBusy):
+        roof.check_ready("open")
+
+
+def test_position_persisted(tmp_path):
+    path = str(tmp_path / "roof_state.json")
+    assert load_position(path) == UNKNOWN
+    roof, _ = controller(CLOSED, state_file=path)
+    roof.trigger("open")
+    assert load_position(path) == UNKNOWN
+    settle(roof)
+    assert load_position(path) == OPEN
+    roof.reset(CLOSED)
+    assert load_position(path) == CLOSED
+
+
+def test_fault_persists_unknown(tmp_path):
+    path = str(tmp_path / "roof_state.json")
+    roof, _ = controller(CLOSED, fail=True, state_file=path)
+    roof.reset(OPEN)
+    with pytest.raises(RoofError):
+        roof.trigger("close")
+    assert load_position(path) == UNKNOWN
+
+
+def test_corrupt_state_file_is_unknown(tmp_path):
+    path = tmp_path / "roof_state.json"
+    path.write_text("{")
+    assert load_position(str(path)) == UNKNOWN
@@ -0,0 +1,45 @@
+import pytest
+
+import core
+from config import Config
+from fakes import FakeSispmctl, FaultInjector
+from jobs import JobExecutor
+from sequences import SequenceError, parse_sequence
+from sispm import get_strip
+
+SEQUENCES = {"test": [{"id": "napajanie", "action": "slots", "slots": {"1": True}},
+                      {"id": "pauza", "action": "wait", "seconds": 0.1, "after": ["napajanie"]},
+                      {"id": "vypni", "action": "slots", "slots": {"1": False}, "after": ["pauza"]}]}
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    config = Config({"devices": [], "schedule": [], "sequences": SEQUENCES, "dedup_window": 0})
+    monkeypatch.setattr(core, "get_config", lambda: config)
+    fake = FakeSispmctl(FaultInjector(0.01))
+    monkeypatch.setattr(get_strip(), "runner", fake)
+    executor = JobExecutor(max_workers=1)
+    controller = core.Controller(executor)
+    controller.sequences.poll = 0.05
+    yield controller
+    executor.shutdown(wait=False)
+
+
+def test_sequence_does_not_hold_a_worker(controller):
+    # S jediným pracovníkom by sekvencia v poole zablokovala vlastné kroky.
+    job = controller.run_sequence("test").wait(10)
+    assert job.ok, job.error_text
+    run = controller.sequences.runs["test"].to_dict()
+    assert [step["status"] for step in run["steps"]] == ["done", "done", "done"]
+
+
+def test_repeated_start_returns_running_sequence(controller):
+    job = controller.run_sequence("test")
+    assert controller.run_sequence("test") is job
+    assert job.wait(10).ok, job.error_text
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(SequenceError, match="cyklus"):
+        parse_sequence("zla", [{"id": "a", "action": "wait", "after": ["b"]},
+                               {"id": "b", "action": "wait", "after": ["a"]}], lambda name: None)
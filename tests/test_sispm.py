@@ -0,0 +1,75 @@
+import subprocess
+import threading
+
+import pytest
+
+from sispm import PowerStrip
+
+
+class Runner:
+    """Zaznamená argumenty volaní sispmctl; prvé volanie môže podržať."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, args):
+        self.release.wait(5)
+        self.calls.append(args[1:])
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+
+@pytest.fixture
+def runner():
+    return Runner()
+
+
+def test_requests_in_window_share_one_call(runner):
+    strip = PowerStrip(runner=runner, batch_window=0.1)
+    futures = [strip.switch_async(1, True), strip.switch_async(2, False), strip.set_slots_async({3: True})]
+    results = [future.result(5) for future in futures]
+    assert runner.calls == [["-o", "1", "-f", "2", "-o", "3"]]
+    assert all(result is results[0] for result in results)
+
+
+def test_conflicting_states_are_not_merged(runner):
+    strip = PowerStrip(runner=runner, batch_window=0.1)
+    seen = []
+    strip.add_listener(lambda states, result: seen.append(dict(states)))
+    on = strip.switch_async(3, True)
+    off = strip.switch_async(3, False)
+    other = strip.switch_async(4, True)
+    assert on.result(5) is not off.result(5)
+    assert other.result(5) is off.result(5)
+    assert runner.calls == [["-o", "3"], ["-f", "3", "-o", "4"]]
+    assert seen == [{3: True}, {3: False, 4: True}]
+
+
+def test_repeated_same_state_merges(runner):
+    strip = PowerStrip(runner=runner, batch_window=0.1)
+    first, second = strip.switch_async(3, True), strip.switch_async(3, True)
+    assert first.result(5) is second.result(5)
+    assert strip.invocations == 1
+
+
+def test_requests_during_call_go_to_next_call(runner):
+    strip = PowerStrip(runner=runner, batch_window=0)
+    runner.release.clear()
+    first = strip.switch_async(1, True)
+    while strip.invocations == 0:
+        threading.Event().wait(0.01)
+    second = strip.switch_async(1, False)
+    runner.release.set()
+    first.result(5), second.result(5)
+    assert runner.calls == [["-o", "1"], ["-f", "1"]]
+
+
+def test_failure_reaches_every_waiter_of_the_call():
+    def failing(args):
+        raise OSError("sispmctl chýba")
+    strip = PowerStrip(runner=failing, batch_window=0.1)
+    futures = [strip.switch_async(1, True), strip.switch_async(2, True)]
+    for future in futures:
+        with pytest.raises(OSError):
+            future.result(5)
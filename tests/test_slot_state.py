@@ -0,0 +1,39 @@
+import json
+import time
+
+import slot_state
+from slot_state import SlotStateCache
+
+
+def write_state(path, states, age=0):
+    with open(path, "w") as f:
+        json.dump({"updated": time.time() - age, "states": {str(slot): on for slot, on in states.items()}}, f)
+
+
+def test_restore_fills_unknown_slots_and_notifies(tmp_path):
+    path = str(tmp_path / "slot_state.json")
+    write_state(path, {1: True, 2: False})
+    cache = SlotStateCache()
+    cache.update({2: True})
+    seen = []
+    cache.add_listener(lambda slot, on: seen.append((slot, on)))
+    assert cache.restore(path)
+    assert cache.snapshot() == {1: True, 2: True}
+    assert seen == [(1, True)]
+
+
+def test_old_state_is_ignored(tmp_path):
+    path = str(tmp_path / "slot_state.json")
+    write_state(path, {1: True}, age=slot_state.MAX_STATE_AGE + 1)
+    cache = SlotStateCache()
+    assert not cache.restore(path)
+    assert cache.snapshot() == {}
+
+
+def test_poller_uses_restored_cache(monkeypatch):
+    write_state(slot_state.STATE_FILE, {3: True})
+    monkeypatch.setattr(slot_state, "_cache", None)
+    monkeypatch.setattr(slot_state, "_poller", None)
+    poller = slot_state.get_poller()
+    assert poller.cache is slot_state.get_state_cache()
+    assert poller.cache.get(3) is True
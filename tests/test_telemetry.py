@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from telemetry import TelemetryStore, decimate
+
+SMALL = (("raw", None, 10), ("minute", 60, 5), ("hour", 3600, 100))
+DAY = 86400
+
+
+def store(tmp_path, tiers=SMALL, name="telemetry.bin"):
+    return TelemetryStore(str(tmp_path / name), tiers=tiers, max_channels=4)
+
+
+def test_raw_ring_wraps_at_capacity(tmp_path):
+    telemetry = store(tmp_path)
+    for i in range(25):
+        assert telemetry.append(float(i), {"front": i})
+    raw = telemetry.raw
+    assert raw.count == 10 and raw.head == 5
+    assert raw.first_time() == 15.0 and raw.last_time() == 24.0
+    times, values = raw.select(telemetry.column("front"))
+    assert list(times) == [float(i) for i in range(15, 25)]
+    assert list(values) == list(range(15, 25))
+    # Starší alebo rovnaký čas sa zahodí.
+    assert not telemetry.append(24.0, {"front": 0})
+
+
+def test_bucket_closes_when_minute_and_hour_change(tmp_path):
+    telemetry = store(tmp_path)
+    for t in range(0, 60, 10):
+        telemetry.append(float(t), {"front": t / 10 + 1, "host C14": None})
+    minute = telemetry.tiers["minute"]
+    assert minute.count == 0
+    telemetry.append(60.0, {"front": 100})
+    assert minute.count == 1
+    times, values = minute.select(telemetry.column("front"))
+    assert list(times) == [0.0]
+    assert list(values[0]) == pytest.approx([3.5, 1.0, 6.0])
+    # Kanál bez hodnôt ostane v agregáte NaN.
+    assert np.isnan(minute.select(telemetry.column("host C14"))[1]).all()
+    assert telemetry.tiers["hour"].count == 0
+    telemetry.append(3600.0, {"front": 1})
+    hour = telemetry.tiers["hour"]
+    assert hour.count == 1 and hour.first_time() == 0.0
+    assert minute.last_time() == 60.0
+
+
+def test_resume_after_reopen(tmp_path):
+    telemetry = store(tmp_path)
+    for t in range(0, 60, 10):
+        telemetry.append(float(t), {"zasuvka 2": t % 20 == 0, "front": 2})
+    telemetry.flush()
+    del telemetry
+    reopened = store(tmp_path)
+    assert reopened.channels == ["zasuvka 2", "front"]
+    assert reopened.raw.count == 6 and reopened.raw.last_time() == 50.0
+    # Rozpracovaná minúta sa dopočíta zo surových vzoriek, takže po reštarte nechýbajú.
+    reopened.append(60.0, {"front": 2})
+    times, values = reopened.tiers["minute"].select(reopened.column("zasuvka 2"))
+    assert list(times) == [0.0]
+    assert list(values[0]) == pytest.approx([0.5, 0.0, 1.0])
+
+
+def test_other_layout_starts_new_file(tmp_path):
+    store(tmp_path).append(1.0, {"front": 1})
+    other = store(tmp_path, tiers=(("raw", None, 20), ("minute", 60, 5)))
+    assert other.raw.count == 0 and other.channels == []
+
+
+def test_month_query_uses_hour_tier(tmp_path):
+    telemetry = store(tmp_path, tiers=(("raw", None, 50), ("minute", 60, 50), ("hour", 3600, 1000)))
+    end = 31 * DAY
+    for t in range(0, end, 600):
+        telemetry.append(float(t), {"odozva C14": t % 3600 / 60})
+    series = telemetry.series("odozva C14", end - 30 * DAY, end)
+    assert series["tier"] == "hour"
+    # Posledná hodina ešte nie je uzavretá.
+    assert len(series["times"]) == 30 * 24 - 1
+    assert series["times"][0] == end - 30 * DAY + 1800
+    assert series["min"][0] == 0 and series["max"][0] == 50
+    # Krátky rozsah pokryjú surové vzorky.
+    assert telemetry.series("odozva C14", end - 3600, end)["tier"] == "raw"
+    assert telemetry.series("neznamy", 0, end) is None
+
+
+def test_decimate_merges_neighbours():
+    times = np.arange(10.0)
+    series = {"tier": "raw", "times": times, "mean": times, "min": times, "max": times}
+    thin = decimate(series, 4)
+    assert len(thin["times"]) == 4
+    assert list(thin["min"]) == [0, 3, 6, 9]
+    assert list(thin["max"]) == [2, 5, 8, 9]
+    assert decimate(series, 10) is series
@@ -0,0 +1,95 @@
+"""Wake-on-LAN bez externého procesu.
+
+Magic packety sa skladajú priamo v Pythone a posielajú cez jeden znovu
+používaný UDP broadcast socket. wake_group zobudí viac zariadení naraz.
+"""
+import socket
+import threading
+import time
+
+from metrics import timed
+
+BROADCAST = "255.255.255.255"
+WOL_PORT = 9
+REPEAT = 3
+INTERVAL = 0.05
+
+
+def parse_mac(mac):
+    """Prevedie MAC adresu (aa:bb:.., aa-bb-.., aabb.cc..) na 6 bajtov."""
+    digits = "".join(ch for ch in str(mac) if ch not in ":-. ")
+    if len(digits) != 12:
+        raise ValueError(f"Neplatná MAC adresa: {mac}")
+    try:
+        return bytes.fromhex(digits)
+    except ValueError:
+        raise ValueError(f"Neplatná MAC adresa: {mac}") from None
+
+
+def magic_packet(mac):
+    """6x 0xFF a potom 16x MAC adresa."""
+    return b"\xff" * 6 + parse_mac(mac) * 16
+
+
+class WolSender:
+    """Posiela magic packety cez jeden trvalý broadcast socket."""
+
+    def __init__(self, broadcast=BROADCAST, port=WOL_PORT, repeat=REPEAT, interval=INTERVAL):
+        self.broadcast = broadcast
+        self.port = port
+        self.repeat = repeat
+        self.interval = interval
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _socket(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            self._sock = sock
+        return self._sock
+
+    def wake(self, mac, **kwargs):
+        return self.wake_group([mac], **kwargs)
+
+    def wake_group(self, macs, repeat=None, interval=None, broadcast=None, port=None):
+        """Zobudí všetky MAC adresy; každé kolo pošle paket každej z nich.
+
+        Všetky adresy sa overia vopred, takže chybná MAC neodošle polovicu skupiny.
+        Vracia počet zobudených adries.
+        """
+        packets = [magic_packet(mac) for mac in macs]
+        repeat = self.repeat if repeat is None else max(1, int(repeat))
+        interval = self.interval if interval is None else float(interval)
+        target = (broadcast or self.broadcast, port or self.port)
+        with self._lock, timed("wol"):
+            sock = self._socket()
+            try:
+                for round_no in range(repeat):
+                    for packet in packets:
+                        sock.sendto(packet, target)
+                    if round_no < repeat - 1 and interval > 0:
+                        time.sleep(interval)
+            except OSError:
+                # Socket po chybe siete zahodíme, ďalšie volanie si otvorí nový.
+                self.close()
+                raise
+        return len(packets)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def get_sender():
+    """Zdieľaný WOL sender pre celý proces."""
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = WolSender()
+        return _sender